@@ -0,0 +1,73 @@
+import asyncio
+import os
+import sys
+import unittest
+from async_runner import AsyncTestRunner
+
+"""
+Unit tests for AsyncTestRunner, run against a pseudo-terminal standing in for the MCU.
+"""
+
+
+@unittest.skipIf(sys.platform.startswith("win"), "needs a POSIX pseudo-terminal")
+class TestAsyncTestRunner(unittest.TestCase):
+
+    def setUp(self):
+        import tty
+        self.master, self.slave = os.openpty()
+        tty.setraw(self.slave)
+        self.port = os.ttyname(self.slave)
+
+    def tearDown(self):
+        os.close(self.master)
+        os.close(self.slave)
+
+    def test_request_returns_matching_reply(self):
+        async def scenario():
+            runner = AsyncTestRunner(port=self.port)
+            await runner.connect(handshake_timeout=0)
+            # Unrelated traffic arrives before the reply
+            os.write(self.master, b'{"event":"pwm","duty":1,"voltage":0.1}\n{"event":"detect","chip":"74F00"}\n')
+            reply = await runner.request("detect")
+            sent = os.read(self.master, 64)
+            line = await runner.lines().__anext__()
+            runner.close_connection()
+            return reply, sent, line
+
+        reply, sent, line = asyncio.run(scenario())
+
+        self.assertEqual(reply, '{"event":"detect","chip":"74F00"}')
+        self.assertEqual(sent, b"detect\n")
+        self.assertEqual(line, '{"event":"pwm","duty":1,"voltage":0.1}')
+
+    def test_request_without_reply_event_skips_streamed_lines(self):
+        async def scenario():
+            runner = AsyncTestRunner(port=self.port)
+            await runner.connect(handshake_timeout=0)
+            # Streamed samples must not be taken as the answer to an unknown command
+            os.write(self.master, b'{"event":"pwm","duty":1,"voltage":0.1}\n{"event":"health","min":0.1}\nok\n')
+            reply = await runner.request("select 2")
+            line = await runner.lines().__anext__()
+            runner.close_connection()
+            return reply, line
+
+        reply, line = asyncio.run(scenario())
+
+        self.assertEqual(reply, "ok")
+        self.assertEqual(line, '{"event":"pwm","duty":1,"voltage":0.1}')
+
+    def test_request_times_out(self):
+        async def scenario():
+            runner = AsyncTestRunner(port=self.port)
+            await runner.connect(handshake_timeout=0)
+            try:
+                await runner.request("status", timeout=0.05)
+            finally:
+                runner.close_connection()
+
+        with self.assertRaises(asyncio.TimeoutError):
+            asyncio.run(scenario())
+
+
+if __name__ == '__main__':
+    unittest.main()
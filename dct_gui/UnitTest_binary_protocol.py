@@ -0,0 +1,53 @@
+import unittest
+import binary_protocol as bp
+
+"""
+Unit tests for the binary framing: COBS round trips and BinaryFramer decoding.
+"""
+
+
+class TestCobs(unittest.TestCase):
+
+    def test_round_trip(self):
+        for data in (b"", b"\x00", b"\x00\x00", b"abc\x00def", bytes(range(256)) * 3, b"\x01" * 254):
+            encoded = bp.cobs_encode(data)
+            self.assertNotIn(0, encoded)
+            self.assertEqual(bp.cobs_decode(encoded), data)
+
+    def test_malformed_frame(self):
+        with self.assertRaises(ValueError):
+            bp.cobs_decode(b"\x05ab")
+
+
+class TestBinaryFramer(unittest.TestCase):
+
+    def test_mixed_frames_split_across_reads(self):
+        # Arrange
+        stream = (bp.encode_pwm([(10, 128, 2.5), (20, 0, 0.0)])
+                  + bp.encode_text('{"event":"summary","passes":4}')
+                  + bp.encode_vectors([(2, (1, 0), (1,))]))
+        framer = bp.BinaryFramer()
+
+        # Act
+        out = framer.feed(stream[:7]) + framer.feed(stream[7:])
+
+        # Assert
+        self.assertEqual(out, [
+            {"event": "pwm", "t_us": 10, "duty": 128, "voltage": 2.5},
+            {"event": "pwm", "t_us": 20, "duty": 0, "voltage": 0.0},
+            '{"event":"summary","passes":4}',
+            {"event": "vector", "gate": 2, "A": 1, "B": 0, "Y": 1},
+        ])
+        self.assertEqual(framer.pending(), 0)
+
+    def test_corrupt_frame_is_skipped(self):
+        framer = bp.BinaryFramer()
+
+        out = framer.feed(b"\x09zz\x00" + bp.encode_text("ok"))
+
+        self.assertEqual(out, ["ok"])
+        self.assertEqual(framer.bad_frames, 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,80 @@
+import threading
+import unittest
+from event_pipeline import EventPipeline
+from events import DetectEvent, HealthEvent, PwmBlock, SummaryEvent, TextLine, VectorEvent
+
+"""
+Unit tests for EventPipeline (decode stage with a bounded, policy-driven queue).
+"""
+
+PWM = '{"event":"pwm","duty":%d,"voltage":1.5}'
+SUMMARY = '{"event":"summary","test":"nand","passes":4,"fails":0,"pass_rate":100.0}'
+DETECT = '{"event":"detect","chip":"74F00"}'
+VECTOR = '{"event":"vector","A":1,"B":1,"Y":0}'
+HEALTH = '{"event":"health","min_v":0.1,"max_v":4.9,"avg_v":2.5}'
+
+
+class TestEventPipeline(unittest.TestCase):
+
+    def test_pwm_samples_are_merged(self):
+        # Arrange
+        pipeline = EventPipeline(max_block=3)
+
+        # Act
+        pipeline.feed([PWM % i for i in range(5)] + ["hello", PWM % 9])
+        events = pipeline.take()
+
+        # Assert
+        self.assertEqual([type(e) for e in events], [PwmBlock, PwmBlock, TextLine, PwmBlock])
+        self.assertEqual(events[0].duty, [0, 1, 2])
+        self.assertEqual(events[1].duty, [3, 4])
+        self.assertEqual(events[3].duty, [9])
+        self.assertEqual(pipeline.merged, 3)
+
+    def test_overload_keeps_essential_events(self):
+        pipeline = EventPipeline(max_events=2, max_block=1)
+
+        pipeline.feed([PWM % 1, PWM % 2, PWM % 3, "log line", DETECT, VECTOR, HEALTH, SUMMARY])
+        events = pipeline.take()
+
+        self.assertEqual((pipeline.dropped, pipeline.dropped_lines), (1, 1))
+        self.assertEqual([type(e) for e in events[2:]], [DetectEvent, VectorEvent, HealthEvent, SummaryEvent])
+        self.assertEqual(len(events), 6)
+
+    def test_sample_budget_bounds_queued_samples(self):
+        pipeline = EventPipeline(max_block=4096, max_samples=3)
+
+        pipeline.feed([PWM % i for i in range(5)])
+        self.assertEqual((pipeline.samples, pipeline.dropped), (3, 2))
+        self.assertEqual(pipeline.take()[0].duty, [0, 1, 2])
+        pipeline.feed([PWM % 7])
+
+        self.assertEqual(pipeline.samples, 1)
+        self.assertEqual(pipeline.take()[0].duty, [7])
+
+    def test_sample_sink_sees_dropped_samples(self):
+        recorded = []
+        pipeline = EventPipeline(max_events=1, max_block=1)
+        pipeline.sample_sink = recorded.extend
+
+        pipeline.feed([PWM % 1, PWM % 2, "log line"])
+
+        self.assertEqual((pipeline.dropped, pipeline.dropped_lines), (1, 1))
+        self.assertEqual([e.duty for e in recorded[:2]], [1, 2])
+
+    def test_wakes_once_per_take(self):
+        woken = []
+        pipeline = EventPipeline(on_ready=lambda: woken.append(threading.current_thread()))
+
+        pipeline.feed(["a"])
+        pipeline.feed(["b"])
+        self.assertEqual(len(woken), 1)
+        self.assertEqual(len(pipeline.take(1)), 1)
+        pipeline.feed([])  # error hand-off still wakes the consumer
+
+        self.assertEqual(len(woken), 2)
+        self.assertEqual(len(pipeline), 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,75 @@
+import unittest
+from events import (
+    DetectEvent, EventDispatcher, HealthEvent, OtherEvent, PwmEvent, StatusEvent,
+    SummaryEvent, TextLine, VectorEvent, decode, parse_vector_text
+)
+
+"""
+Unit tests for event decoding and dispatch (no Qt involved).
+"""
+
+
+class TestDecode(unittest.TestCase):
+
+    def test_json_events(self):
+        self.assertEqual(decode('{"event":"pwm","duty":128,"voltage":2.5}'), PwmEvent(128, 2.5))
+        self.assertEqual(decode('{"event":"status","menuIndex":1}').menu_index, 1)
+        self.assertEqual(decode('{"event":"detect","chip":"74F04"}').chip, "74F04")
+        self.assertEqual(decode('{"event":"health","min_v":1,"avg_v":2}'), HealthEvent(1.0, None, 2.0))
+        summary = decode('{"event":"summary","test":"nand","passes":3,"fails":1,"pass_rate":75.0,"rows":[[0,0,1]]}')
+        self.assertIsInstance(summary, SummaryEvent)
+        self.assertEqual((summary.passes, summary.fails, summary.rows), (3, 1, [[0, 0, 1]]))
+
+    def test_vector_variants(self):
+        self.assertEqual(decode('{"event":"vector","A":1,"B":0,"Y":1}'), VectorEvent({"A": 1, "B": 0, "Y": 1}))
+        self.assertEqual(decode('{"event":"row","inputs":[1,1],"output":0}').pins, {"A": 1, "B": 1, "Y": 0})
+        self.assertEqual(decode({"event": "vector", "gate": 2, "A": 1, "Y": 0}), VectorEvent({"A": 1, "Y": 0}, "vector", 2))
+        self.assertEqual(decode("IN: 0,1 -> OUT: 1"), VectorEvent({"A": 0, "B": 1, "Y": 1}, "text"))
+
+    def test_other_and_text(self):
+        self.assertIsInstance(decode('{"event":"ack","id":3}'), OtherEvent)
+        self.assertEqual(decode("booting..."), TextLine("booting..."))
+        self.assertEqual(decode("{not json"), TextLine("{not json"))
+        self.assertIsNone(decode('{"event":"pwm","duty":1}'))
+        self.assertIsNone(decode(""))
+
+    def test_text_vectors(self):
+        cases = {
+            "A=0 B=1 Y=1": {"A": 0, "B": 1, "Y": 1},
+            "IN: 0,1 -> OUT: 1": {"A": 0, "B": 1, "Y": 1},
+            "A:1, Y:0": {"A": 1, "Y": 0},
+            "a=1 b=1 y=0": {"A": 1, "B": 1, "Y": 0},
+            "A=1 B=0 C=1 D=1 Y=0": {"A": 1, "B": 0, "C": 1, "D": 1, "Y": 0},
+            "IN: [1,0,1] -> OUT: 0,1": {"A": 1, "B": 0, "C": 1, "Y0": 0, "Y1": 1},
+            "1A=1 1B=1 1Y=0": {"1A": 1, "1B": 1, "1Y": 0},
+        }
+        for line, pins in cases.items():
+            with self.subTest(line=line):
+                self.assertEqual(parse_vector_text(line), VectorEvent(pins, "text"))
+
+    def test_text_non_vectors(self):
+        for line in ("rate=100 Y=1", "pass_rate: 100.0", "status: ok", "A=1 B=0", "Y=1",
+                     "V=0.5 Y=1", "A=1 Vout=1.25",
+                     "A=0 " + "x" * 1000 + " Y=1"):
+            with self.subTest(line=line[:20]):
+                self.assertIsNone(parse_vector_text(line))
+
+
+class TestDispatcher(unittest.TestCase):
+
+    def test_routes_by_type(self):
+        seen = []
+        d = EventDispatcher()
+        d.register(PwmEvent, lambda e: seen.append(("pwm", e.duty)))
+        d.register(DetectEvent, lambda e: seen.append(("detect", e.chip)))
+
+        d.feed('{"event":"pwm","duty":7,"voltage":0.1}')
+        d.feed('{"event":"detect","chip":"74F00"}')
+        handled = d.dispatch(StatusEvent(0, {}))
+
+        self.assertEqual(seen, [("pwm", 7), ("detect", "74F00")])
+        self.assertFalse(handled)
+
+
+if __name__ == '__main__':
+    unittest.main()
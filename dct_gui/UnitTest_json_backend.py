@@ -0,0 +1,61 @@
+import unittest
+import events
+import json_backend
+from events import HealthEvent, OtherEvent, PwmEvent, StatusEvent, TextLine, VectorEvent, decode
+
+"""
+Unit tests for the pluggable JSON backends: every available backend must decode
+the stream exactly like stdlib json.
+"""
+
+LINES = [
+    '{"event":"pwm","duty":128,"voltage":2.5}',
+    '{"event":"pwm","duty":7,"voltage":0.125,"t_us":4000}',
+    '{"event":"health","min_v":1,"avg_v":2}',
+    '{"event":"status","menuIndex":1}',
+    '{"event":"vector","A":1,"B":0,"Y":1}',
+    '{"event":"pwm","duty":"x","voltage":1.0}',
+    '{"event":"ack","id":3}',
+    '{"event":"pwm", broken',
+    '{"duty":3,"voltage":1.0,"event":"pwm"}',
+    '{"event":"summary","test":"nand","passes":1,"fails":0,"pass_rate":100}',
+    "A=0 B=1 Y=1",
+]
+
+
+class TestJsonBackends(unittest.TestCase):
+
+    def tearDown(self):
+        json_backend.install("json")
+
+    def test_backends_match_stdlib(self):
+        # Arrange
+        json_backend.install("json")
+        expected = [decode(line) for line in LINES]
+
+        for name in json_backend.available():
+            with self.subTest(backend=name):
+                # Act
+                self.assertEqual(json_backend.install(name), name)
+                got = [decode(line) for line in LINES]
+
+                # Assert
+                self.assertEqual(got, expected)
+
+    def test_expected_types(self):
+        json_backend.install()
+        self.assertEqual(decode(LINES[1]), PwmEvent(7, 0.125, 4000))
+        self.assertEqual(decode(LINES[2]), HealthEvent(1.0, None, 2.0))
+        self.assertIsInstance(decode(LINES[3]), StatusEvent)
+        self.assertIsInstance(decode(LINES[4]), VectorEvent)
+        self.assertIsInstance(decode(LINES[6]), OtherEvent)
+        self.assertIsInstance(decode(LINES[7]), TextLine)
+
+    def test_unknown_backend(self):
+        with self.assertRaises(ValueError):
+            json_backend.install("simdjson-nope")
+        self.assertIs(events._typed, None)
+
+
+if __name__ == '__main__':
+    unittest.main()
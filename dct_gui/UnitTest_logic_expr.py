@@ -0,0 +1,64 @@
+import time
+import unittest
+import numpy as np
+from logic_expr import compile_expr, exhaustive_inputs, expected_outputs, truth_table
+from vector_index import VectorIndex
+
+"""
+Unit tests for boolean output expressions and vectorized expected tables.
+"""
+
+
+class TestLogicExpr(unittest.TestCase):
+
+    def test_operators_and_precedence(self):
+        cases = {
+            "!(A & B)": [1, 1, 1, 0],
+            "A | B": [0, 1, 1, 1],
+            "A xor B": [0, 1, 1, 0],
+            "not A and B": [0, 1, 0, 0],
+            "A + B * 0": [0, 0, 1, 1],
+            "~A ^ 1": [0, 0, 1, 1],
+            "1": [1, 1, 1, 1],
+        }
+        for expr, expected in cases.items():
+            with self.subTest(expr=expr):
+                table = truth_table({"Y": expr}, ["A", "B"])
+                self.assertEqual(table[:, 2].tolist(), expected)
+
+    def test_syntax_errors(self):
+        for bad in ("", "A &", "(A | B", "A B", "A $ B"):
+            with self.subTest(expr=bad):
+                with self.assertRaises(ValueError):
+                    compile_expr(bad)
+        with self.assertRaises(ValueError):
+            expected_outputs({"Y": "A & C"}, ["A", "B"], [[0, 1]])
+
+    def test_exhaustive_order(self):
+        table = exhaustive_inputs(3)
+
+        self.assertEqual(table.tolist()[:3], [[0, 0, 0], [0, 0, 1], [0, 1, 0]])
+        self.assertEqual(table.shape, (8, 3))
+
+    def test_wide_table_is_fast(self):
+        # Arrange
+        inputs = [f"I{i}" for i in range(16)]
+        parity = " ^ ".join(inputs)
+
+        # Act
+        start = time.perf_counter()
+        index = VectorIndex.from_definition({"inputs": inputs, "outputs": {"P": parity}})
+        elapsed = time.perf_counter() - start
+
+        # Assert
+        self.assertEqual(len(index), 1 << 16)
+        weights = 1 << np.arange(15, -1, -1)
+        expected = np.bitwise_count(np.arange(1 << 16)) % 2 if hasattr(np, "bitwise_count") else \
+            np.array([bin(k).count("1") % 2 for k in range(1 << 16)])
+        self.assertTrue((index.expected[:, :16].astype(np.int64) @ weights == np.arange(1 << 16)).all())
+        self.assertTrue((index.expected[:, 16] == expected).all())
+        self.assertLess(elapsed, 0.5)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,75 @@
+import json
+import sys
+import time
+import unittest
+from test_runner import TestRunner
+
+"""
+End-to-end tests: TestRunner talking to the PTY-backed virtual MCU.
+"""
+
+
+def collect(runner, until, timeout=2.0):
+    """Drain the runner until until(items) is true or timeout passes."""
+    items = []
+    deadline = time.monotonic() + timeout
+    while not until(items) and time.monotonic() < deadline:
+        batch = runner.receive_lines(None)
+        items += batch
+        if not batch:
+            time.sleep(0.005)
+    return items
+
+
+@unittest.skipIf(sys.platform.startswith("win"), "needs a POSIX pseudo-terminal")
+class TestMcuSimulator(unittest.TestCase):
+
+    def setUp(self):
+        from mcu_simulator import McuSimulator
+        self.sim = McuSimulator(rate=2000, seed=1).start()
+        self.runner = TestRunner(port=self.sim.port)
+
+    def tearDown(self):
+        self.runner.close_connection()
+        self.sim.close()
+
+    def test_handshake_and_detect_request(self):
+        self.runner.connect(handshake_timeout=1.0)
+        self.runner.start_reader()
+        fut = self.runner.request("detect")
+
+        for line in collect(self.runner, lambda items: fut.done() or any('"detect"' in i for i in items)):
+            self.runner.resolve_reply(json.loads(line))
+
+        self.assertTrue(self.runner.ready)
+        self.assertEqual(fut.result(0)["chip"], "74F00")
+
+    def test_truth_table_run_ends_with_summary(self):
+        self.runner.connect(handshake_timeout=1.0)
+        self.runner.start_reader()
+        self.runner.send_command("start_nand")
+
+        lines = collect(self.runner, lambda items: any('"summary"' in i for i in items))
+
+        events = [json.loads(l) for l in lines]
+        self.assertEqual(sum(e["event"] == "vector" for e in events), 4)
+        summary = events[-1]
+        self.assertEqual((summary["passes"], summary["fails"]), (4, 0))
+
+    def test_binary_opamp_stream(self):
+        self.runner.connect(binary=True, handshake_timeout=1.0)
+        self.runner.start_reader()
+        self.runner.send_command("start_opamp")
+
+        items = collect(self.runner, lambda items: sum(isinstance(i, dict) for i in items) >= 200)
+        self.runner.send_command("stop")
+
+        self.assertTrue(self.runner.binary)
+        pwm = [i for i in items if isinstance(i, dict)]
+        self.assertGreaterEqual(len(pwm), 200)
+        self.assertEqual([p["duty"] for p in pwm[:3]], [0, 1, 2])
+        self.assertTrue(any('"health"' in i for i in items if isinstance(i, str)))
+
+
+if __name__ == '__main__':
+    unittest.main()
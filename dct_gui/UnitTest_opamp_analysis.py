@@ -0,0 +1,112 @@
+import json
+import os
+import tempfile
+import unittest
+import numpy as np
+from opamp_analysis import Limits, SeriesRing, analyze, duty_means, export, format_report
+
+"""
+Unit tests for the op-amp transfer-curve / settling analysis.
+"""
+
+
+def _sweep(n=20_000, gain=1.02, offset=0.03, rails=(0.05, 4.85), alpha=0.35, vref=5.0, dt_us=50, seed=5):
+    """Triangle duty sweep through a saturating first-order op-amp (as McuSimulator)."""
+    rng = np.random.default_rng(seed)
+    phase = np.arange(n) % 510
+    duty = np.where(phase < 256, phase, 510 - phase)
+    target = np.clip(offset + gain * vref * duty / 255.0, *rails)
+    v = np.empty(n)
+    level = 0.0
+    for i in range(n):
+        level += (target[i] - level) * alpha
+        v[i] = level
+    t_us = (np.arange(n) * dt_us) & 0xFFFFFFFF
+    return duty, v + rng.normal(0, 0.004, n), t_us
+
+
+class TestOpampAnalysis(unittest.TestCase):
+
+    def test_recovers_model_parameters(self):
+        # Arrange
+        duty, voltage, t_us = _sweep()
+
+        # Act
+        r = analyze(duty, voltage, t_us, vref=5.0)
+
+        # Assert
+        self.assertAlmostEqual(r.gain, 1.02, delta=0.002)
+        self.assertAlmostEqual(r.offset_v, 0.03, delta=0.003)
+        self.assertLess(r.linearity_pct, 0.5)
+        self.assertAlmostEqual(r.rail_hi, 4.85, delta=0.01)
+        self.assertAlmostEqual(r.step_alpha, 0.35, delta=0.01)
+        self.assertEqual(r.dt_us, 50.0)
+        self.assertAlmostEqual(r.tau_us, 50 / -np.log(0.65), delta=3)
+        self.assertIsNotNone(r.sat_hi_duty)
+        self.assertEqual(r.verdict, "PASS")
+
+    def test_classifies_bad_parts(self):
+        duty, voltage, t_us = _sweep(gain=0.8, alpha=0.01)
+
+        r = analyze(duty, voltage, t_us, vref=5.0, limits=Limits(max_settle_us=1000))
+
+        self.assertEqual(r.verdict, "FAIL")
+        self.assertTrue(any(reason.startswith("gain") for reason in r.reasons))
+        self.assertTrue(any(reason.startswith("settling") for reason in r.reasons))
+        self.assertIn("Verdict: FAIL", format_report(r))
+
+    def test_without_timestamps_or_sweep(self):
+        r = analyze([10, 10, 10], [1.0, 1.0, 1.0])
+
+        self.assertEqual(r.verdict, "n/a")
+        self.assertIsNone(r.tau_us)
+
+    def test_timestamp_wrap(self):
+        duty, voltage, _ = _sweep(n=2000)
+        t_us = (np.arange(2000) * 50 + (1 << 32) - 40_000) & 0xFFFFFFFF
+
+        r = analyze(duty, voltage, t_us, vref=5.0)
+
+        self.assertEqual(r.dt_us, 50.0)
+
+    def test_export_json_and_csv(self):
+        duty, voltage, t_us = _sweep(n=5000)
+        r = analyze(duty, voltage, t_us, vref=5.0)
+        keys, means, counts = duty_means(duty, voltage)
+        curve = {"key": keys, "mean": means, "count": counts}
+        fd, path = tempfile.mkstemp(suffix=".json")
+        os.close(fd)
+        try:
+            export(path, r, curve)
+            with open(path, encoding="utf-8") as f:
+                data = json.load(f)
+            export(path[:-5] + ".csv", r, curve)
+            with open(path[:-5] + ".csv", encoding="utf-8") as f:
+                csv_text = f.read()
+        finally:
+            for p in (path, path[:-5] + ".csv"):
+                if os.path.exists(p):
+                    os.unlink(p)
+
+        self.assertEqual(data["analysis"]["verdict"], r.verdict)
+        self.assertEqual(len(data["curve"]), len(keys))
+        self.assertIn("gain,", csv_text)
+        self.assertIn("key,mean,count", csv_text)
+
+
+class TestSeriesRing(unittest.TestCase):
+
+    def test_wraps_and_marks_missing_timestamps(self):
+        ring = SeriesRing(4)
+
+        ring.extend([1, 2, 3], [0.1, 0.2, 0.3], [10, None, 30])
+        ring.extend([4, 5], [0.4, 0.5])
+        t_us, duty, voltage = ring.arrays()
+
+        self.assertEqual(duty.tolist(), [2, 3, 4, 5])
+        self.assertEqual(t_us.tolist(), [-1, 30, -1, -1])
+        self.assertEqual(voltage.tolist(), [0.2, 0.3, 0.4, 0.5])
+
+
+if __name__ == "__main__":
+    unittest.main()
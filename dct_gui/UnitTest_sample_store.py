@@ -0,0 +1,92 @@
+import os
+import tempfile
+import threading
+import unittest
+import numpy as np
+from events import PwmEvent, StatusEvent
+from sample_store import SampleStore, SampleWriter
+
+"""
+Unit tests for the chunked pwm sample store (background writer, mmap reader).
+"""
+
+
+class TestSampleStore(unittest.TestCase):
+
+    def setUp(self):
+        fd, self.path = tempfile.mkstemp(suffix=".dpwm")
+        os.close(fd)
+        os.unlink(self.path)
+
+    def tearDown(self):
+        if os.path.exists(self.path):
+            os.unlink(self.path)
+
+    def test_round_trip_across_chunks(self):
+        # Arrange
+        writer = SampleWriter(self.path, chunk_records=7)
+        batch = [PwmEvent(i, i / 10, 1000 + i) for i in range(20)]
+
+        # Act: a batch larger than a chunk, non-pwm events mixed in
+        writer.record(batch[:3] + [StatusEvent(None, {})])
+        writer.record(batch[3:])
+        writer.close()
+        store = SampleStore(self.path)
+
+        # Assert
+        self.assertEqual((writer.count, writer.dropped), (20, 0))
+        self.assertEqual(len(store), 20)
+        self.assertEqual(store.duty.tolist(), list(range(20)))
+        self.assertEqual(store.t_us.tolist(), list(range(1000, 1020)))
+        np.testing.assert_allclose(store.voltage, np.arange(20) / 10, rtol=1e-6)
+        store.close()
+
+    def test_host_time_without_device_timestamp(self):
+        writer = SampleWriter(self.path)
+        writer.record([PwmEvent(1, 1.0), PwmEvent(2, 2.0)])
+        writer.flush()
+
+        store = SampleStore(self.path)  # readable while the writer is still open
+
+        self.assertEqual(len(store), 2)
+        self.assertTrue((store.t_us >= 0).all())
+        writer.close()
+
+    def test_flush_async_reports_when_samples_are_on_disk(self):
+        writer = SampleWriter(self.path, chunk_records=4)
+        writer.record([PwmEvent(i, 1.0, i) for i in range(10)])
+        flushed = threading.Event()
+
+        self.assertTrue(writer.flush_async(flushed.set))
+
+        self.assertTrue(flushed.wait(1))
+        with SampleStore(self.path) as store:
+            self.assertEqual(store.duty.tolist(), list(range(10)))
+        writer.close()
+        self.assertFalse(writer.flush_async(flushed.set))
+
+    def test_new_recording_replaces_file_and_ignores_torn_record(self):
+        with open(self.path, "wb") as f:
+            f.write(b"foreign bytes")
+        for duty in (1, 2):
+            writer = SampleWriter(self.path)
+            writer.record([PwmEvent(duty, 0.5, duty)])
+            writer.close()
+        with open(self.path, "ab") as f:
+            f.write(b"\x01\x02\x03")  # interrupted write
+
+        store = SampleStore(self.path)
+
+        self.assertEqual(store.duty.tolist(), [2])
+        store.close()
+
+    def test_rejects_other_files(self):
+        with open(self.path, "wb") as f:
+            f.write(b"not a sample file")
+
+        with self.assertRaises(ValueError):
+            SampleStore(self.path)
+
+
+if __name__ == "__main__":
+    unittest.main()
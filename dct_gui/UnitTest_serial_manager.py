@@ -0,0 +1,93 @@
+import json
+import os
+import sys
+import threading
+import time
+import unittest
+from serial_manager import SerialManager
+
+"""
+Unit tests for SerialManager, with pseudo-terminals standing in for DCT boards.
+"""
+
+
+@unittest.skipIf(sys.platform.startswith("win"), "needs POSIX pseudo-terminals")
+class TestSerialManager(unittest.TestCase):
+
+    def setUp(self):
+        import tty
+        self.ptys = []
+        for _ in range(2):
+            master, slave = os.openpty()
+            tty.setraw(slave)
+            self.ptys.append((master, slave))
+        self.manager = SerialManager(handshake_timeout=0)
+        self.ids = [self.manager.add_device(os.ttyname(s), f"board{i}") for i, (_, s) in enumerate(self.ptys)]
+
+    def tearDown(self):
+        self.manager.close_all()
+        for master, slave in self.ptys:
+            os.close(master)
+            os.close(slave)
+
+    def _read_command(self, master):
+        data = b""
+        deadline = time.monotonic() + 1
+        while not data.endswith(b"\n") and time.monotonic() < deadline:
+            data += os.read(master, 64)
+        return data
+
+    def test_events_are_tagged_with_device(self):
+        woken = threading.Event()
+        self.manager.on_events = woken.set
+
+        os.write(self.ptys[0][0], b'{"event":"pwm","duty":1}\n')
+        os.write(self.ptys[1][0], b'{"event":"pwm","duty":2}\n')
+
+        self.assertTrue(woken.wait(1))
+        events = []
+        deadline = time.monotonic() + 1
+        while len(events) < 2 and time.monotonic() < deadline:
+            events += self.manager.receive_events()
+        self.assertEqual(sorted(events), [("board0", '{"event":"pwm","duty":1}'),
+                                          ("board1", '{"event":"pwm","duty":2}')])
+
+    def test_detect_all_resolves_per_device(self):
+        futures = self.manager.detect_all()
+        for master, _ in self.ptys:
+            self.assertEqual(self._read_command(master), b"detect\n")
+
+        self.manager.resolve_reply("board1", {"event": "detect", "chip": "74F04"})
+
+        self.assertEqual(futures["board1"].result(0)["chip"], "74F04")
+        self.assertFalse(futures["board0"].done())
+
+    def test_stop_all(self):
+        self.assertEqual(self.manager.stop_all(), {"board0": True, "board1": True})
+        for master, _ in self.ptys:
+            self.assertEqual(self._read_command(master), b"stop\n")
+
+
+@unittest.skipIf(sys.platform.startswith("win"), "needs POSIX pseudo-terminals")
+class TestSerialManagerHandshake(unittest.TestCase):
+
+    def test_handshake_reply_reaches_receive_events(self):
+        from mcu_simulator import McuSimulator
+        sim = McuSimulator().start()
+        manager = SerialManager(handshake_timeout=1.0)
+        try:
+            manager.add_device(sim.port, "board0")
+
+            events = manager.receive_events()
+        finally:
+            manager.close_all()
+            sim.close()
+
+        self.assertTrue(events)
+        device, line = events[0]
+        self.assertEqual(device, "board0")
+        self.assertEqual(json.loads(line)["event"], "status")
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,63 @@
+import os
+import tempfile
+import time
+import unittest
+from session_capture import MARK, RX, TX, SessionRecorder, SessionReplay
+
+"""
+Unit tests for the serial session capture file and its replay.
+"""
+
+
+class TestSessionCapture(unittest.TestCase):
+
+    def setUp(self):
+        fd, self.path = tempfile.mkstemp(suffix=".dcap")
+        os.close(fd)
+        os.unlink(self.path)
+
+    def tearDown(self):
+        if os.path.exists(self.path):
+            os.unlink(self.path)
+
+    def test_round_trip_keeps_order_and_direction(self):
+        # Arrange
+        rec = SessionRecorder(self.path)
+        rec.record(TX, ["detect"])
+        rec.record(RX, ['{"event":"detect","chip":"74F00"}', {"event": "pwm", "duty": 3, "voltage": 0.1}])
+        rec.close()
+
+        # Act
+        with SessionReplay(self.path) as cap:
+            records = [(d, text) for _, d, text in cap.records()]
+            lines = list(cap.lines())
+
+        # Assert
+        self.assertEqual([d for d, _ in records], [MARK, TX, RX, RX])
+        self.assertEqual(lines, ['{"event":"detect","chip":"74F00"}', '{"event":"pwm","duty":3,"voltage":0.1}'])
+
+    def test_sessions_append_and_pace_in_sequence(self):
+        for chunk in (["a", "b"], ["c"]):
+            rec = SessionRecorder(self.path)
+            time.sleep(0.01)
+            rec.record(RX, chunk)
+            rec.close()
+
+        with SessionReplay(self.path) as cap:
+            paced = list(cap.paced(start=0.0))
+
+        self.assertEqual([line for line, _ in paced], ["a", "b", "c"])
+        dues = [due for _, due in paced]
+        self.assertEqual(dues, sorted(dues))
+        self.assertGreaterEqual(dues[2], 0.02)
+
+    def test_rejects_foreign_file(self):
+        with open(self.path, "wb") as f:
+            f.write(b"not a capture")
+
+        with self.assertRaises(ValueError):
+            SessionReplay(self.path)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,109 @@
+import unittest
+import numpy as np
+from stream_stats import BucketedStats, OpampStats, QuantileSketch, RunningStats
+
+"""
+Unit tests for the streaming op-amp statistics.
+"""
+
+
+class TestRunningStats(unittest.TestCase):
+
+    def test_single_and_batch_updates_match_numpy(self):
+        # Arrange
+        data = np.random.default_rng(2).normal(2.5, 0.2, 5000)
+        stats = RunningStats()
+
+        # Act: half one at a time, half in batches
+        for v in data[:2500]:
+            stats.add(v)
+        for chunk in np.array_split(data[2500:], 7):
+            stats.extend(chunk)
+
+        # Assert
+        self.assertEqual(stats.count, 5000)
+        self.assertAlmostEqual(stats.mean, data.mean(), places=12)
+        self.assertAlmostEqual(stats.std, data.std(ddof=1), places=12)
+        self.assertAlmostEqual(stats.rms, np.sqrt(np.mean(data ** 2)), places=12)
+        self.assertEqual((stats.min, stats.max), (data.min(), data.max()))
+
+    def test_empty(self):
+        stats = RunningStats()
+
+        self.assertEqual((stats.variance, stats.rms, stats.min), (0.0, 0.0, None))
+
+
+class TestQuantileSketch(unittest.TestCase):
+
+    def test_error_within_one_bin(self):
+        # Arrange: the range has to widen several times, in both directions
+        data = np.random.default_rng(3).normal(2.5, 0.5, 200_000)
+        sketch = QuantileSketch(bins=512)
+
+        # Act
+        sketch.add(2.5)
+        for chunk in np.array_split(data, 50):
+            sketch.extend(chunk)
+
+        # Assert
+        everything = np.append(data, 2.5)
+        for q in (0.0, 0.01, 0.5, 0.99, 1.0):
+            self.assertAlmostEqual(sketch.quantile(q), np.quantile(everything, q), delta=sketch.width)
+        self.assertEqual(sketch.counts.sum(), len(everything))
+
+    def test_empty_and_non_finite(self):
+        sketch = QuantileSketch()
+        self.assertIsNone(sketch.quantile(0.5))
+
+        sketch.extend([1.0, float("inf"), float("nan")])
+
+        self.assertEqual(sketch.count, 1)
+        self.assertEqual(sketch.quantile(0.5), 1.0)
+
+
+class TestBucketedStats(unittest.TestCase):
+
+    def test_per_bucket_moments(self):
+        # Arrange
+        rng = np.random.default_rng(4)
+        keys = rng.integers(0, 64, 10_000)
+        values = keys * 0.05 + rng.normal(0, 0.01, 10_000)
+        stats = BucketedStats(bucket_width=4)
+
+        # Act
+        stats.extend(keys[:5000], values[:5000])
+        for k, v in zip(keys[5000:6000], values[5000:6000]):
+            stats.add(k, v)
+        stats.extend(keys[6000:], values[6000:])
+        table = stats.table()
+
+        # Assert
+        self.assertEqual(table["key"].tolist(), list(range(0, 64, 4)))
+        for i, key in enumerate(table["key"]):
+            sel = values[(keys // 4) == key // 4]
+            self.assertEqual(table["count"][i], len(sel))
+            self.assertAlmostEqual(table["mean"][i], sel.mean(), places=12)
+            self.assertAlmostEqual(table["std"][i], sel.std(ddof=1), places=12)
+            self.assertEqual((table["min"][i], table["max"][i]), (sel.min(), sel.max()))
+
+
+class TestOpampStats(unittest.TestCase):
+
+    def test_summary(self):
+        stats = OpampStats()
+
+        stats.extend([10, 10, 20], [1.0, 2.0, 3.0])
+        stats.add(20, 4.0)
+        stats.add_health(0.5, None, 2.0)
+        stats.add_health(0.7, 4.5, 3.0)
+        summary = stats.summary()
+
+        self.assertEqual(summary["samples"], 4)
+        self.assertEqual(summary["mean"], 2.5)
+        self.assertEqual(stats.last, (20, 4.0))
+        self.assertEqual(stats.by_duty.table()["mean"].tolist(), [1.5, 3.5])
+        self.assertEqual((summary["health_min"], summary["health_max"], summary["health_avg"]), (0.5, 4.5, 2.5))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,6 +1,10 @@
+import os
+import sys
+import threading
+import time
 import unittest
 from unittest.mock import MagicMock, patch
-from test_runner import TestRunner
+from test_runner import TestRunner, LineFramer, PendingRequests
 from unittest.mock import patch, MagicMock, PropertyMock
 
 """
@@ -99,5 +103,230 @@ class TestTestRunner(unittest.TestCase):
         self.assertFalse(runner.is_connected())
 
 
+class TestLineFramer(unittest.TestCase):
+
+    def test_partial_line_is_kept(self):
+        framer = LineFramer()
+
+        self.assertEqual(framer.feed(b'{"event":"pw'), [])
+        self.assertEqual(framer.feed(b'm"}\r\nA=0 B=1 Y=1\nIN: 0'), ['{"event":"pwm"}', 'A=0 B=1 Y=1'])
+        self.assertEqual(framer.pending(), len(b"IN: 0"))
+
+    def test_blank_lines_are_dropped(self):
+        framer = LineFramer()
+
+        self.assertEqual(framer.feed(b"\n\r\nok\n\n"), ["ok"])
+        self.assertEqual(framer.pending(), 0)
+
+    def test_runaway_line_is_discarded(self):
+        framer = LineFramer(max_line=8)
+
+        framer.feed(b"x" * 16)
+
+        self.assertEqual(framer.pending(), 0)
+        self.assertEqual(framer.feed(b"xx"), [])
+        self.assertEqual(framer.feed(b"xtail\nok\n"), ["ok"])  # the runaway line's tail is dropped too
+
+    def test_runaway_tail_after_complete_lines(self):
+        framer = LineFramer(max_line=8)
+
+        self.assertEqual(framer.feed(b"a\n" + b"y" * 12), ["a"])
+        self.assertEqual(framer.feed(b"yy\nb\n"), ["b"])
+
+
+class TestPendingRequests(unittest.TestCase):
+
+    def test_replies_match_in_order_by_event(self):
+        table = PendingRequests()
+        _, status = table.add("status", timeout=1)
+        _, first = table.add("detect", timeout=1)
+        _, second = table.add("detect", timeout=1)
+
+        self.assertTrue(table.resolve({"event": "detect", "chip": "74F00"}))
+        self.assertTrue(table.resolve({"event": "detect", "chip": "74F04"}))
+
+        self.assertEqual(first.result(0)["chip"], "74F00")
+        self.assertEqual(second.result(0)["chip"], "74F04")
+        self.assertFalse(status.done())
+        self.assertFalse(table.resolve({"event": "pwm"}))
+
+    def test_reply_id_wins_over_order(self):
+        table = PendingRequests()
+        _, first = table.add("ack", timeout=1)
+        rid, second = table.add("ack", timeout=1)
+
+        table.resolve({"event": "ack", "id": rid})
+
+        self.assertTrue(second.done())
+        self.assertFalse(first.done())
+
+    def test_reply_to_cancelled_request_is_absorbed(self):
+        table = PendingRequests()
+        rid, fut = table.add("ack", timeout=1)
+        fut.cancel()
+
+        self.assertTrue(table.resolve({"event": "ack", "id": rid}))
+        self.assertTrue(fut.cancelled())
+        self.assertEqual(table.expire(now=time.monotonic() + 2), 0)
+
+    def test_late_reply_to_expired_request_is_absorbed(self):
+        table = PendingRequests()
+        stale, _ = table.add("ack", timeout=0)
+        table.expire()
+        _, fresh = table.add("ack", timeout=5)
+
+        self.assertTrue(table.resolve({"event": "ack", "id": stale}))
+
+        self.assertFalse(fresh.done())
+        self.assertEqual(len(table), 1)
+
+    def test_expired_request_fails(self):
+        table = PendingRequests()
+        _, fut = table.add("detect", timeout=0.5)
+
+        self.assertEqual(table.expire(now=time.monotonic() + 1), 1)
+
+        self.assertIsInstance(fut.exception(0), TimeoutError)
+        self.assertEqual(len(table), 0)
+
+    @patch('serial.Serial')
+    def test_request_tags_json_command_with_id(self, mock_serial):
+        mock_instance = MagicMock()
+        mock_instance.is_open = True
+        mock_serial.return_value = mock_instance
+        runner = TestRunner()
+        runner.connect()
+
+        fut = runner.request('{"cmd": "define_test", "rows": []}')
+
+        sent = mock_instance.write.call_args[0][0]
+        self.assertIn(b'"id": %d' % fut.request_id, sent)
+        self.assertTrue(runner.resolve_reply({"event": "ack", "id": fut.request_id}))
+
+
+@unittest.skipIf(sys.platform.startswith("win"), "needs a POSIX pseudo-terminal")
+class TestReaderThread(unittest.TestCase):
+
+    def setUp(self):
+        import tty
+        self.master, self.slave = os.openpty()
+        tty.setraw(self.slave)
+        self.runner = TestRunner(port=os.ttyname(self.slave))
+        self.runner.connect(handshake_timeout=0)
+
+    def tearDown(self):
+        self.runner.close_connection()
+        os.close(self.master)
+        os.close(self.slave)
+
+    def test_lines_are_queued_and_consumer_woken(self):
+        woken = threading.Event()
+        self.runner.start_reader(on_lines=woken.set)
+
+        os.write(self.master, b'{"event":"status"}\r\n{"event":"det')
+        os.write(self.master, b'ect"}\n')
+
+        self.assertTrue(woken.wait(1))
+        time.sleep(0.05)
+        self.assertEqual(self.runner.receive_lines(None), ['{"event":"status"}', '{"event":"detect"}'])
+
+    def test_queued_commands_are_written_by_the_reader(self):
+        self.runner.start_reader()
+
+        self.assertTrue(self.runner.send_many(["status", "detect\n", "select_nand"]))
+
+        received = b""
+        deadline = time.monotonic() + 1
+        while received.count(b"\n") < 3 and time.monotonic() < deadline:
+            received += os.read(self.master, 64)
+        self.assertEqual(received, b"status\ndetect\nselect_nand\n")
+
+    def test_failed_queued_write_is_reported(self):
+        from serial import SerialTimeoutException
+        woken = threading.Event()
+        self.runner.start_reader(on_lines=woken.set)
+
+        with patch.object(self.runner.ser, "write", side_effect=SerialTimeoutException("Write timeout")):
+            self.assertTrue(self.runner.send_command("status"))
+            self.assertTrue(woken.wait(1))
+
+        self.assertEqual(self.runner.write_errors, 1)
+        self.assertIsInstance(self.runner.write_error, SerialTimeoutException)
+        self.assertIsNone(self.runner.last_error)
+        self.assertTrue(self.runner.reader_running())
+
+
+@unittest.skipIf(sys.platform.startswith("win"), "needs a POSIX pseudo-terminal")
+class TestHandshake(unittest.TestCase):
+
+    def setUp(self):
+        import tty
+        self.master, self.slave = os.openpty()
+        tty.setraw(self.slave)
+        self.runner = TestRunner(port=os.ttyname(self.slave))
+
+    def tearDown(self):
+        self.runner.close_connection()
+        os.close(self.master)
+        os.close(self.slave)
+
+    def _mcu(self, replies):
+        """Answer each received command line with the next reply (None = stay silent)."""
+        def serve():
+            buf = b""
+            for reply in replies:
+                while b"\n" not in buf:
+                    buf += os.read(self.master, 64)
+                buf = buf.split(b"\n", 1)[1]
+                if reply is not None:
+                    os.write(self.master, reply)
+        threading.Thread(target=serve, daemon=True).start()
+
+    def test_connect_waits_for_status_reply(self):
+        # Bootloader swallows the first probe
+        self._mcu([None, b'{"event":"status","menuIndex":1}\n'])
+        self.runner.HANDSHAKE_RESEND = 0.05
+
+        start = time.monotonic()
+        self.runner.connect(handshake_timeout=1.0)
+
+        self.assertTrue(self.runner.ready)
+        self.assertLess(time.monotonic() - start, 0.5)
+        self.assertEqual(self.runner.receive_response(), '{"event":"status","menuIndex":1}')
+
+    def test_line_split_across_handshake_and_negotiation_is_kept(self):
+        self._mcu([b'{"event":"status"}\n{"event":"det', b'ect"}\n{"event":"proto","mode":"binary"}\n'])
+
+        self.runner.connect(binary=True, handshake_timeout=1.0)
+
+        self.assertTrue(self.runner.binary)
+        self.assertEqual(self.runner.receive_lines(None), ['{"event":"status"}', '{"event":"detect"}'])
+
+    def test_adopt_takes_over_the_connection(self):
+        self._mcu([b'{"event":"status"}\n'])
+        probe = TestRunner(port=self.runner.port)
+        probe.connect(handshake_timeout=1.0)
+
+        self.runner.adopt(probe)
+
+        self.assertTrue(self.runner.is_connected())
+        self.assertTrue(self.runner.ready)
+        self.assertFalse(probe.is_connected())
+        self.assertEqual(self.runner.receive_response(), '{"event":"status"}')
+
+    def test_reconnect_keeps_binary_mode_when_board_did_not_reset(self):
+        import binary_protocol as bp
+        self._mcu([b'{"event":"status"}\n', b'{"event":"proto","mode":"binary"}\n',
+                   bp.encode_text('{"event":"status"}')])
+        self.runner.connect(binary=True, handshake_timeout=1.0)
+        self.runner.receive_lines(None)
+
+        self.assertTrue(self.runner.reconnect(probe_timeout=0.5))
+
+        self.assertTrue(self.runner.binary)
+        self.assertTrue(self.runner.ready)
+        self.assertEqual(self.runner.receive_response(), '{"event":"status"}')
+
+
 if __name__ == '__main__':
     unittest.main()
@@ -0,0 +1,54 @@
+import unittest
+from ui_presenter import UiPresenter
+
+"""
+Unit tests for UiPresenter (frame-batched widget updates, no Qt involved).
+"""
+
+
+class TestUiPresenter(unittest.TestCase):
+
+    def setUp(self):
+        self.frames_requested = 0
+        self.calls = []
+        self.presenter = UiPresenter(on_dirty=self._request_frame)
+
+    def _request_frame(self):
+        self.frames_requested += 1
+
+    def test_latest_update_per_key_wins(self):
+        # Arrange / Act
+        for i in range(1000):
+            self.presenter.set("readout", self.calls.append, i)
+        self.presenter.set("other", self.calls.append, "x")
+        n = self.presenter.flush()
+
+        # Assert
+        self.assertEqual(n, 2)
+        self.assertEqual(self.calls, [999, "x"])
+        self.assertEqual(self.presenter.coalesced, 999)
+        self.assertEqual(self.frames_requested, 1)
+
+    def test_series_are_batched(self):
+        for v in range(5):
+            self.presenter.append("wave", self.calls.append, v)
+
+        self.presenter.flush()
+
+        self.assertEqual(self.calls, [[0, 1, 2, 3, 4]])
+
+    def test_discard_and_new_frame(self):
+        self.presenter.set("readout", self.calls.append, 1)
+        self.presenter.append("wave", self.calls.append, 1.0)
+        self.presenter.discard("readout", "wave")
+        self.assertEqual(self.presenter.flush(), 0)
+
+        self.presenter.set("readout", self.calls.append, 2)
+        self.presenter.flush()
+
+        self.assertEqual(self.calls, [2])
+        self.assertEqual(self.frames_requested, 2)
+
+
+if __name__ == '__main__':
+    unittest.main()
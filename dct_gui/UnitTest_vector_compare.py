@@ -0,0 +1,82 @@
+import unittest
+import numpy as np
+from vector_compare import VectorComparator
+from vector_index import VectorIndex
+
+"""
+Unit tests for VectorComparator (host-side verdicts and fail signatures).
+"""
+
+QUAD_NAND = {"pins": {"A": [1, 4, 9, 12], "B": [2, 5, 10, 13], "Y": [3, 6, 8, 11]},
+             "outputs": {"Y": "!(A & B)"}}
+
+
+class TestVectorComparator(unittest.TestCase):
+
+    def setUp(self):
+        self.cmp = VectorComparator(VectorIndex.from_definition(QUAD_NAND))
+
+    def test_all_pass(self):
+        # Arrange
+        for gate in range(4):
+            for a, b in ((0, 0), (0, 1), (1, 0), (1, 1)):
+                self.cmp.observe({"A": a, "B": b, "Y": 1 - (a & b)}, gate)
+
+        # Act
+        report = self.cmp.report()
+
+        # Assert
+        self.assertEqual((report.checked, report.failed, report.passed), (4, 0, 4))
+        self.assertEqual(report.signatures, [])
+        self.assertFalse(report.row_bitmaps.any())
+
+    def test_bitmaps_and_signatures(self):
+        for a, b in ((0, 0), (0, 1), (1, 0), (1, 1)):
+            self.cmp.observe({"A": a, "B": b, "Y": 1 - (a & b)}, 0)
+            self.cmp.observe({"A": a, "B": b, "Y": 1}, 2)          # stuck high
+            self.cmp.observe({"A": a, "B": b, "Y": a & b}, 3)      # inverted
+        self.assertIsNone(self.cmp.observe({"A": 1, "C": 0, "Y": 1}))
+
+        report = self.cmp.report()
+
+        self.assertEqual(report.failed, 4)
+        self.assertEqual(report.row_fail.tolist(), [True, True, True, True])
+        self.assertEqual(report.gate_fail.tolist(), [0, 0, 1, 4])
+        self.assertEqual(report.pin_fail, {"Y": 5})
+        self.assertEqual([(s.gate, s.kind, s.rows) for s in report.signatures],
+                         [(2, "stuck-at-1", [3]), (3, "inverted", [0, 1, 2, 3])])
+        self.assertEqual(report.row_bitmaps[:, 0].tolist(), [0b1000, 0b1000, 0b1000, 0b1100])
+        self.assertEqual(self.cmp.unmatched, 1)
+
+    def test_observe_many_and_reset(self):
+        index = VectorIndex.from_definition({"inputs": ["A", "B", "C"], "outputs": {"Y": "A ^ B ^ C", "Z": "A & B & C"}})
+        cmp = VectorComparator(index)
+        rows = np.arange(8)
+        levels = index.expected[:, 3:].copy()
+        levels[5, 1] ^= 1
+
+        cmp.observe_many(rows, np.zeros(8), levels)
+        report = cmp.report()
+        cmp.reset()
+
+        self.assertEqual((report.checked, report.failed), (8, 1))
+        self.assertEqual(report.signatures[0].pin, "Z")
+        self.assertEqual(cmp.report().checked, 0)
+
+    def test_totals_follow_overwritten_rows(self):
+        self.cmp.observe({"A": 1, "B": 1, "Y": 1}, 0)
+        self.cmp.observe({"A": 0, "B": 0, "Y": 1}, 1)
+        self.assertEqual((self.cmp.report().checked, self.cmp.report().failed), (2, 1))
+
+        # a later, correct reading of the same cell clears the row
+        self.cmp.observe({"A": 1, "B": 1, "Y": 0}, 0)
+        report = self.cmp.report()
+
+        self.assertEqual((report.checked, report.failed), (2, 0))
+        self.assertFalse(self.cmp.mismatch().any())
+        self.assertEqual(report.signatures, [])
+
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,63 @@
+import itertools
+import os
+import unittest
+import numpy as np
+from vector_index import BLANK, VectorIndex
+from yaml_loader import load_yaml_test
+
+"""
+Unit tests for VectorIndex (YAML-driven truth-table layout and row lookup).
+"""
+
+CHIP_TESTS = os.path.join(os.path.dirname(os.path.abspath(__file__)), "chip_tests")
+
+
+class TestVectorIndex(unittest.TestCase):
+
+    def test_quad_nand_definition(self):
+        # Arrange
+        data = load_yaml_test(os.path.join(CHIP_TESTS, "74F00_nand.yaml"))
+
+        # Act
+        index = VectorIndex.from_definition(data)
+
+        # Assert
+        self.assertEqual((index.inputs, index.outputs, index.gates), (("A", "B"), ("Y",), 4))
+        self.assertEqual(index.headers(), ["A", "B", "Y[1]", "Y[2]", "Y[3]", "Y[4]"])
+        self.assertEqual(index.expected.tolist(), [[0, 0, 1], [0, 1, 1], [1, 0, 1], [1, 1, 0]])
+        self.assertEqual(index.place({"A": 1, "B": 0, "Y": 1}, gate=3), [(2, 5, 1)])
+        self.assertEqual(index.place({"A": 1, "B": 0, "Y": 1}, gate=4), [])
+        self.assertEqual(index.place({"A": 1, "Y": 1}), [])
+
+    def test_results_layout(self):
+        index = VectorIndex.from_definition(load_yaml_test(os.path.join(CHIP_TESTS, "74F04_inverter.yaml")))
+
+        layout = index.results_layout()
+
+        self.assertEqual(layout.shape, (2, 1 + 6))
+        self.assertEqual(layout[:, 0].tolist(), [0, 1])
+        self.assertTrue((layout[:, 1:] == BLANK).all())
+        self.assertEqual(list(index.output_columns()), list(range(1, 7)))
+
+    def test_wide_table_lookup(self):
+        n = 10
+        rows = [dict({f"I{k}": bits[k] for k in range(n)}, Y=sum(bits) % 2)
+                for bits in itertools.product((0, 1), repeat=n)]
+        index = VectorIndex.from_definition({"rows": rows})
+
+        for r in (0, 1, 517, len(rows) - 1):
+            self.assertEqual(index.row_for(rows[r]), r)
+        self.assertEqual(index.rows_for_keys(index.keys).tolist(), list(range(len(rows))))
+        self.assertEqual(index.rows_for_keys([-1, 1 << n]).tolist(), [-1, -1])
+
+    def test_explicit_directions(self):
+        rows = np.array([[0, 1, 1], [1, 0, 0]])
+        index = VectorIndex(["EN", "D"], ["Q"], rows)
+
+        self.assertEqual(index.row_for({"EN": 1, "D": 0}), 1)
+        self.assertIsNone(index.row_for({"EN": 1, "D": 1}))
+        self.assertIsNone(index.row_for({"EN": "x", "D": 1}))
+
+
+if __name__ == '__main__':
+    unittest.main()
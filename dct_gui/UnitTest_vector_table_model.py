@@ -0,0 +1,65 @@
+import unittest
+import numpy as np
+from PyQt5.QtCore import Qt
+from vector_table_model import BLANK, UNKNOWN, VectorTableModel, cell_code
+
+"""
+Unit tests for VectorTableModel (numpy-backed truth/results tables).
+"""
+
+
+class TestVectorTableModel(unittest.TestCase):
+
+    def setUp(self):
+        self.model = VectorTableModel()
+        self.changes = []
+        self.model.dataChanged.connect(lambda a, b, roles: self.changes.append((a.row(), b.row(), a.column())))
+
+    def test_set_table_and_display(self):
+        # Arrange / Act
+        self.model.set_table(["A", "B", "Y"], [(0, 0, 1), (1, 1, BLANK)])
+
+        # Assert
+        self.assertEqual((self.model.rowCount(), self.model.columnCount()), (2, 3))
+        self.assertEqual(self.model.headerData(2, Qt.Horizontal), "Y")
+        self.assertEqual(self.model.data(self.model.index(0, 2)), "1")
+        self.assertEqual(self.model.data(self.model.index(1, 2)), "")
+        self.assertEqual(self.model.values.dtype, np.uint8)
+
+    def test_set_cell_notifies_only_changes(self):
+        self.model.set_table(["A", "Y"], [(0, BLANK), (1, BLANK)])
+
+        self.assertTrue(self.model.set_cell(1, 1, "0"))
+        self.assertFalse(self.model.set_cell(1, 1, 0))
+        self.assertFalse(self.model.set_cell(5, 1, 1))
+        self.model.set_cell(0, 1, "Z")
+
+        self.assertEqual(self.changes, [(1, 1, 1), (0, 0, 1)])
+        self.assertEqual(self.model.data(self.model.index(0, 1)), "X")
+
+    def test_set_column_single_notification(self):
+        self.model.set_table(["A", "Y"], np.full((1000, 2), BLANK))
+
+        n = self.model.set_column(1, [1, 0, 1], rows=[10, 20, 990])
+        cleared = self.model.clear_column(1)
+
+        self.assertEqual((n, cleared), (3, 3))
+        self.assertEqual(self.changes, [(10, 990, 1), (10, 990, 1)])
+
+    def test_highlight(self):
+        self.model.set_table(["A", "Y"], [(0, 1), (1, 1)])
+        mask = np.array([[False, False], [False, True]])
+
+        self.model.set_highlight(mask)
+        self.model.set_highlight(mask.copy())  # unchanged: no repaint
+
+        self.assertIsNotNone(self.model.data(self.model.index(1, 1), Qt.BackgroundRole))
+        self.assertIsNone(self.model.data(self.model.index(0, 1), Qt.BackgroundRole))
+        self.assertEqual(self.changes, [(1, 1, 0)])
+
+    def test_cell_code(self):
+        self.assertEqual([cell_code(v) for v in (0, "1", "", None, "X", 7)], [0, 1, BLANK, BLANK, UNKNOWN, UNKNOWN])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,150 @@
+import unittest
+import numpy as np
+from waveform_buffer import HistoryView, MinMaxPyramid, SampleRing, envelope_trace, to_screen
+
+"""
+Unit tests for the waveform sample ring and screen mapping.
+"""
+
+
+class TestSampleRing(unittest.TestCase):
+
+    def test_wraps_and_keeps_order(self):
+        # Arrange
+        ring = SampleRing(5)
+
+        # Act
+        ring.extend([1, 2, 3])
+        ring.extend([4, 5, 6, 7])
+
+        # Assert
+        self.assertEqual(len(ring), 5)
+        self.assertEqual(ring.view().tolist(), [3, 4, 5, 6, 7])
+        self.assertEqual(ring.last(2).tolist(), [6, 7])
+
+    def test_batch_larger_than_capacity(self):
+        ring = SampleRing(3)
+        ring.extend([0])
+
+        ring.extend(range(10))
+
+        self.assertEqual(ring.view().tolist(), [7, 8, 9])
+
+    def test_skips_non_numbers(self):
+        ring = SampleRing(4)
+
+        added = ring.extend([1.5, "x", None, float("nan"), "2"])
+
+        self.assertEqual(added, 2)
+        self.assertEqual(ring.view().tolist(), [1.5, 2.0])
+
+    def test_clear(self):
+        ring = SampleRing(4)
+        ring.extend([1, 2])
+
+        ring.clear()
+
+        self.assertEqual(len(ring), 0)
+        self.assertEqual(ring.view().tolist(), [])
+
+
+class TestToScreen(unittest.TestCase):
+
+    def test_maps_and_clips(self):
+        # Arrange: plot 100 px wide at x=10, 50 px high with its bottom at y=60
+        samples = np.array([0.0, 2.5, 5.0, 9.0])
+
+        # Act
+        xy = to_screen(samples, 10, 60, 100, 50, 0.0, 5.0)
+
+        # Assert
+        np.testing.assert_allclose(xy[:, 0], [10, 10 + 100 / 3, 10 + 200 / 3, 110])
+        np.testing.assert_allclose(xy[:, 1], [60, 35, 10, 10])
+
+    def test_positions_over_window(self):
+        xy = to_screen(np.array([1.0, 1.0]), 0, 10, 10, 10, 0.0, 1.0,
+                       pos=np.array([5, 15]), start=5, stop=16)
+
+        np.testing.assert_allclose(xy[:, 0], [0, 10])
+        np.testing.assert_allclose(xy[:, 1], [0, 0])
+
+    def test_envelope_trace(self):
+        pos, values = envelope_trace(np.array([0, 8]), np.array([1.0, 2.0]), np.array([3.0, 2.0]))
+
+        self.assertEqual(pos.tolist(), [0, 0, 8, 8])
+        self.assertEqual(values.tolist(), [1, 3, 2, 2])
+
+
+class TestMinMaxPyramid(unittest.TestCase):
+
+    def test_envelope_matches_brute_force(self):
+        # Arrange: uneven batches so blocks straddle extend() calls
+        rng = np.random.default_rng(1)
+        data = rng.normal(size=100_003).astype(np.float32)
+        pyramid = MinMaxPyramid(base=8, factor=4)
+        for chunk in np.array_split(data, 37):
+            pyramid.extend(chunk)
+
+        # Act
+        pos, lo, hi = pyramid.envelope(1000, 90_000, 100)
+
+        # Assert: every column covers its samples, columns stay within the width
+        self.assertEqual(pyramid.total, len(data))
+        self.assertLessEqual(len(pos), 100)
+        bounds = list(pos[1:]) + [90_000]
+        for p, q, a, b in zip(pos, bounds, lo, hi):
+            span = data[max(p, 1000):q]
+            self.assertLessEqual(a, span.min())
+            self.assertGreaterEqual(b, span.max())
+        # and no column reaches beyond the block-aligned range it was built from
+        self.assertGreaterEqual(lo.min(), data[pos[0]:].min())
+
+    def test_live_tail_is_included(self):
+        pyramid = MinMaxPyramid(base=64)
+        pyramid.extend(np.zeros(1000))
+        pyramid.extend([7.0])  # not yet part of a full block
+
+        pos, lo, hi = pyramid.envelope(0, pyramid.total, 4)
+
+        self.assertEqual(hi.max(), 7.0)
+        self.assertEqual(lo.min(), 0.0)
+
+    def test_clear(self):
+        pyramid = MinMaxPyramid()
+        pyramid.extend(np.ones(500))
+
+        pyramid.clear()
+
+        self.assertEqual(pyramid.total, 0)
+        self.assertEqual(len(pyramid.envelope(0, 10, 10)[0]), 0)
+
+
+class TestHistoryView(unittest.TestCase):
+
+    def test_zoom_pan_and_follow(self):
+        # Arrange
+        view = HistoryView()
+        self.assertEqual(view.window(1000), (0, 1000))
+
+        # Act / Assert: zoom in on the right edge keeps following the newest samples
+        view.zoom(0.1, 1.0, 1000)
+        self.assertEqual(view.window(1000), (900, 1000))
+        self.assertEqual(view.window(2000), (1900, 2000))
+
+        # panning back pauses at a fixed window
+        view.pan(-500, 2000)
+        self.assertFalse(view.following)
+        self.assertEqual(view.window(5000), (1400, 1500))
+
+        # panning past either end clamps to the run
+        view.pan(-10_000, 5000)
+        self.assertEqual(view.window(5000), (0, 100))
+        view.pan(10_000, 5000)
+        self.assertTrue(view.following)
+
+        view.reset()
+        self.assertEqual(view.window(5000), (0, 5000))
+
+
+if __name__ == "__main__":
+    unittest.main()
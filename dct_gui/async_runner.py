@@ -0,0 +1,195 @@
+# async_runner.py
+import asyncio
+import serial
+from serial import SerialException, SerialTimeoutException
+from test_runner import LineFramer, READY_EVENTS, REPLY_EVENTS, STREAM_EVENTS, TestRunner, line_event
+
+
+class AsyncTestRunner:
+    """
+    asyncio transport for the DCT MCU with the same connection semantics as TestRunner.
+
+    The port is opened non-blocking and its file descriptor is registered with the
+    event loop (loop.add_reader), so one process can drive many testers without a
+    thread per port and without timeout-based polling.
+
+      - await connect(port, baudrate)
+      - send_command(cmd): appends '\n' if missing
+      - async for line in lines(): every received line not claimed by a request
+      - await request(cmd): send and wait for the matching reply line
+      - close_connection(): safe teardown
+
+    add_reader needs a selectable descriptor, i.e. a POSIX serial port.
+    """
+
+    def __init__(self, port='COM3', baudrate=9600):
+        """
+        :param port: default serial port (string)
+        :param baudrate: default baud (int)
+        """
+        self.port = port
+        self.baudrate = baudrate
+        self.ser = None
+        self.framer = LineFramer()
+        self._loop = None
+        self._lines = None
+        self._waiters = []  # [(predicate, future)] in request order
+        self.ready = False
+
+    # ---------- Connection control ----------
+    async def connect(self, port=None, baudrate=None, handshake_timeout=2.0):
+        """
+        Open the serial port and start watching it on the running event loop.
+
+        Like TestRunner.connect, waits for the MCU with a repeated 'status' probe
+        rather than a fixed delay; the reply is still delivered through lines().
+        """
+        if port is not None:
+            self.port = port
+        if baudrate is not None:
+            self.baudrate = baudrate
+
+        self.close_connection()
+        self._loop = asyncio.get_running_loop()
+        self._lines = asyncio.Queue()
+        self.framer.reset()
+        try:
+            self.ser = serial.Serial(
+                self.port,
+                self.baudrate,
+                timeout=0,                  # non-blocking reads; the loop tells us when
+                write_timeout=0.25,
+                exclusive=True
+            )
+            if not hasattr(self.ser, "fileno"):
+                raise NotImplementedError("AsyncTestRunner needs a selectable (POSIX) serial port")
+            try:
+                self.ser.reset_input_buffer()
+                self.ser.reset_output_buffer()
+            except Exception:
+                pass
+            self._loop.add_reader(self.ser.fileno(), self._on_readable)
+            self.ready = await self._handshake(handshake_timeout)
+            return True
+        except Exception:
+            self.close_connection()
+            raise
+
+    def is_connected(self):
+        return (self.ser is not None) and self.ser.is_open
+
+    def close_connection(self):
+        if self.ser:
+            try:
+                if self._loop is not None:
+                    self._loop.remove_reader(self.ser.fileno())
+            except Exception:
+                pass
+            try:
+                if self.ser.is_open:
+                    self.ser.close()
+            except Exception:
+                pass
+        self.ser = None
+        for _, fut in self._waiters:
+            if not fut.done():
+                fut.set_exception(ConnectionError("serial connection closed"))
+        self._waiters = []
+        if self._lines is not None:
+            self._lines.put_nowait(None)  # wakes lines() consumers
+
+    # ---------- I/O ----------
+    def send_command(self, command: str) -> bool:
+        """
+        Send a single-line command. A trailing newline is appended if missing.
+
+        Returns True on success, False on failure.
+        """
+        if not self.is_connected():
+            return False
+        try:
+            line = command if command.endswith("\n") else (command + "\n")
+            self.ser.write(line.encode("utf-8"))
+            return True
+        except (SerialTimeoutException, SerialException, OSError):
+            return False
+
+    async def lines(self):
+        """
+        Async iterator over received lines; ends when the connection is closed.
+        """
+        queue = self._lines
+        if queue is None:
+            return
+        while True:
+            line = await queue.get()
+            if line is None:
+                return
+            yield line
+
+    async def request(self, command: str, expect=None, timeout: float = 1.0) -> str:
+        """
+        Send a command and return the first line that answers it.
+
+        :param expect: event name, or callable(line) -> bool; by default the reply
+                       event listed in REPLY_EVENTS, else the next line that is not
+                       a streamed event (STREAM_EVENTS)
+        :param timeout: seconds to wait before raising asyncio.TimeoutError
+        """
+        if expect is None:
+            expect = REPLY_EVENTS.get(command.strip().split(" ", 1)[0])
+        if expect is None:
+            predicate = lambda line: line_event(line) not in STREAM_EVENTS
+        elif callable(expect):
+            predicate = expect
+        else:
+            predicate = lambda line: line_event(line) == expect
+
+        fut = self._loop.create_future()
+        waiter = (predicate, fut)
+        self._waiters.append(waiter)
+        try:
+            if not self.send_command(command):
+                raise ConnectionError(f"failed to send: {command}")
+            return await asyncio.wait_for(fut, timeout)
+        finally:
+            if waiter in self._waiters:
+                self._waiters.remove(waiter)
+
+    async def _handshake(self, timeout):
+        deadline = self._loop.time() + timeout
+        is_ready = lambda line: line_event(line) in READY_EVENTS
+        while True:
+            left = deadline - self._loop.time()
+            if left <= 0:
+                return False
+            try:
+                reply = await self.request("status", expect=is_ready,
+                                           timeout=min(left, TestRunner.HANDSHAKE_RESEND))
+            except asyncio.TimeoutError:
+                continue
+            except ConnectionError:
+                return False
+            self._lines.put_nowait(reply)
+            return True
+
+    def _on_readable(self):
+        try:
+            data = self.ser.read(self.ser.in_waiting or 1)
+        except (SerialException, OSError):
+            self.close_connection()
+            return
+        if not data:
+            return
+        for line in self.framer.feed(data):
+            self._dispatch(line)
+
+    def _dispatch(self, line):
+        # The oldest pending request that accepts the line claims it
+        for waiter in self._waiters:
+            predicate, fut = waiter
+            if not fut.done() and predicate(line):
+                fut.set_result(line)
+                self._waiters.remove(waiter)
+                return
+        self._lines.put_nowait(line)
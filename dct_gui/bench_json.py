@@ -0,0 +1,54 @@
+# bench_json.py
+import argparse
+import sys
+import time
+import events
+import json_backend
+
+"""
+Micro-benchmark: per-line cost of events.decode() for each JSON backend.
+
+    python bench_json.py [--lines N]
+"""
+
+SAMPLES = {
+    "pwm": '{"event":"pwm","duty":128,"voltage":2.514}',
+    "health": '{"event":"health","min_v":0.05,"max_v":4.85,"avg_v":2.47}',
+    "vector": '{"event":"vector","A":1,"B":0,"Y":1}',
+    "summary": '{"event":"summary","test":"nand","passes":4,"fails":0,"pass_rate":100.0,'
+               '"truth_table":[[0,0,1],[0,1,1],[1,0,1],[1,1,0]]}',
+    "text": "A=0 B=1 Y=1",
+}
+
+
+def per_line_ns(line, n):
+    decode = events.decode
+    best = None
+    for _ in range(3):
+        start = time.perf_counter_ns()
+        for _ in range(n):
+            decode(line)
+        elapsed = (time.perf_counter_ns() - start) / n
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description=__doc__)
+    ap.add_argument("--lines", type=int, default=50000, help="decodes per measurement")
+    args = ap.parse_args(argv)
+
+    backends = json_backend.available()
+    print(f"{'event':<10}" + "".join(f"{b:>12}" for b in backends) + "   (ns per line)")
+    results = {}
+    for b in backends:
+        json_backend.install(b)
+        results[b] = {k: per_line_ns(line, args.lines) for k, line in SAMPLES.items()}
+    json_backend.install("json")
+    for k in SAMPLES:
+        print(f"{k:<10}" + "".join(f"{results[b][k]:>12,.0f}" for b in backends))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,190 @@
+# binary_protocol.py
+import json
+import struct
+
+"""
+Optional compact framing for the MCU -> host stream.
+
+Negotiated at connect time: the host sends PROTO_REQUEST and a binary-capable
+MCU answers with the JSON line {"event":"proto","mode":"binary"}. From then on it
+sends COBS-encoded frames terminated by 0x00. Each frame payload starts with a
+one-byte kind followed by fixed-layout little-endian records:
+
+  KIND_TEXT    UTF-8 line (status/detect/summary/... stay JSON inside it)
+  KIND_PWM     N x PWM_RECORD     (t_us:u32, duty:u16, millivolts:u16)
+  KIND_VECTOR  N x VECTOR_RECORD  (gate:u8, n_in|n_out<<4:u8, in_bits:u16, out_bits:u16)
+
+Host -> MCU commands stay newline-delimited text.
+"""
+
+PROTO_REQUEST = "proto binary"
+
+KIND_TEXT = 0x01
+KIND_PWM = 0x10
+KIND_VECTOR = 0x11
+
+PWM_RECORD = struct.Struct("<IHH")
+VECTOR_RECORD = struct.Struct("<BBHH")
+
+DEFAULT_INPUTS = "ABCDEFGHIJKLMNOP"
+
+
+# ---------- COBS ----------
+def cobs_encode(data: bytes) -> bytes:
+    """Consistent Overhead Byte Stuffing: output contains no 0x00 bytes."""
+    out = bytearray()
+    start = 0
+    n = len(data)
+    while True:
+        zero = data.find(b"\x00", start, start + 254)
+        if zero < 0:
+            block = data[start:start + 254]
+            out.append(len(block) + 1)
+            out += block
+            start += len(block)
+            if len(block) < 254 or start >= n:
+                break
+        else:
+            out.append(zero - start + 1)
+            out += data[start:zero]
+            start = zero + 1
+    return bytes(out)
+
+
+def cobs_decode(data) -> bytes:
+    """Inverse of cobs_encode; raises ValueError on a malformed frame."""
+    out = bytearray()
+    i = 0
+    n = len(data)
+    while i < n:
+        code = data[i]
+        if code == 0 or i + code > n + 1:
+            raise ValueError("bad COBS frame")
+        out += data[i + 1:i + code]
+        i += code
+        if code < 0xFF and i < n:
+            out.append(0)
+    return bytes(out)
+
+
+# ---------- Encoding (MCU side; used by tests and tooling) ----------
+def encode_frame(kind: int, payload: bytes = b"") -> bytes:
+    return cobs_encode(bytes((kind,)) + payload) + b"\x00"
+
+
+def encode_text(line: str) -> bytes:
+    return encode_frame(KIND_TEXT, line.encode("utf-8"))
+
+
+def encode_pwm(samples) -> bytes:
+    """:param samples: iterable of (t_us, duty, volts)"""
+    payload = b"".join(PWM_RECORD.pack(t, d, int(round(v * 1000))) for t, d, v in samples)
+    return encode_frame(KIND_PWM, payload)
+
+
+def encode_vectors(vectors) -> bytes:
+    """:param vectors: iterable of (gate, inputs tuple, outputs tuple) with 0/1 values"""
+    payload = bytearray()
+    for gate, ins, outs in vectors:
+        in_bits = sum(int(b) << i for i, b in enumerate(ins))
+        out_bits = sum(int(b) << i for i, b in enumerate(outs))
+        payload += VECTOR_RECORD.pack(gate, len(ins) | (len(outs) << 4), in_bits, out_bits)
+    return encode_frame(KIND_VECTOR, bytes(payload))
+
+
+# ---------- Decoding (host side) ----------
+def decode_pwm(payload) -> list:
+    return [
+        {"event": "pwm", "t_us": t, "duty": duty, "voltage": mv / 1000.0}
+        for t, duty, mv in PWM_RECORD.iter_unpack(payload)
+    ]
+
+
+def decode_vectors(payload, inputs=None, outputs=None) -> list:
+    events = []
+    for gate, counts, in_bits, out_bits in VECTOR_RECORD.iter_unpack(payload):
+        n_in, n_out = counts & 0x0F, counts >> 4
+        in_names = inputs or DEFAULT_INPUTS[:n_in]
+        out_names = outputs or (("Y",) if n_out == 1 else tuple(f"Y{i}" for i in range(n_out)))
+        evt = {"event": "vector", "gate": gate}
+        for i, name in enumerate(in_names[:n_in]):
+            evt[name] = (in_bits >> i) & 1
+        for i, name in enumerate(out_names[:n_out]):
+            evt[name] = (out_bits >> i) & 1
+        events.append(evt)
+    return events
+
+
+class BinaryFramer:
+    """
+    Drop-in replacement for LineFramer once binary mode is negotiated.
+
+    feed() returns text lines (str) from KIND_TEXT frames and already-decoded
+    event dicts from record frames, in arrival order.
+    """
+
+    def __init__(self, pending=b"", max_frame=65536):
+        """
+        :param pending: bytes already read past the negotiation reply
+        :param max_frame: drop the buffer if this many bytes arrive without a delimiter
+        """
+        self.max_frame = max_frame
+        self.inputs = None   # optional pin names for vector records
+        self.outputs = None
+        self.bad_frames = 0
+        self._buf = bytearray(pending)
+
+    def set_pins(self, inputs=None, outputs=None):
+        self.inputs = tuple(inputs) if inputs else None
+        self.outputs = tuple(outputs) if outputs else None
+
+    def reset(self):
+        self._buf.clear()
+
+    def pending(self):
+        return len(self._buf)
+
+    def feed(self, data):
+        buf = self._buf
+        buf += data
+        end = buf.rfind(b"\x00")
+        if end < 0:
+            if len(buf) > self.max_frame:
+                buf.clear()
+            return []
+        frames = bytes(buf[:end]).split(b"\x00")
+        del buf[:end + 1]
+        out = []
+        for frame in frames:
+            if not frame:
+                continue
+            try:
+                payload = cobs_decode(frame)
+            except ValueError:
+                self.bad_frames += 1
+                continue
+            kind, body = payload[0], memoryview(payload)[1:]
+            if kind == KIND_PWM:
+                out.extend(decode_pwm(body))
+            elif kind == KIND_VECTOR:
+                out.extend(decode_vectors(body, self.inputs, self.outputs))
+            elif kind == KIND_TEXT:
+                line = str(body, "utf-8", "ignore").rstrip("\r\n")
+                if line:
+                    out.append(line)
+            else:
+                self.bad_frames += 1
+        return out
+
+
+def parse_proto_reply(line: str):
+    """Return the mode named by a {"event":"proto"} reply, else None."""
+    if not line.startswith("{"):
+        return None
+    try:
+        data = json.loads(line)
+    except ValueError:
+        return None
+    if isinstance(data, dict) and data.get("event") == "proto":
+        return data.get("mode")
+    return None
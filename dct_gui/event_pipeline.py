@@ -0,0 +1,131 @@
+# event_pipeline.py
+import threading
+from collections import deque
+from typing import Callable, List, Optional
+import events
+from events import PwmBlock, PwmEvent, TextLine
+
+"""
+Decode stage between a serial reader thread and the GUI thread.
+
+EventPipeline.feed() runs on the reader thread (pass it as the sink of
+TestRunner.start_reader): lines are decoded there and queued as typed events.
+The GUI takes ready events in batches. The queue is bounded in entries and in
+pwm samples; under overload pwm samples are merged and then dropped, and so
+are plain log lines, but replies, results, vectors and health never are.
+"""
+
+# the only events that may be dropped under overload (high-rate or cosmetic)
+SHEDDABLE = (PwmEvent, PwmBlock, TextLine)
+
+
+class EventPipeline:
+    """
+    Bounded, thread-safe event queue fed with raw serial lines.
+
+      - consecutive pwm samples are merged into one PwmBlock (up to max_block)
+      - once max_samples pwm samples are waiting, new ones are dropped and
+        counted in .dropped
+      - once max_events entries are waiting, new SHEDDABLE events are dropped
+        (samples in .dropped, log lines in .dropped_lines)
+      - on_ready is called (from the feeding thread) once per take() cycle
+    """
+
+    def __init__(self, max_events=5000, max_block=4096, max_samples=50000,
+                 on_ready: Optional[Callable[[], None]] = None, decode: Callable = events.decode):
+        """
+        :param max_events: queued entries before sheddable events are dropped
+        :param max_block: pwm samples merged into a single PwmBlock
+        :param max_samples: queued pwm samples (over all blocks) before new ones are
+                            dropped; bounds the GUI's backlog, which entries alone do not
+        :param on_ready: wake-up callback for the consumer (e.g. a queued Qt signal)
+        :param decode: item -> event (or None), events.decode by default
+        """
+        self.max_events = max_events
+        self.max_block = max_block
+        self.max_samples = max_samples
+        self.on_ready = on_ready
+        self.decode = decode
+        self.dropped = 0        # pwm samples
+        self.dropped_lines = 0  # TextLines
+        self.merged = 0
+        self.samples = 0        # pwm samples currently queued
+        self.sample_sink: Optional[Callable[[List], None]] = None  # e.g. SampleWriter.record, sees every event
+        self._queue = deque()
+        self._lock = threading.Lock()
+        self._notified = False
+
+    def __len__(self):
+        return len(self._queue)
+
+    # ---------- Producer side (reader thread) ----------
+    def feed(self, items) -> None:
+        """Decode and queue a batch of received items; an empty batch just wakes the consumer."""
+        decode = self.decode
+        decoded = []
+        for item in items:
+            try:
+                event = decode(item)
+            except Exception:
+                event = None  # undecodable junk never reaches the GUI
+            if event is not None:
+                decoded.append(event)
+        sink = self.sample_sink
+        if sink is not None and decoded:
+            sink(decoded)  # before the queue, so recording is complete under overload
+        with self._lock:
+            for event in decoded:
+                self._put(event)
+            wake = not self._notified
+            self._notified = True
+        if wake and self.on_ready is not None:
+            self.on_ready()
+
+    def _put(self, event):
+        q = self._queue
+        if type(event) is PwmEvent:
+            if self.samples >= self.max_samples:
+                self.dropped += 1
+                return
+            tail = q[-1] if q else None
+            if type(tail) is PwmBlock and len(tail.duty) < self.max_block:
+                tail.duty.append(event.duty)
+                tail.voltage.append(event.voltage)
+                tail.t_us.append(event.t_us)
+                self.merged += 1
+            elif len(q) < self.max_events:
+                q.append(PwmBlock([event.duty], [event.voltage], [event.t_us]))
+            else:
+                self.dropped += 1
+                return
+            self.samples += 1
+        elif len(q) < self.max_events or not isinstance(event, SHEDDABLE):
+            q.append(event)
+            if type(event) is PwmBlock:
+                self.samples += len(event.duty)
+        elif type(event) is PwmBlock:
+            self.dropped += len(event.duty)
+        else:
+            self.dropped_lines += 1
+
+    # ---------- Consumer side (GUI thread) ----------
+    def take(self, max_events: Optional[int] = None) -> List:
+        """
+        Remove and return up to max_events queued events (None = all), oldest first.
+        Re-arms on_ready.
+        """
+        with self._lock:
+            self._notified = False
+            q = self._queue
+            n = len(q) if max_events is None else min(max_events, len(q))
+            out = [q.popleft() for _ in range(n)]
+            for event in out:
+                if type(event) is PwmBlock:
+                    self.samples -= len(event.duty)
+            return out
+
+    def clear(self) -> None:
+        with self._lock:
+            self._queue.clear()
+            self.samples = 0
+            self._notified = False
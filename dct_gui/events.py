@@ -0,0 +1,290 @@
+# events.py
+import json
+import re
+from typing import Any, Callable, Dict, List, NamedTuple, Optional
+from binary_protocol import DEFAULT_INPUTS
+
+"""
+Decoding of MCU serial lines into typed events, independent of Qt.
+
+decode() sniffs the first character: '{' goes to the JSON decoder, anything else
+to the legacy text-vector parser, so plain text never pays for a failed
+json.loads. EventDispatcher routes decoded events to handlers by type.
+
+The JSON parser is pluggable (json_backend.install() picks orjson/msgspec when
+available); stdlib json is the default.
+"""
+
+
+class StatusEvent(NamedTuple):
+    menu_index: Optional[int]
+    raw: dict
+
+
+class DetectEvent(NamedTuple):
+    chip: str
+    raw: dict
+
+
+class VectorEvent(NamedTuple):
+    pins: Dict[str, int]          # pin name -> observed level, inputs and outputs
+    source: str = "vector"        # "vector", "row"/"sample"/"probe" or "text"
+    gate: Optional[int] = None
+
+
+class PwmEvent(NamedTuple):
+    duty: int
+    voltage: float
+    t_us: Optional[int] = None
+
+
+class PwmBlock(NamedTuple):
+    """Consecutive pwm samples merged by EventPipeline (parallel lists)."""
+    duty: List[int]
+    voltage: List[float]
+    t_us: List[Optional[int]]
+
+
+class SummaryEvent(NamedTuple):
+    test: str
+    passes: int
+    fails: int
+    pass_rate: float
+    rows: Optional[list]
+    raw: dict
+
+
+class HealthEvent(NamedTuple):
+    min_v: Optional[float]
+    max_v: Optional[float]
+    avg_v: Optional[float]
+
+
+class OtherEvent(NamedTuple):
+    """JSON event without a dedicated type (proto, ack, ...)."""
+    name: Optional[str]
+    raw: dict
+
+
+class TextLine(NamedTuple):
+    """Non-JSON line that is not a vector result."""
+    text: str
+
+
+# ---------- JSON events ----------
+def _status(d):
+    m = d.get("menuIndex")
+    return StatusEvent(m if isinstance(m, int) else None, d)
+
+
+def _detect(d):
+    return DetectEvent(str(d.get("chip", "UNKNOWN")), d)
+
+
+_NOT_PINS = ("event", "gate", "id", "t_us")
+
+
+def _vector(d):
+    pins = {}
+    for k, v in d.items():
+        if k not in _NOT_PINS:
+            try:
+                pins[k] = int(v)
+            except (TypeError, ValueError):
+                pass
+    return VectorEvent(pins, "vector", d.get("gate"))
+
+
+def _row(d):
+    # alternate per-vector names: A/B/Y, or inputs list + output
+    a = d.get("A")
+    b = d.get("B")
+    y = d.get("Y", d.get("output"))
+    inputs = d.get("inputs")
+    if a is None and isinstance(inputs, list):
+        if len(inputs) >= 1:
+            a = inputs[0]
+        if len(inputs) >= 2:
+            b = inputs[1]
+    pins = {}
+    try:
+        for name, v in (("A", a), ("B", b), ("Y", y)):
+            if v is not None:
+                pins[name] = int(v)
+    except (TypeError, ValueError):
+        pins = {}
+    return VectorEvent(pins, d.get("event"), d.get("gate"))
+
+
+def _summary(d):
+    rows = d.get("truth_table") or d.get("observed") or d.get("rows")
+    return SummaryEvent(str(d.get("test", "?")), d.get("passes", 0), d.get("fails", 0),
+                        d.get("pass_rate", 0.0), rows if isinstance(rows, list) else None, d)
+
+
+def _opt_float(v):
+    return None if v is None else float(v)
+
+
+def _health(d):
+    return HealthEvent(_opt_float(d.get("min_v")), _opt_float(d.get("max_v")), _opt_float(d.get("avg_v")))
+
+
+def _pwm(d):
+    duty = d.get("duty")
+    v = d.get("voltage")
+    if duty is None or v is None:
+        return None
+    return PwmEvent(int(duty), float(v), d.get("t_us"))
+
+
+JSON_DECODERS: Dict[str, Callable[[dict], Any]] = {
+    "status": _status,
+    "detect": _detect,
+    "vector": _vector,
+    "row": _row,
+    "sample": _row,
+    "probe": _row,
+    "summary": _summary,
+    "health": _health,
+    "pwm": _pwm,
+}
+
+
+def decode_dict(d: dict):
+    """Typed event for an already-parsed JSON object (or binary-mode record)."""
+    name = d.get("event")
+    decoder = JSON_DECODERS.get(name)
+    if decoder is None:
+        return OtherEvent(name, d)
+    try:
+        return decoder(d)
+    except (TypeError, ValueError):
+        return None  # malformed payload: dropped like before
+
+
+# ---------- Legacy text vectors ----------
+# One pass over the line collects every 'NAME=bits' / 'NAME: b, b' assignment;
+# IN/OUT lists expand to default pin names. The bits must not run on into a
+# digit, letter or decimal point, which keeps 'rate=100' and 'Vout=1.25' out,
+# and long lines are cut at MAX_TEXT_LINE.
+MAX_TEXT_LINE = 256
+_RE_ASSIGN = re.compile(r'\b([A-Z]\w*|\d+[A-Z]\w*)\s*[:=]\s*\[?\s*([01](?:\s*[, ]\s*[01])*)(?![\w.])')
+_RE_OUTPUT = re.compile(r'\d*Y\d*')
+_IN_LISTS = ("IN", "INPUT", "INPUTS")
+_OUT_LISTS = ("OUT", "OUTPUT", "OUTPUTS")
+
+
+def parse_vector_text(line: str) -> Optional[VectorEvent]:
+    """
+    Parse plain-text vector results like:
+      'A=0 B=1 Y=1'
+      'IN: 0,1 -> OUT: 1'
+      'A:1, Y:0' (for inverter)
+    and their N-pin forms ('A=1 B=0 C=1 D=1 Y=0', 'IN: 1,0,1 -> OUT: 0,1').
+    Returns None unless the line names at least one input and one output.
+    """
+    s = line[:MAX_TEXT_LINE].upper()
+    if ("Y" not in s and "OUT" not in s) or ("=" not in s and ":" not in s):
+        return None  # cheap reject for ordinary log text
+    pins = {}
+    has_in = has_out = False
+    for name, bits in _RE_ASSIGN.findall(s):
+        values = [int(bits)] if len(bits) == 1 else [int(c) for c in bits if c == "0" or c == "1"]
+        if name in _IN_LISTS:
+            pins.update(zip(DEFAULT_INPUTS, values))
+            has_in = True
+        elif name in _OUT_LISTS:
+            names = ("Y",) if len(values) == 1 else [f"Y{i}" for i in range(len(values))]
+            pins.update(zip(names, values))
+            has_out = True
+        elif len(values) == 1:
+            pins[name] = values[0]
+            if _RE_OUTPUT.fullmatch(name):
+                has_out = True
+            else:
+                has_in = True
+    if not (has_in and has_out):
+        return None
+    return VectorEvent(pins, "text")
+
+
+# ---------- JSON backend ----------
+_loads = json.loads
+_typed = None  # optional callable(line) -> typed event, or None to fall back to dicts
+
+
+def use_json_backend(loads, typed=None) -> None:
+    """
+    Swap the JSON parser used by decode().
+
+    :param loads: callable(str) -> object, raising ValueError on bad input
+    :param typed: optional schema-typed fast path for known events
+    """
+    global _loads, _typed
+    _loads = loads
+    _typed = typed
+
+
+# ---------- Entry points ----------
+def decode(item):
+    """
+    Decode one received item (text line or binary-mode event dict) into a typed
+    event. Returns None for lines that should be ignored.
+    """
+    if isinstance(item, dict):
+        return decode_dict(item)
+    if not item:
+        return None
+    c = item[0]
+    if c == " " or c == "\t":
+        item = item.lstrip()
+        c = item[:1]
+    if c == "{":
+        if _typed is not None:
+            event = _typed(item)
+            if event is not None:
+                return event
+        try:
+            d = _loads(item)
+        except ValueError:
+            d = None
+        if isinstance(d, dict):
+            return decode_dict(d)
+    return parse_vector_text(item) or TextLine(item)
+
+
+class EventDispatcher:
+    """
+    Route typed events to handlers registered per event class.
+
+        dispatcher.register(PwmEvent, on_pwm)
+        dispatcher.feed(line)
+    """
+
+    def __init__(self):
+        self._handlers: Dict[type, List[Callable]] = {}
+
+    def register(self, event_type: type, handler: Callable) -> None:
+        self._handlers.setdefault(event_type, []).append(handler)
+
+    def unregister(self, event_type: type, handler: Callable) -> None:
+        handlers = self._handlers.get(event_type, [])
+        if handler in handlers:
+            handlers.remove(handler)
+
+    def dispatch(self, event) -> bool:
+        """Call the handlers for the event's type. Returns False if there were none."""
+        handlers = self._handlers.get(type(event))
+        if not handlers:
+            return False
+        for handler in handlers:
+            handler(event)
+        return True
+
+    def feed(self, item):
+        """Decode one received item and dispatch it. Returns the event (or None)."""
+        event = decode(item)
+        if event is not None:
+            self.dispatch(event)
+        return event
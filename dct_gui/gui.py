@@ -1,21 +1,61 @@
 # gui.py
 import sys
 import json
-import re
+import time
+import threading
+import numpy as np
 from datetime import datetime
 from typing import Optional, Union  # <-- for Python < 3.10
-from PyQt5.QtGui import QIcon, QFont, QPainter, QColor, QPen, QPolygonF
-from test_runner import TestRunner
-from PyQt5.QtCore import Qt, QTimer, QPointF
+from PyQt5.QtGui import QIcon, QFont, QPainter, QPixmap, QColor, QPen, QPolygonF
+from test_runner import TestRunner, command_word
+from session_capture import SessionReplay
+from sample_store import SampleStore, SampleWriter
+import opamp_analysis
+from opamp_analysis import SeriesRing
+from ui_presenter import UiPresenter
+from event_pipeline import EventPipeline
+from vector_table_model import BLANK, VectorTableModel
+from vector_index import VectorIndex
+from vector_compare import VectorComparator
+from stream_stats import OpampStats
+from waveform_buffer import (
+    HistoryView, MinMaxPyramid, SampleRing, bucket_minmax, clean_samples, envelope_trace, to_screen
+)
+import json_backend
+from events import (
+    EventDispatcher, StatusEvent, DetectEvent, VectorEvent, SummaryEvent, HealthEvent,
+    PwmEvent, PwmBlock, OtherEvent, TextLine
+)
+from PyQt5.QtCore import Qt, QTimer, QObject, pyqtSignal
 from yaml_loader import load_yaml_test
 from PyQt5.QtWidgets import (
     QApplication, QMainWindow, QMenuBar, QAction, QFileDialog, QMessageBox, QTextEdit,
     QStackedWidget, QWidget, QPushButton, QVBoxLayout, QLabel, QHBoxLayout, QSizePolicy,
-    QGroupBox, QGridLayout, QComboBox, QTableWidget, QTableWidgetItem, QHeaderView, QSpacerItem
+    QGroupBox, QGridLayout, QComboBox, QTableView, QHeaderView, QSpacerItem
 )
 
+# Built-in logic tests (same shape as a YAML test definition)
+BUILTIN_TESTS = {
+    "nand": {"inputs": ["A", "B"], "outputs": {"Y": "!(A & B)"}},
+    "inv": {"inputs": ["A"], "outputs": {"Y": "!A"}},
+}
+
+
+class SerialSignals(QObject):
+    """Bridge from the serial reader thread onto the GUI thread (queued connection)."""
+    events_ready = pyqtSignal()
+    reconnected = pyqtSignal(object, object, object)  # (original error, reconnect error or None, runner)
+    samples_flushed = pyqtSignal()            # SampleWriter.flush_async() completed
+
 
 class DCTGui(QMainWindow):
+    # upper bound of events handled per drain before yielding back to the event loop
+    DRAIN_BATCH = 2000
+    # widgets are refreshed at most this many times per second (see UiPresenter)
+    FRAME_HZ = 60
+    OPAMP_VREF = 5.0  # PWM full scale / op-amp supply; adjust if your board is 3.3V
+    ANALYSIS_WINDOW = 1_000_000  # newest recorded samples used for the settling fit
+
     def __init__(self):
         super().__init__()
         self.setWindowTitle("DCT v2 GUI")
@@ -29,6 +69,13 @@ class DCTGui(QMainWindow):
         self.log_output.setReadOnly(True)
         self.log_output.setFixedHeight(100)
 
+        # Widget updates from serial events are coalesced and applied once per frame
+        self.frame_timer = QTimer(self)
+        self.frame_timer.setSingleShot(True)
+        self.frame_timer.setInterval(int(1000 / self.FRAME_HZ))
+        self.frame_timer.timeout.connect(self._present_frame)
+        self.presenter = UiPresenter(on_dirty=self.frame_timer.start)
+
         # Logic selector mapping (index -> (label, select_cmd, start_cmd))
         self.logic_tests = [
             ("NAND Test",     "select_nand",     "start_nand"),
@@ -38,8 +85,14 @@ class DCTGui(QMainWindow):
         self.current_test_kind = "nand"
         # flag set when a test definition has been pushed to the MCU
         self.loaded_test_available = False
-        # track which page initiated the last 'detect' request: 'logic' or 'opamp'
-        self._last_detect_target = None
+        # layout of the current truth/results tables (see vector_index.py)
+        self.vector_index = None
+        # host-side pass/fail check of observed vectors (see vector_compare.py)
+        self.comparator = None
+        # seconds to wait for a correlated reply (see TestRunner.request)
+        self.request_timeout = 2.0
+        # logic starts are answered by the run's summary, so they wait longer
+        self.run_timeout = 30.0
 
         # Create the main layout and widgets
         self._create_actions_()
@@ -62,11 +115,24 @@ class DCTGui(QMainWindow):
         central_layout.addWidget(self.log_output)
         self.setCentralWidget(central_widget)
 
-        # Serial poller (non-blocking)
-        self.serial_timer = QTimer(self)
-        self.serial_timer.setInterval(50)  # ms
-        self.serial_timer.timeout.connect(self._drain_serial)
-        self.serial_timer.start()
+        # Decoded serial events → handlers (see events.py)
+        self.dispatcher = self._build_dispatcher()
+        self._reset_opamp_stats()
+
+        # Serial reader thread decodes into the pipeline and wakes the GUI through
+        # this signal (no polling timer)
+        self.serial_signals = SerialSignals(self)
+        self.serial_signals.events_ready.connect(self._drain_serial)
+        self.serial_signals.reconnected.connect(self._on_reconnect_done)
+        # queued even when the writer had nothing pending and reports back on this thread
+        self.serial_signals.samples_flushed.connect(self._on_samples_flushed, Qt.QueuedConnection)
+        self._analysis_waiters = []  # then-callbacks of analyses waiting for the recording
+        self._analysis_path = None   # recording those analyses read
+        self._reconnecting = False
+        self.pipeline = EventPipeline(on_ready=self.serial_signals.events_ready.emit)
+        self._reported_drops = (0, 0)  # pipeline (dropped, dropped_lines) already logged
+        self._reported_write_errors = 0
+        self.sample_writer = None  # SampleWriter while pwm samples are recorded to disk
 
         # Populate available ports
         self._refresh_ports()
@@ -78,8 +144,19 @@ class DCTGui(QMainWindow):
         self.open_action = QAction("Open", self)
         self.save_action = QAction("Save", self)
         self.exit_action = QAction("Exit", self)
+        self.record_action = QAction("Record Session…", self)
+        self.record_action.setCheckable(True)
+        self.replay_action = QAction("Replay Capture…", self)
+        self.samples_action = QAction("Record PWM Samples…", self)
+        self.samples_action.setCheckable(True)
+        # opt-in: firmware without binary framing may misread the negotiation request
+        self.binary_action = QAction("Binary Stream (on connect)", self)
+        self.binary_action.setCheckable(True)
         self.exit_action.triggered.connect(self.close)  # exit the application
         self.open_action.triggered.connect(self.open_test_file)
+        self.record_action.toggled.connect(self._toggle_recording)
+        self.replay_action.triggered.connect(self.replay_capture)
+        self.samples_action.toggled.connect(self._toggle_sample_recording)
         self.new_action.setIcon(QIcon("icon/new_file_svg.svg"))
         self.open_action.setIcon(QIcon("icon/open_file_svg.svg"))
         self.save_action.setIcon(QIcon("icon/save_svg.svg"))
@@ -148,6 +225,11 @@ class DCTGui(QMainWindow):
         file_menu.addAction(self.open_action)
         file_menu.addAction(self.save_action)
         file_menu.addSeparator()
+        file_menu.addAction(self.record_action)
+        file_menu.addAction(self.replay_action)
+        file_menu.addAction(self.samples_action)
+        file_menu.addAction(self.binary_action)
+        file_menu.addSeparator()
         file_menu.addAction(self.exit_action)
 
         # === Edit Menu ===
@@ -328,15 +410,18 @@ class DCTGui(QMainWindow):
         truth_table_group = QGroupBox("Expected Truth Table")
         truth_layout = QVBoxLayout()
 
-        self.truth_table = QTableWidget(4, 3)
+        # expected vectors live in a uint8 matrix behind a model (see vector_table_model.py)
+        self.truth_model = VectorTableModel(self)
+        self.truth_model.set_table(["A", "B", "Y"], [[BLANK] * 3] * 4)
+        self.truth_table = QTableView()
+        self.truth_table.setModel(self.truth_model)
         self.truth_table.setSizePolicy(QSizePolicy.Expanding, QSizePolicy.Fixed)
         self.truth_table.setFixedHeight(170)
         self.truth_table.verticalHeader().setVisible(False)
-        self.truth_table.setEditTriggers(QTableWidget.NoEditTriggers)
-        self.truth_table.setSelectionMode(QTableWidget.NoSelection)
+        self.truth_table.setEditTriggers(QTableView.NoEditTriggers)
+        self.truth_table.setSelectionMode(QTableView.NoSelection)
         self.truth_table.horizontalHeader().setSectionResizeMode(QHeaderView.Stretch)
         self.truth_table.verticalHeader().setDefaultSectionSize(24)
-        self.truth_table.setHorizontalHeaderLabels(["A", "B", "Y"])
 
         # center header text + bold table font
         self.truth_table.horizontalHeader().setDefaultAlignment(Qt.AlignCenter)
@@ -409,12 +494,14 @@ class DCTGui(QMainWindow):
         self.results_group = results_group
         results_layout = QVBoxLayout()
 
-        self.results_table = QTableWidget(0, 0)
+        self.results_model = VectorTableModel(self)
+        self.results_table = QTableView()
+        self.results_table.setModel(self.results_model)
         self.results_table.setSizePolicy(QSizePolicy.Expanding, QSizePolicy.Fixed)
         self.results_table.setFixedHeight(170)
         self.results_table.verticalHeader().setVisible(False)
-        self.results_table.setEditTriggers(QTableWidget.NoEditTriggers)
-        self.results_table.setSelectionMode(QTableWidget.NoSelection)
+        self.results_table.setEditTriggers(QTableView.NoEditTriggers)
+        self.results_table.setSelectionMode(QTableView.NoSelection)
         self.results_table.horizontalHeader().setSectionResizeMode(QHeaderView.Stretch)
         self.results_table.horizontalHeader().setDefaultSectionSize(60)
         self.results_table.horizontalHeader().setDefaultAlignment(Qt.AlignCenter)
@@ -423,6 +510,8 @@ class DCTGui(QMainWindow):
         self.results_table.setFont(rf)
 
         results_layout.addWidget(self.results_table)
+        self.verdict_label = QLabel("Host check: —")
+        results_layout.addWidget(self.verdict_label)
         results_group.setLayout(results_layout)
         results_group.setSizePolicy(QSizePolicy.Expanding, QSizePolicy.Fixed)
         results_group.setMaximumHeight(230)
@@ -543,6 +632,30 @@ class DCTGui(QMainWindow):
             QPushButton:hover { background-color: #1976D2; }
         """)
 
+        # Transfer-curve / settling analysis of the collected samples
+        self.opamp_analyze_button = QPushButton("Analyze")
+        self.opamp_analyze_button.setFixedHeight(40)
+        self.opamp_analyze_button.setStyleSheet("""
+            QPushButton {
+                font-size: 14px;
+                background-color: #9C27B0;
+                color: white;
+                border-radius: 5px;
+            }
+            QPushButton:hover { background-color: #7B1FA2; }
+        """)
+        self.opamp_export_button = QPushButton("Export Analysis…")
+        self.opamp_export_button.setFixedHeight(40)
+        self.opamp_export_button.setStyleSheet("""
+            QPushButton {
+                font-size: 14px;
+                background-color: #607D8B;
+                color: white;
+                border-radius: 5px;
+            }
+            QPushButton:hover { background-color: #455A64; }
+        """)
+
         # Detect for opamp page (does not modify logic truth tables)
         self.opamp_detect_button = QPushButton("Detect Chip")
         self.opamp_detect_button.setFixedHeight(40)
@@ -560,13 +673,15 @@ class DCTGui(QMainWindow):
         opamp_controls_layout.addWidget(self.opamp_stop_button)
         opamp_controls_layout.addWidget(self.opamp_reset_button)
         opamp_controls_layout.addWidget(self.opamp_detect_button)
+        opamp_controls_layout.addWidget(self.opamp_analyze_button)
+        opamp_controls_layout.addWidget(self.opamp_export_button)
         opamp_controls_group.setLayout(opamp_controls_layout)
 
         waveform_group = QGroupBox("Waveform Display")
         waveform_layout = QVBoxLayout()
         # NEW: actual plot
-        self.waveform = WaveformWidget(max_points=320)
-        self.waveform.set_range(0.0, 5.0)  # adjust if your board is 3.3V
+        self.waveform = WaveformWidget(max_points=200_000)
+        self.waveform.set_range(0.0, self.OPAMP_VREF)
         waveform_layout.addWidget(self.waveform)
 
         # Keep your live numeric readout
@@ -582,9 +697,13 @@ class DCTGui(QMainWindow):
         self.max_voltage_label = QLabel("Max Voltage: N/A")
         self.min_voltage_label = QLabel("Min Voltage: N/A")
         self.avg_voltage_label = QLabel("Average Voltage: N/A")
+        self.spread_voltage_label = QLabel("Std Dev: N/A    RMS: N/A")
+        self.percentile_voltage_label = QLabel("P1 / P50 / P99: N/A")
         metrics_layout.addWidget(self.max_voltage_label)
         metrics_layout.addWidget(self.min_voltage_label)
         metrics_layout.addWidget(self.avg_voltage_label)
+        metrics_layout.addWidget(self.spread_voltage_label)
+        metrics_layout.addWidget(self.percentile_voltage_label)
         metrics_group.setLayout(metrics_layout)
 
         opamp_results_group = QGroupBox("Test Results & Advice")
@@ -628,7 +747,9 @@ class DCTGui(QMainWindow):
         self.detect_button.clicked.connect(self.detect_chip)
         self.reset_test_button.clicked.connect(self._on_reset)
         self.opamp_start_button.clicked.connect(self._on_opamp_start)
-        self.opamp_stop_button.clicked.connect(self._on_stop)
+        self.opamp_stop_button.clicked.connect(self._on_opamp_stop)
+        self.opamp_analyze_button.clicked.connect(lambda: self._analyze_opamp())
+        self.opamp_export_button.clicked.connect(self.export_opamp_analysis)
         self.opamp_reset_button.clicked.connect(self._on_reset)
         # op-amp page detect should call detect_opamp (doesn't alter logic tables)
         self.opamp_detect_button.clicked.connect(self.detect_opamp)
@@ -636,9 +757,7 @@ class DCTGui(QMainWindow):
         # (selector removed — GUI is auto-driven by detection)
 
         # Initialize both tables to NAND by default
-        self._fill_truth_table_nand()
-        self._setup_results_table_nand()
-        self._clear_results_y()
+        self._load_builtin_layout("nand")
 
     # ---------- Serial bar ----------
     def _build_serial_bar(self):
@@ -692,20 +811,24 @@ class DCTGui(QMainWindow):
                 QMessageBox.warning(self, "Serial", "No port selected.")
                 return
 
-            self.test_runner.connect(port=port, baudrate=9600, timeout=0.05)
+            self.test_runner.connect(port=port, baudrate=9600, timeout=0.05,
+                                     binary=self.binary_action.isChecked())
+            self._start_pipeline()
+            proto = "binary" if self.test_runner.binary else "JSON"
             self.connect_btn.setText("Disconnect")
-            self.status_label.setText(f"Connected: {port}")
-            self._log(f"[SYS] Connected to {port}")
+            self.status_label.setText(f"Connected: {port} ({proto})")
+            self._log(f"[SYS] Connected to {port} ({proto} stream)")
 
-            # Prime panels
-            self.test_runner.send_command("status")
+            # Prime panels (pipelined; replies are matched to their requests).
+            # The connect handshake already queued a status reply when the MCU answered.
+            if not self.test_runner.ready:
+                self._request("status")
             # the connect-time detect should target the logic page
-            self._last_detect_target = "logic"
-            self.test_runner.send_command("detect")
+            self._request("detect", callback=lambda fut: self._on_detect_reply(fut, "logic"))
 
             # Default to NAND on connect (GUI state + MCU)
             self._set_current_test_kind("nand")
-            self._send("select_nand")
+            self._request_ack("select_nand")
         except Exception as e:
             QMessageBox.warning(self, "Serial", f"Connection failed:\n{e}")
 
@@ -713,14 +836,8 @@ class DCTGui(QMainWindow):
     def _on_logic_selection_changed(self, idx: int):
         try:
             _, select_cmd, _ = self.logic_tests[idx]
-            self._send(select_cmd)
-            if idx == 0:
-                self._fill_truth_table_nand()
-                self._setup_results_table_nand()
-            else:
-                self._fill_truth_table_inv()
-                self._setup_results_table_inv()
-            self._clear_results_y()
+            self._request_ack(select_cmd)
+            self._load_builtin_layout("nand" if idx == 0 else "inv")
         except Exception:
             pass
 
@@ -728,25 +845,98 @@ class DCTGui(QMainWindow):
         self._clear_results_y()   # blank previous results
         if getattr(self, "loaded_test_available", False):
             # run the test definition previously uploaded to the MCU
-            self._send("start_loaded")
+            self._request_ack("start_loaded", timeout=self.run_timeout)
         else:
             # fallback to built-in tests (back-compat)
             start_cmd = "start_nand" if self._current_kind() == "nand" else "start_inverter"
-            self._send(start_cmd)
+            self._request_ack(start_cmd, timeout=self.run_timeout)
 
     def _on_opamp_start(self):
         self._reset_opamp_stats()
         # ensure the waveform is cleared right before the run
         if hasattr(self, "waveform"):
             self.waveform.clear()
-        self._send("start_opamp")
+        self._request_ack("start_opamp")
 
     def _on_stop(self):
-        self._send("stop")
+        self._request_ack("stop")
 
     def _on_reset(self):
         self._send("reset")
 
+    def _on_opamp_stop(self):
+        # analyze once the MCU confirmed the stop, so samples sent before it are included
+        if self._request("stop", callback=self._on_opamp_stopped) is None:
+            self._analyze_opamp()
+
+    def _on_opamp_stopped(self, fut):
+        if not fut.cancelled() and fut.exception() is not None:
+            self._log(f"[ERR] stop not acknowledged: {fut.exception()}")
+        self._analyze_opamp()
+
+    # ---------- Op-amp analysis ----------
+    def _analyze_opamp(self, then=None):
+        """
+        Fit the transfer curve and settling of everything collected so far.
+
+        When a sample recording holds more history than the in-memory window,
+        the writer thread first puts its unwritten samples on disk and the
+        analysis runs when it reports back (samples_flushed), so the GUI never
+        waits on the disk. then(result) is called once the result is ready.
+        """
+        self.presenter.flush()  # samples waiting for the next frame count too
+        if self.opamp_stats.voltage.count == 0:
+            self.opamp_results_label.setText("No samples yet: start a test first.")
+            return
+        t_us, duty, voltage = self.opamp_series.arrays()
+        writer = self.sample_writer
+        if writer is not None and writer.count > len(voltage):
+            self._analysis_waiters.append(then)
+            if len(self._analysis_waiters) > 1:
+                return  # a flush is already on its way
+            self._analysis_path = writer.path
+            self.opamp_results_label.setText("Analyzing recorded samples…")
+            if writer.flush_async(self.serial_signals.samples_flushed.emit):
+                return
+            self._analysis_waiters = []
+        result = self._show_opamp_analysis(t_us, duty, voltage)
+        if then is not None:
+            then(result)
+
+    def _on_samples_flushed(self):
+        waiters, self._analysis_waiters = self._analysis_waiters, []
+        with SampleStore(self._analysis_path) as store:
+            tail = np.array(store.records[-self.ANALYSIS_WINDOW:])  # copied out of the map
+        result = self._show_opamp_analysis(tail["t_us"], tail["duty"], tail["voltage"])
+        for then in waiters:
+            if then is not None:
+                then(result)
+
+    def _show_opamp_analysis(self, t_us, duty, voltage):
+        curve = self.opamp_stats.by_duty.table()
+        result = opamp_analysis.analyze(duty, voltage, t_us, vref=self.OPAMP_VREF,
+                                        curve_source=(curve["key"], curve["mean"], curve["count"]))
+        self.opamp_result = result
+        self.opamp_results_label.setText(opamp_analysis.format_report(result))
+        self._log(f"[OPAMP] {result.verdict}: " + ("; ".join(result.reasons) or "within limits"))
+        return result
+
+    def export_opamp_analysis(self):
+        self._analyze_opamp(then=self._export_opamp_result)
+
+    def _export_opamp_result(self, result):
+        path, _ = QFileDialog.getSaveFileName(
+            self, "Export Op-amp Analysis", "opamp_analysis.json",
+            "JSON (*.json);; CSV (*.csv)"
+        )
+        if not path:
+            return
+        try:
+            opamp_analysis.export(path, result, self.opamp_stats.by_duty.table())
+            self._log(f"[SYS] Op-amp analysis exported to {path}")
+        except OSError as e:
+            QMessageBox.warning(self, "Export", f"Cannot write:\n{e}")
+
     def _send(self, cmd: str):
         if not self.test_runner.is_connected():
             QMessageBox.warning(self, "Connection Error", "Not connected to the device.")
@@ -755,285 +945,357 @@ class DCTGui(QMainWindow):
         ts = datetime.now().strftime("[%H:%M:%S]")  # <-- fixed closing bracket
         self.log_output.append(f"{ts} → {cmd}" if ok else f"{ts} [ERR] failed to send: {cmd}")
 
-    def _send_test_definition(self, data: dict):
+    def _request(self, cmd: str, callback=None, timeout: Optional[float] = None):
+        """Send a correlated request; its Future fails after timeout (default request_timeout)."""
+        if not self.test_runner.is_connected():
+            QMessageBox.warning(self, "Connection Error", "Not connected to the device.")
+            return None
+        timeout = self.request_timeout if timeout is None else timeout
+        fut = self.test_runner.request(cmd, timeout=timeout, callback=callback)
+        ts = datetime.now().strftime("[%H:%M:%S]")
+        self.log_output.append(f"{ts} → {command_word(cmd)}" if cmd.lstrip().startswith("{") else f"{ts} → {cmd}")
+        # deadline check on the GUI thread so timeout callbacks run here too
+        QTimer.singleShot(int(timeout * 1000) + 20, self.test_runner.expire_requests)
+        return fut
+
+    def _request_ack(self, cmd: str, timeout: Optional[float] = None):
+        """Request whose reply only confirms the command; failures are logged."""
+        return self._request(cmd, callback=lambda fut: self._on_ack(fut, cmd), timeout=timeout)
+
+    def _on_ack(self, fut, cmd: str):
+        if fut.cancelled():
+            return
+        err = fut.exception()
+        if err is not None:
+            self._log(f"[ERR] {command_word(cmd)} not acknowledged: {err}")
+
+    def _send_test_definition(self, data: dict, index: Optional[VectorIndex] = None):
         """Normalize a loaded YAML test into MCU JSON and send it."""
+        rows = data.get("rows", [])
+        if isinstance(data.get("outputs"), dict) and index is not None:
+            # expression outputs: the MCU gets the generated rows
+            names = index.inputs + index.outputs
+            rows = [dict(zip(names, r)) for r in index.expected.tolist()]
         msg = {
             "cmd": "define_test",
             "mode": data.get("mode", "truth_table"),
             "chip": data.get("chip"),
             "name": data.get("name"),
             "pins": data.get("pins", {}),
-            "rows": data.get("rows", []),
+            "rows": rows,
             "settle_ms": int(data.get("settle_ms", 5)),
         }
-        # send as a single JSON command string
-        self.test_runner.send_command(json.dumps(msg))
-        # mark that Start should use the loaded test
+        if not self.test_runner.is_connected():
+            return False
+        # sent as a single JSON command string; Start uses it once the MCU acknowledged
+        self.loaded_test_available = False
+        self._request(json.dumps(msg), callback=self._on_definition_ack)
+        return True
+
+    def _on_definition_ack(self, fut):
+        if fut.cancelled():
+            return
+        err = fut.exception()
+        if err is not None:
+            self._log(f"[ERR] define_test not acknowledged: {err}")
+            return
         self.loaded_test_available = True
+        self._log(f"[SYS] MCU accepted the test definition ({fut.result().get('rows', '?')} rows).")
+
+    # ---------- Serial draining & routing ----------
+    def _start_pipeline(self):
+        """Run the reader with decoding on its thread; the GUI only dispatches events."""
+        self.pipeline.clear()
+        # lines that arrived during the connect handshake are still in the runner's inbox
+        self.pipeline.feed(self.test_runner.receive_lines(max_lines=None))
+        self.test_runner.start_reader(sink=self.pipeline.feed)
 
-    # ---------- Serial polling & routing ----------
     def _drain_serial(self):
-        if not self.test_runner or not self.test_runner.is_connected():
+        if not self.test_runner:
             return
-        for _ in range(50):
-            line = self.test_runner.receive_response()
-            if not line:
-                break
-            self._handle_serial_line(line)
+        batch = self.pipeline.take(self.DRAIN_BATCH)
+        for evt in batch:
+            try:
+                self.dispatcher.dispatch(evt)
+            except Exception as e:
+                self._log(f"[ERR] {e!r} while handling: {evt}")
+        drops = (self.pipeline.dropped, self.pipeline.dropped_lines)
+        if drops != self._reported_drops:
+            samples = drops[0] - self._reported_drops[0]
+            lines = drops[1] - self._reported_drops[1]
+            skipped = []
+            if samples:
+                skipped.append(f"{samples} pwm samples")
+            if lines:
+                skipped.append(f"{lines} log lines")
+            self._log(f"[SYS] Display overloaded: skipped {' and '.join(skipped)}")
+            self._reported_drops = drops
+        if self.test_runner.write_errors != self._reported_write_errors:
+            self._log(f"[ERR] Serial write failed, commands lost: {self.test_runner.write_error}")
+            self._reported_write_errors = self.test_runner.write_errors
+        if len(batch) >= self.DRAIN_BATCH:
+            # more queued: continue on the next event-loop pass so the UI stays live
+            QTimer.singleShot(0, self._drain_serial)
+        elif self.test_runner.last_error is not None and not self._reconnecting:
+            self._on_serial_lost(self.test_runner.last_error)
+
+    def _on_serial_lost(self, err):
+        # A short glitch (USB hiccup) usually leaves the board running: try a fast reconnect.
+        # reconnect() may wait for a boot handshake, so it runs off the GUI thread, on a
+        # separate runner: closing this one here cancels pending requests (their
+        # callbacks touch widgets) on the GUI thread, and nothing else shares it meanwhile.
+        self._reconnecting = True
+        self.status_label.setText("Reconnecting…")
+        runner = self.test_runner
+        runner.close_connection()
+        runner.last_error = None  # reported; the outcome comes back through reconnected
+        probe = TestRunner(port=runner.port, baudrate=runner.baudrate, timeout=runner.timeout)
+        probe.binary = runner.binary  # reconnect() keeps the negotiated mode
+
+        def attempt():
+            try:
+                probe.reconnect()
+            except Exception as e:
+                self.serial_signals.reconnected.emit(err, e, probe)
+            else:
+                self.serial_signals.reconnected.emit(err, None, probe)
 
-    def _handle_serial_line(self, line: str):
-        # Try JSON events first
-        try:
-            data = json.loads(line)
-            evt = data.get("event")
-            if evt == "status":
-                m = data.get("menuIndex")
-                if isinstance(m, int) and m in (0, 1):
-                    self._set_current_test_kind("nand" if m == 0 else "inv")
-                    # self.logic_selector.blockSignals(True)
-                    # self.logic_selector.setCurrentIndex(m)
-                    # self.logic_selector.blockSignals(False)
-
-            elif evt == "detect":
-                chip = data.get("chip", "UNKNOWN")
-                target = getattr(self, "_last_detect_target", None)
-
-                # Update only the page that initiated the detect.
-                if target == "opamp":
-                    if hasattr(self, "opamp_detection_label"):
-                        self.opamp_detection_label.setText(chip)
-                else:  # default/logic target
-                    if hasattr(self, "detection_label"):
-                        self.detection_label.setText(chip)
-                    # only apply selection/patch tables when logic requested the detect
-                    try:
-                        self._apply_detected_chip(chip)
-                    except Exception:
-                        pass
-
-                # clear the last-detect target after handling
-                self._last_detect_target = None
-                self._log(f"[DETECT] {chip} (from {target})")
-
-
-            elif evt == "vector":
-                # Live update a single row in the Results table (quick path)
-                try:
-                    if "B" in data:  # NAND: A,B,Y
-                        a = int(data.get("A", 0))
-                        b = int(data.get("B", 0))
-                        y = int(data.get("Y", 0))
-                        self._set_results_y(a, b, y)
-                    else:            # Inverter: A,Y
-                        a = int(data.get("A", 0))
-                        y = int(data.get("Y", 0))
-                        self._set_results_y(a, None, y)
-                except Exception:
-                    pass
-                return
+        threading.Thread(target=attempt, name="serial-reconnect", daemon=True).start()
 
-            elif evt in ("row", "sample", "probe"):
-                # per-vector JSON results for alternate event names
-                a = data.get("A", None)
-                b = data.get("B", None)
-                y = data.get("Y", data.get("output", None))
-                inputs = data.get("inputs")
-                if a is None and isinstance(inputs, list):
-                    if len(inputs) >= 1:
-                        a = inputs[0]
-                    if len(inputs) >= 2:
-                        b = inputs[1]
-                if a is not None and y is not None:
-                    try:
-                        a = int(a)
-                        y = int(y)
-                        if self._current_kind() == 'inv':
-                            self._set_results_y(a, None, y)
-                        else:
-                            b = 0 if b is None else int(b)
-                            self._set_results_y(a, b, y)
-                    except Exception:
-                        pass
-                self._log(f"[VECTOR] A={a} B={b} -> Y={y}")
-
-            elif evt == "summary":
-                test = data.get("test", "?")
-                passes = data.get("passes", 0)
-                fails = data.get("fails", 0)
-                rate = data.get("pass_rate", 0.0)
-
-                if hasattr(self, "results_group"):
-                    self.results_group.setTitle(f"Test Results & Advice — {test.upper()} • {passes} pass / {fails} fail ({rate:.1f}%)")
-
-                rows = data.get("truth_table") or data.get("observed") or data.get("rows")
-                if isinstance(rows, list) and rows:
-                    if all(isinstance(t, (list, tuple)) for t in rows):
-                        if len(rows[0]) == 3:  # NAND
-                            for r, (a, b, y) in enumerate(rows):
-                                self.results_table.setItem(r, 2, self._make_center_item(str(y)))
-                        elif len(rows[0]) == 2:  # INV
-                            for r, (a, y) in enumerate(rows):
-                                self.results_table.setItem(r, 1, self._make_center_item(str(y)))
-                    elif all(isinstance(t, dict) for t in rows):
-                        sample = rows[0]
-                        if "Y" in sample:
-                            if "B" in sample:  # NAND
-                                for r, row in enumerate(rows):
-                                    self.results_table.setItem(r, 2, self._make_center_item(str(row.get("Y"))))
-                            else:              # INV
-                                for r, row in enumerate(rows):
-                                    self.results_table.setItem(r, 1, self._make_center_item(str(row.get("Y"))))
-                        elif "output" in sample:
-                            if isinstance(sample.get("inputs"), (list, tuple)) and len(sample["inputs"]) == 2:
-                                for r, row in enumerate(rows):
-                                    self.results_table.setItem(r, 2, self._make_center_item(str(row.get("output"))))
-                            else:
-                                for r, row in enumerate(rows):
-                                    self.results_table.setItem(r, 1, self._make_center_item(str(row.get("output"))))
-
-                self._log(f"[SUMMARY] {test}: {passes} pass / {fails} fail ({rate:.1f}%)")
-
-            elif evt == "health":
-                vmin = data.get("min_v", None)
-                vmax = data.get("max_v", None)
-                vavg = data.get("avg_v", None)
-                if vmin is not None:
-                    self.min_voltage_label.setText(f"Min Voltage: {float(vmin):.2f} V")
-                if vmax is not None:
-                    self.max_voltage_label.setText(f"Max Voltage: {float(vmax):.2f} V")
-                if vavg is not None:
-                    self.avg_voltage_label.setText(f"Average Voltage: {float(vavg):.2f} V")
-                self._log(f"[HEALTH] min={vmin}V max={vmax}V avg={vavg}")
-
-            elif evt == "pwm":
-                # Live PWM sample: update readout, plot and running stats
-                duty = data.get("duty")
-                v = data.get("voltage")
-                if duty is not None and v is not None:
-                    try:
-                        duty_i = int(duty)
-                        v_f = float(v)
-                        # live readout
-                        if hasattr(self, "pwm_readout_label"):
-                            self.pwm_readout_label.setText(f"Duty: {duty_i:3d}    Voltage: {v_f:.2f} V")
-                        # plot
-                        if hasattr(self, "waveform"):
-                            self.waveform.append(v_f)
-                        # stats
-                        self._opamp_count += 1
-                        self._opamp_sum += v_f
-                        self._opamp_min = v_f if self._opamp_min is None else min(self._opamp_min, v_f)
-                        self._opamp_max = v_f if self._opamp_max is None else max(self._opamp_max, v_f)
-                        self.min_voltage_label.setText(f"Min Voltage: {self._opamp_min:.2f} V")
-                        self.max_voltage_label.setText(f"Max Voltage: {self._opamp_max:.2f} V")
-                        avg = self._opamp_sum / max(self._opamp_count, 1)
-                        self.avg_voltage_label.setText(f"Average Voltage: {avg:.2f} V")
-                    except Exception:
-                        pass
+    def _on_reconnect_done(self, err, failure, probe):
+        self._reconnecting = False
+        if self.test_runner.is_connected():
+            probe.close_connection()  # the user connected again meanwhile
+            return
+        if failure is None and probe.is_connected():
+            self.test_runner.adopt(probe)
+            self._start_pipeline()
+            proto = "binary" if self.test_runner.binary else "JSON"
+            self.status_label.setText(f"Connected: {self.test_runner.port} ({proto})")
+            self._log(f"[SYS] Serial error ({err}); reconnected to {self.test_runner.port}")
+            return
+        self.test_runner.close_connection()
+        self.connect_btn.setText("Connect")
+        self.status_label.setText("Disconnected")
+        self._log(f"[ERR] Serial connection lost: {err}")
+
+    def _build_dispatcher(self) -> EventDispatcher:
+        """Event type → handler table for everything the MCU sends."""
+        d = EventDispatcher()
+        d.register(StatusEvent, self._on_status_event)
+        d.register(DetectEvent, self._on_detect_event)
+        d.register(VectorEvent, self._on_vector_event)
+        d.register(SummaryEvent, self._on_summary_event)
+        d.register(HealthEvent, self._on_health_event)
+        d.register(PwmEvent, self._on_pwm_event)
+        d.register(PwmBlock, self._on_pwm_block)
+        d.register(OtherEvent, self._on_other_event)
+        d.register(TextLine, self._on_text_line)
+        return d
+
+    def _handle_serial_line(self, line: Union[str, dict]):
+        # binary-mode records arrive already decoded as dicts
+        try:
+            self.dispatcher.feed(line)
+        except Exception as e:
+            self._log(f"[ERR] {e!r} while handling: {line}")
+
+    def _on_status_event(self, evt: StatusEvent):
+        self.test_runner.resolve_reply(evt.raw)
+        m = evt.menu_index
+        if m in (0, 1):
+            self._set_current_test_kind("nand" if m == 0 else "inv")
+
+    def _on_detect_event(self, evt: DetectEvent):
+        # requested detects are routed by their request callback; unsolicited → logic
+        if not self.test_runner.resolve_reply(evt.raw):
+            self._show_detected_chip(evt.chip, "logic")
+
+    def _on_vector_event(self, evt: VectorEvent):
+        # Live update of the matching Results row (O(1) lookup, any pin count / gate)
+        cells = self.vector_index.place(evt.pins, evt.gate) if self.vector_index is not None else []
+        for row, col, level in cells:
+            self._queue_result(row, col, level)
+        if cells:
+            self.comparator.observe(evt.pins, evt.gate)
+            self.presenter.set("verdict", self._show_verdict)
+        if not cells or evt.source not in ("vector", "text"):
+            gate = "" if evt.gate is None else f" (gate {evt.gate})"
+            self._log("[VECTOR] " + " ".join(f"{k}={v}" for k, v in evt.pins.items()) + gate)
+
+    def _on_summary_event(self, evt: SummaryEvent):
+        self.test_runner.resolve_reply(evt.raw)
+        test, passes, fails, rate = evt.test, evt.passes, evt.fails, evt.pass_rate
+
+        if hasattr(self, "results_group"):
+            self.results_group.setTitle(f"Test Results & Advice — {test.upper()} • {passes} pass / {fails} fail ({rate:.1f}%)")
+
+        rows = evt.rows
+        if rows and self.vector_index is not None:
+            self._place_summary_rows(rows)
+
+        self._log(f"[SUMMARY] {test}: {passes} pass / {fails} fail ({rate:.1f}%)")
+        if self.comparator is not None:
+            report = self.comparator.report()
+            self._log(f"[CHECK] host: {report.passed}/{report.checked} rows pass" +
+                      "".join(f"; gate {s.gate + 1} {s.pin} {s.kind} (rows {s.rows})" for s in report.signatures))
+            self.presenter.set("verdict", self._show_verdict)
+
+    def _place_summary_rows(self, rows: list) -> None:
+        """Observed rows as [A, B, Y] lists, pin dicts or {inputs: [...], output: y}."""
+        index = self.vector_index
+        names = index.inputs + index.outputs
+        for item in rows:
+            gate = None
+            if isinstance(item, (list, tuple)):
+                pins = dict(zip(names, item))
+            elif isinstance(item, dict):
+                pins = item
+                gate = item.get("gate")
+                if isinstance(item.get("inputs"), (list, tuple)):
+                    pins = dict(zip(index.inputs, item["inputs"]))
+                    if index.outputs and "output" in item:
+                        pins[index.outputs[0]] = item["output"]
             else:
-                self._log(line)
+                continue
+            cells = index.place(pins, gate)
+            for row, col, level in cells:
+                self._queue_result(row, col, level)
+            if cells:
+                self.comparator.observe(pins, gate)
+
+    def _on_health_event(self, evt: HealthEvent):
+        self.opamp_stats.add_health(evt.min_v, evt.max_v, evt.avg_v)
+        self.presenter.set("voltage_labels", self._show_opamp_stats)
+        self._log(f"[HEALTH] min={evt.min_v}V max={evt.max_v}V avg={evt.avg_v}")
+
+    def _on_pwm_event(self, evt: PwmEvent):
+        # Live PWM sample: running stats now, widgets on the next frame
+        self.opamp_stats.add(evt.duty, evt.voltage)
+        self.opamp_series.extend((evt.duty,), (evt.voltage,), (evt.t_us,))
+        if hasattr(self, "waveform"):
+            self.presenter.append("waveform", self.waveform.extend, evt.voltage)
+        self.presenter.set("pwm_readout", self._show_pwm_readout)
+        self.presenter.set("voltage_labels", self._show_opamp_stats)
+
+    def _on_pwm_block(self, evt: PwmBlock):
+        # merged samples from the pipeline: one stats update and one plot batch
+        self.opamp_stats.extend(evt.duty, evt.voltage)
+        self.opamp_series.extend(evt.duty, evt.voltage, evt.t_us)
+        if hasattr(self, "waveform"):
+            self.presenter.extend("waveform", self.waveform.extend, evt.voltage)
+        self.presenter.set("pwm_readout", self._show_pwm_readout)
+        self.presenter.set("voltage_labels", self._show_opamp_stats)
+
+    # ---------- Frame presentation ----------
+    def _present_frame(self):
+        try:
+            self.presenter.flush()
+        except Exception as e:
+            self.log_output.append(f"[ERR] {e!r} while updating the display")
+
+    def _show_pwm_readout(self):
+        if hasattr(self, "pwm_readout_label") and self.opamp_stats.last is not None:
+            duty_i, v_f = self.opamp_stats.last
+            self.pwm_readout_label.setText(f"Duty: {duty_i:3d}    Voltage: {v_f:.2f} V")
+
+    def _show_opamp_stats(self):
+        stats = self.opamp_stats
+        v = stats.voltage
+        if v.count:
+            lo, hi, avg = v.min, v.max, v.mean
+        else:
+            # no streamed samples: fall back to what the device reports
+            lo, hi = stats.health_min, stats.health_max
+            avg = stats.health_avg.mean if stats.health_avg.count else None
+        if lo is not None:
+            self.min_voltage_label.setText(f"Min Voltage: {lo:.2f} V")
+        if hi is not None:
+            self.max_voltage_label.setText(f"Max Voltage: {hi:.2f} V")
+        if avg is not None:
+            self.avg_voltage_label.setText(f"Average Voltage: {avg:.2f} V")
+        if v.count:
+            self.spread_voltage_label.setText(f"Std Dev: {v.std * 1000:.1f} mV    RMS: {v.rms:.3f} V")
+            p1, p50, p99 = (stats.sketch.quantile(q) for q in (0.01, 0.5, 0.99))
+            self.percentile_voltage_label.setText(f"P1 / P50 / P99: {p1:.3f} / {p50:.3f} / {p99:.3f} V")
+
+    def _show_verdict(self):
+        # once per frame; the comparator keeps its mismatch state up to date as vectors arrive
+        cmp = self.comparator
+        if cmp is None:
             return
+        bad = cmp.mismatch()
+        text = f"Host check: {cmp.checked - cmp.failed}/{cmp.checked} rows pass"
+        if not cmp.failed:
+            self.verdict_label.setText(text)
+            self.results_model.set_highlight(None)
+            return
+        text += " — " + ", ".join(f"{s.pin}[{s.gate + 1}] {s.kind}" for s in cmp.signatures()[:4])
+        self.verdict_label.setText(text)
+        # failing output cells, laid out like the results table (see VectorIndex.result_column)
+        n_in = len(self.vector_index.inputs)
+        mask = np.zeros(self.results_model.values.shape, dtype=bool)
+        mask[:, n_in:] = bad.reshape(len(bad), -1)
+        self.results_model.set_highlight(mask)
 
-        except Exception:
-            # Not JSON → try to parse text vector lines; else just log
-            if self._try_parse_vector_text_line(line):
-                return
-            self._log(line)
+    def _queue_result(self, row: int, col: int, value) -> None:
+        # latest value per cell wins within a frame
+        self.presenter.set(("result", row, col), self._set_result_cell, row, col, str(value))
+
+    def _set_result_cell(self, row: int, col: int, text: str) -> None:
+        self.results_model.set_cell(row, col, text)
+
+    def _on_other_event(self, evt: OtherEvent):
+        if not self.test_runner.resolve_reply(evt.raw):
+            self._log(json.dumps(evt.raw))
+
+    def _on_text_line(self, evt: TextLine):
+        self._log(evt.text)
 
     # ---------- Truth table helpers ----------
-    def _truth_table_nand_text(self) -> str:
-        lines = [
-            "A B | Y = !(A&B)",
-            "0 0 | 1",
-            "0 1 | 1",
-            "1 0 | 1",
-            "1 1 | 0",
-        ]
+    def _truth_table_text(self, kind: str) -> str:
+        """Plain-text truth table of a built-in test, e.g. 'A B | Y = !(A & B)'."""
+        definition = BUILTIN_TESTS[kind]
+        index = VectorIndex.from_definition(definition)
+        formulas = ", ".join(f"{name} = {expr}" for name, expr in definition["outputs"].items())
+        lines = [" ".join(index.inputs) + " | " + formulas]
+        n_in = len(index.inputs)
+        for row in index.expected.tolist():
+            lines.append(" ".join(map(str, row[:n_in])) + " | " + " ".join(map(str, row[n_in:])))
         return "\n".join(lines)
 
-    def _truth_table_inverter_text(self) -> str:
-        lines = [
-            "A | Y = !A",
-            "0 | 1",
-            "1 | 0",
-        ]
-        return "\n".join(lines)
+    # --- Table layouts (expected vectors + results, driven by a VectorIndex) ---
+    def _load_layout(self, index: VectorIndex) -> None:
+        """Show index's expected vectors and a blank results table for the same rows."""
+        self.presenter.flush()  # pending cell updates belong to the old layout
+        self.vector_index = index
+        self.comparator = VectorComparator(index)
+        self.verdict_label.setText("Host check: —")
+        self.truth_model.set_table(list(index.inputs) + list(index.outputs), index.expected)
+        self.results_model.set_table(index.headers(), index.results_layout())
 
-    def _make_center_item(self, text: str) -> QTableWidgetItem:
-        it = QTableWidgetItem(text)
-        it.setTextAlignment(Qt.AlignCenter)
-        return it
-
-    # --- Expected table fillers (center cells) ---
-    def _fill_truth_table_nand(self):
-        data = [("0", "0", "1"), ("0", "1", "1"), ("1", "0", "1"), ("1", "1", "0")]
-        self.truth_table.setRowCount(len(data))
-        self.truth_table.setColumnCount(3)
-        self.truth_table.setHorizontalHeaderLabels(["A", "B", "Y"])
-        for r, (a, b, y) in enumerate(data):
-            self.truth_table.setItem(r, 0, self._make_center_item(a))
-            self.truth_table.setItem(r, 1, self._make_center_item(b))
-            self.truth_table.setItem(r, 2, self._make_center_item(y))
-
-    def _fill_truth_table_inv(self):
-        data = [("0", "1"), ("1", "0")]
-        self.truth_table.setRowCount(len(data))
-        self.truth_table.setColumnCount(2)
-        self.truth_table.setHorizontalHeaderLabels(["A", "Y"])
-        for r, (a, y) in enumerate(data):
-            self.truth_table.setItem(r, 0, self._make_center_item(a))
-            self.truth_table.setItem(r, 1, self._make_center_item(y))
-
-    # --- Results table setup (same centered format, Y blank initially) ---
-    def _setup_results_table_nand(self):
-        rows = [("0", "0", ""), ("0", "1", ""), ("1", "0", ""), ("1", "1", "")]
-        self.results_table.setRowCount(len(rows))
-        self.results_table.setColumnCount(3)
-        self.results_table.setHorizontalHeaderLabels(["A", "B", "Y"])
-        for r, (a, b, y) in enumerate(rows):
-            self.results_table.setItem(r, 0, self._make_center_item(a))
-            self.results_table.setItem(r, 1, self._make_center_item(b))
-            self.results_table.setItem(r, 2, self._make_center_item(y))
-
-    def _setup_results_table_inv(self):
-        rows = [("0", ""), ("1", "")]
-        self.results_table.setRowCount(len(rows))
-        self.results_table.setColumnCount(2)
-        self.results_table.setHorizontalHeaderLabels(["A", "Y"])
-        for r, (a, y) in enumerate(rows):
-            self.results_table.setItem(r, 0, self._make_center_item(a))
-            self.results_table.setItem(r, 1, self._make_center_item(y))
+    def _load_builtin_layout(self, kind: str) -> None:
+        self._load_layout(VectorIndex.from_definition(BUILTIN_TESTS[kind]))
 
     def _clear_truth_tables(self):
-        self.truth_table.setRowCount(0)
-        self.truth_table.setColumnCount(0)
-        self.results_table.setRowCount(0)
-        self.results_table.setColumnCount(0)
+        self.presenter.flush()
+        self.vector_index = None
+        self.comparator = None
+        self.truth_model.clear()
+        self.results_model.clear()
 
     def _current_kind(self) -> str:
         return getattr(self, "current_test_kind", "nand")
 
-    def _row_index_for_inputs(self, a: int, b: Optional[int] = None) -> Optional[int]:
-        if self._current_kind() == 'nand':
-            order = [(0, 0), (0, 1), (1, 0), (1, 1)]
-            try:
-                return order.index((a, b))
-            except ValueError:
-                return None
-        else:
-            order = [0, 1]  # inverter uses only A
-            try:
-                return order.index(a)
-            except ValueError:
-                return None
-
     def _clear_results_y(self) -> None:
-        if self._current_kind() == 'nand':
-            for r in range(4):
-                self.results_table.setItem(r, 2, self._make_center_item(""))
-        else:
-            for r in range(2):
-                self.results_table.setItem(r, 1, self._make_center_item(""))
+        self.presenter.flush()
+        if self.vector_index is not None:
+            for col in self.vector_index.output_columns():
+                self.results_model.clear_column(col)
+        if self.comparator is not None:
+            self.comparator.reset()
+        self.results_model.set_highlight(None)
+        self.verdict_label.setText("Host check: —")
 
     def _set_current_test_kind(self, kind: str) -> None:
         """Set internal test kind and update the readonly label."""
@@ -1054,14 +1316,12 @@ class DCTGui(QMainWindow):
 
         if "74F00" in up:
             self._set_current_test_kind("nand")
-            self._fill_truth_table_nand()
-            self._setup_results_table_nand()
-            self._send("select_nand")
+            self._load_builtin_layout("nand")
+            self._request_ack("select_nand")
         elif "74F04" in up:
             self._set_current_test_kind("inv")
-            self._fill_truth_table_inv()
-            self._setup_results_table_inv()
-            self._send("select_inverter")
+            self._load_builtin_layout("inv")
+            self._request_ack("select_inverter")
         else:
             self._clear_truth_tables()
             return
@@ -1072,85 +1332,65 @@ class DCTGui(QMainWindow):
         # (Optional) auto-start the test:
         # self._send("start_nand" if self.current_test_kind == "nand" else "start_inverter")
 
-    def _set_results_y(self, a: int, b: Optional[int], y: Union[int, str]) -> None:
-        idx = self._row_index_for_inputs(a, b)
-        if idx is None:
-            return
-        if self._current_kind() == 'nand':
-            self.results_table.setItem(idx, 2, self._make_center_item(str(y)))
-        else:
-            self.results_table.setItem(idx, 1, self._make_center_item(str(y)))
-
-    def _try_parse_vector_text_line(self, line: str) -> bool:
-        """
-        Parse plain-text vector results like:
-          'A=0 B=1 Y=1'
-          'IN: 0,1 -> OUT: 1'
-          'A:1, Y:0' (for inverter)
-        """
-        s = line.strip()
-
-        m = re.search(r'\bA\s*[:=]\s*([01])\b.*?\bB\s*[:=]\s*([01])\b.*?\bY\s*[:=]\s*([01])\b', s, re.I)
-        if m:
-            a, b, y = int(m.group(1)), int(m.group(2)), int(m.group(3))
-            self._set_results_y(a, b, y)
-            return True
-
-        m = re.search(r'IN(?:PUTS?)?\s*[:=]\s*\[?\s*([01])\s*[, ]\s*([01])\s*\]?\D+OUT(?:PUT)?\s*[:=]\s*([01])', s, re.I)
-        if m:
-            a, b, y = int(m.group(1)), int(m.group(2)), int(m.group(3))
-            self._set_results_y(a, b, y)
-            return True
-
-        if self._current_kind() == 'inv':
-            m = re.search(r'\bA\s*[:=]\s*([01])\b.*?\bY\s*[:=]\s*([01])\b', s, re.I)
-            if m:
-                a, y = int(m.group(1)), int(m.group(2))
-                self._set_results_y(a, None, y)
-                return True
-
-        return False
-
     def _reset_opamp_stats(self):
         """Reset running stats and UI readouts for op-amp (PWM) live data."""
-        self._opamp_count = 0
-        self._opamp_sum = 0.0
-        self._opamp_min = None
-        self._opamp_max = None
+        self.opamp_stats = OpampStats()
+        self.opamp_series = SeriesRing()
+        self.opamp_result = None
+        self.presenter.discard("pwm_readout", "voltage_labels", "waveform")
         if hasattr(self, "pwm_readout_label"):
             self.pwm_readout_label.setText("Duty: —    Voltage: — V")
         self.min_voltage_label.setText("Min Voltage: N/A")
         self.max_voltage_label.setText("Max Voltage: N/A")
         self.avg_voltage_label.setText("Average Voltage: N/A")
+        self.spread_voltage_label.setText("Std Dev: N/A    RMS: N/A")
+        self.percentile_voltage_label.setText("P1 / P50 / P99: N/A")
+        self.opamp_results_label.setText("Results will appear here.")
         # clear the plot too (if present)
         if hasattr(self, "waveform"):
             self.waveform.clear()
 
     # ---------- Detect chip slot ----------
     def detect_chip(self):
-        if not self.test_runner.is_connected():
-            QMessageBox.warning(self, "Connection Error", "Not connected to the device.")
+        # the reply is routed to the logic page by its request callback
+        if self._request("detect", callback=lambda fut: self._on_detect_reply(fut, "logic")) is None:
             return
-        timestamp = datetime.now().strftime("[%H:%M:%S]")
-        self.log_output.append(f"{timestamp} → detect")
-        # mark that this detect was requested by the logic page
-        self._last_detect_target = "logic"
-        self.test_runner.send_command("detect")
         if hasattr(self, "detection_label"):
             self.detection_label.setText("Detecting...")
 
     def detect_opamp(self):
         """Request detection for the op-amp page only (won't change logic tables)."""
-        if not self.test_runner.is_connected():
-            QMessageBox.warning(self, "Connection Error", "Not connected to the device.")
+        if self._request("detect", callback=lambda fut: self._on_detect_reply(fut, "opamp")) is None:
             return
-        timestamp = datetime.now().strftime("[%H:%M:%S]")
-        self.log_output.append(f"{timestamp} → detect (opamp)")
-        self._last_detect_target = "opamp"
-        self.test_runner.send_command("detect")
         if hasattr(self, "opamp_detection_label"):
             self.opamp_detection_label.setText("Detecting...")
 
+    def _on_detect_reply(self, fut, target: str):
+        """Done-callback of a 'detect' request issued for the given page."""
+        err = fut.exception()
+        if err is None:
+            self._show_detected_chip(fut.result().get("chip", "UNKNOWN"), target)
+            return
+        label = "opamp_detection_label" if target == "opamp" else "detection_label"
+        if hasattr(self, label):
+            getattr(self, label).setText("No reply to detect.")
+        self._log(f"[DETECT] failed ({target}): {err}")
+
+    def _show_detected_chip(self, chip: str, target: str):
+        # Update only the page that initiated the detect.
+        if target == "opamp":
+            if hasattr(self, "opamp_detection_label"):
+                self.opamp_detection_label.setText(chip)
+        else:  # default/logic target
+            if hasattr(self, "detection_label"):
+                self.detection_label.setText(chip)
+            # only apply selection/patch tables when logic requested the detect
+            try:
+                self._apply_detected_chip(chip)
+            except Exception:
+                pass
+        self._log(f"[DETECT] {chip} (from {target})")
+
     # ---------- Existing file/test helpers ----------
     def open_test_file(self):
         file_path, _ = QFileDialog.getOpenFileName(
@@ -1179,10 +1419,17 @@ class DCTGui(QMainWindow):
                         formatted += f"  IN: {row.get('inputs')} → OUT: {row.get('output')}\n"
                     QMessageBox.information(self, "Test File Info", formatted)
 
+                # Show the definition's vectors (any pin count / gates) in the tables
+                index = VectorIndex.from_definition(data or {})
+                if len(index):
+                    self._load_layout(index)
+                    self._log(f"[SYS] Loaded {len(index)} vectors ({len(index.inputs)} inputs, "
+                              f"{len(index.outputs)} outputs, {index.gates} gate(s)).")
+
                 # Push the loaded test definition to the MCU so Start can use it
                 try:
-                    self._send_test_definition(data)
-                    self._log("[SYS] Test definition sent to MCU.")
+                    if self._send_test_definition(data, index):
+                        self._log("[SYS] Test definition sent to MCU.")
                 except Exception as e:
                     QMessageBox.warning(self, "MCU", f"Failed to send test definition:\n{e}")
             except Exception as e:
@@ -1197,49 +1444,235 @@ class DCTGui(QMainWindow):
         except Exception as e:
             QMessageBox.critical(self, "Error", f"Run test failed:\n{e}")
 
+    # ---------- Session capture / replay ----------
+    def _toggle_recording(self, on: bool):
+        if not on:
+            if self.test_runner.recorder is not None:
+                n = self.test_runner.recorder.count
+                self.test_runner.stop_recording()
+                self._log(f"[SYS] Capture stopped ({n} records).")
+            return
+        path, _ = QFileDialog.getSaveFileName(
+            self, "Record Serial Session", "session.dcap",
+            "DCT Captures (*.dcap);; All Files (*)"
+        )
+        if not path:
+            self.record_action.setChecked(False)
+            return
+        try:
+            self.test_runner.start_recording(path)
+            self._log(f"[SYS] Recording serial traffic to {path}")
+        except OSError as e:
+            self.record_action.setChecked(False)
+            QMessageBox.warning(self, "Capture", f"Cannot record:\n{e}")
+
+    def _toggle_sample_recording(self, on: bool):
+        if not on:
+            self._stop_sample_recording()
+            return
+        path, _ = QFileDialog.getSaveFileName(
+            self, "Record PWM Samples", "opamp_run.dpwm",
+            "DCT Samples (*.dpwm);; All Files (*)"
+        )
+        if not path:
+            self.samples_action.setChecked(False)
+            return
+        try:
+            self.sample_writer = SampleWriter(path)
+        except OSError as e:
+            self.samples_action.setChecked(False)
+            QMessageBox.warning(self, "Samples", f"Cannot record:\n{e}")
+            return
+        # written from the serial reader thread, ahead of the display queue
+        self.pipeline.sample_sink = self.sample_writer.record
+        self._log(f"[SYS] Recording pwm samples to {path}")
+
+    def _stop_sample_recording(self):
+        writer, self.sample_writer = self.sample_writer, None
+        self.pipeline.sample_sink = None
+        if writer is None:
+            return
+        writer.close()
+        msg = f"[SYS] Sample recording stopped ({writer.count} samples"
+        if writer.dropped:
+            msg += f", {writer.dropped} lost: disk too slow"
+        if writer.error is not None:
+            msg += f", write error: {writer.error}"
+        self._log(msg + ").")
+
+    def closeEvent(self, event):
+        self._stop_sample_recording()
+        super().closeEvent(event)
+
+    def replay_capture(self):
+        path, _ = QFileDialog.getOpenFileName(
+            self, "Replay Serial Capture", "",
+            "DCT Captures (*.dcap);; All Files (*)"
+        )
+        if not path:
+            return
+        try:
+            capture = SessionReplay(path)
+        except (OSError, ValueError) as e:
+            QMessageBox.warning(self, "Replay", f"Cannot open capture:\n{e}")
+            return
+        realtime = QMessageBox.question(
+            self, "Replay", "Replay with the recorded timing?\n(No = as fast as possible)"
+        ) == QMessageBox.Yes
+        self._stop_replay()
+        if not realtime:
+            start = time.perf_counter()
+            n = capture.replay(self._handle_serial_line)
+            capture.close()
+            self._log(f"[REPLAY] {n} lines in {time.perf_counter() - start:.3f} s")
+            return
+        self._replay = (capture, capture.paced(), [None])
+        self.replay_timer = QTimer(self)
+        self.replay_timer.timeout.connect(self._replay_tick)
+        self.replay_timer.start(15)
+        self._log(f"[REPLAY] {path} (real time)")
+
+    def _replay_tick(self):
+        capture, paced, held = self._replay
+        now = time.monotonic()
+        while True:
+            item = held[0] if held[0] is not None else next(paced, None)
+            held[0] = None
+            if item is None:
+                self._stop_replay()
+                self._log("[REPLAY] done.")
+                return
+            line, due = item
+            if due > now:
+                held[0] = item  # not due yet; keep for the next tick
+                return
+            self._handle_serial_line(line)
+
+    def _stop_replay(self):
+        if getattr(self, "_replay", None) is None:
+            return
+        self.replay_timer.stop()
+        self._replay[0].close()
+        self._replay = None
+
     # ---------- Logging helper ----------
     def _log(self, msg: str):
         ts = datetime.now().strftime("[%H:%M:%S]")
-        self.log_output.append(f"{ts} {msg}")
+        self.presenter.append("log", self._append_log, f"{ts} {msg}")
+
+    def _append_log(self, lines):
+        self.log_output.append("\n".join(lines))
 
 
 # NEW: lightweight waveform plotting widget (pure PyQt)
 class WaveformWidget(QWidget):
+    """
+    Live trace plus the whole run's history: mouse wheel zooms around the
+    cursor, dragging pans, double-click shows the full run again.
+    """
+
+    # leave extra room for Y labels (left) and X labels (bottom)
+    MARGINS = (40, 8, 8, 24)  # left, top, right, bottom
+    REPAINT_HZ = 30
+
     def __init__(self, max_points=300, parent=None):
         super().__init__(parent)
         self.max_points = max_points
-        self.data = []
+        self.data = SampleRing(max_points)   # newest raw samples, for close zoom
+        self.history = MinMaxPyramid()       # envelope of the whole run
+        self.view = HistoryView()
+        self._drag_x = None
         self.vmin = 0.0
         self.vmax = 5.0
+        self._font = QFont("Sans", 9)
+        self._static = None  # cached chrome, see _static_layer()
+        # new samples repaint at most REPAINT_HZ times per second
+        self._repaint_timer = QTimer(self)
+        self._repaint_timer.setSingleShot(True)
+        self._repaint_timer.setInterval(int(1000 / self.REPAINT_HZ))
+        self._repaint_timer.timeout.connect(self.update)
         self.setMinimumHeight(160)
         self.setSizePolicy(QSizePolicy.Expanding, QSizePolicy.Fixed)
 
     def set_range(self, vmin, vmax):
         self.vmin, self.vmax = float(vmin), float(vmax)
+        self._static = None
         self.update()
 
     def clear(self):
         self.data.clear()
+        self.history.clear()
+        self.view.reset()
         self.update()
 
     def append(self, v):
-        try:
-            v = float(v)
-        except Exception:
+        self.extend([v])
+
+    def extend(self, values):
+        """Add a batch of samples; the repaint waits for the repaint timer."""
+        samples = clean_samples(values)
+        if len(samples):
+            self.data.extend(samples)
+            self.history.extend(samples)
+            if not self._repaint_timer.isActive():
+                self._repaint_timer.start()
+
+    # ---------- Zoom / pan ----------
+    def _plot_rect(self):
+        left, top, right, bottom = self.MARGINS
+        return self.rect().adjusted(left, top, -right, -bottom)
+
+    def wheelEvent(self, event):
+        rect = self._plot_rect()
+        steps = event.angleDelta().y() / 120.0
+        anchor = (event.pos().x() - rect.left()) / max(rect.width(), 1)
+        self.view.zoom(0.8 ** steps, min(max(anchor, 0.0), 1.0), self.history.total)
+        self.update()
+
+    def mousePressEvent(self, event):
+        if event.button() == Qt.LeftButton:
+            self._drag_x = event.pos().x()
+
+    def mouseMoveEvent(self, event):
+        if self._drag_x is None:
             return
-        self.data.append(v)
-        if len(self.data) > self.max_points:
-            self.data = self.data[-self.max_points:]
+        start, stop = self.view.window(self.history.total)
+        dx = event.pos().x() - self._drag_x
+        self._drag_x = event.pos().x()
+        self.view.pan(-dx * (stop - start) / max(self._plot_rect().width(), 1), self.history.total)
         self.update()
 
-    def paintEvent(self, event):
-        painter = QPainter(self)
-        # leave extra room for Y labels (left) and X labels (bottom)
-        left_margin = 40
-        bottom_margin = 24
-        top_margin = 8
-        right_margin = 8
-        rect = self.rect().adjusted(left_margin, top_margin, -right_margin, -bottom_margin)
+    def mouseReleaseEvent(self, event):
+        self._drag_x = None
+
+    def mouseDoubleClickEvent(self, event):
+        self.view.reset()
+        self.update()
+
+    def _trace(self, start, stop, columns):
+        """(pos, lo, hi) for samples [start, stop): raw samples when zoomed in on recent data."""
+        ring_start = self.history.total - len(self.data)
+        if (stop - start) / max(columns, 1) < self.history.base and start >= ring_start:
+            raw = self.data.view()[start - ring_start:stop - ring_start]
+            return bucket_minmax(np.arange(start, stop), raw, raw, start, stop, columns)
+        return self.history.envelope(start, stop, columns)
+
+    # ---------- Painting ----------
+    def resizeEvent(self, event):
+        self._static = None
+        super().resizeEvent(event)
+
+    def _static_layer(self) -> QPixmap:
+        """Background, frame, axes, grid and Y labels; rebuilt only on resize or set_range."""
+        dpr = self.devicePixelRatioF()
+        if self._static is not None and self._static.devicePixelRatioF() == dpr:
+            return self._static
+        left_margin = self.MARGINS[0]
+        rect = self._plot_rect()
+        pixmap = QPixmap(int(self.width() * dpr), int(self.height() * dpr))
+        pixmap.setDevicePixelRatio(dpr)
+        pixmap.fill(self.palette().color(self.backgroundRole()))  # opaque: a plain blit when drawn
+        painter = QPainter(pixmap)
 
         # background and frame
         painter.fillRect(rect, QColor(245, 245, 245))
@@ -1255,7 +1688,7 @@ class WaveformWidget(QWidget):
 
         # horizontal grid lines + Y ticks/labels
         grid_pen = QPen(QColor(220, 220, 220)); grid_pen.setWidth(1)
-        painter.setFont(QFont("Sans", 9))
+        painter.setFont(self._font)
         ticks = 5
         h = rect.height(); w = rect.width()
         for i in range(ticks + 1):
@@ -1278,26 +1711,49 @@ class WaveformWidget(QWidget):
             xf = rect.left() + i * (w / xticks)
             xi = int(round(xf))
             painter.drawLine(xi, int(rect.bottom()), xi, int(rect.bottom()) + 5)
-        # X axis label
-        painter.drawText(int(rect.left()), int(rect.bottom()) + 6, int(w), 16, Qt.AlignHCenter | Qt.AlignTop, "Samples")
+        painter.end()
+        self._static = pixmap
+        return pixmap
+
+    def paintEvent(self, event):
+        painter = QPainter(self)
+        painter.drawPixmap(0, 0, self._static_layer())
+        rect = self._plot_rect()
+        h = rect.height(); w = rect.width()
 
-        # draw waveform over axes
-        if len(self.data) >= 2 and self.vmax > self.vmin:
-            line_pen = QPen(QColor(30, 30, 30)); line_pen.setWidth(2)
+        # X axis label (changes with the visible window)
+        start, stop = self.view.window(self.history.total)
+        label = f"Samples {start:,}\u2013{stop:,}" if stop else "Samples"
+        if stop and not self.view.following:
+            label += " (paused, double-click for live)"
+        painter.setPen(QColor(50, 50, 50))
+        painter.setFont(self._font)
+        painter.drawText(int(rect.left()), int(rect.bottom()) + 6, int(w), 16, Qt.AlignHCenter | Qt.AlignTop, label)
+
+        # draw waveform over axes: about one min/max column per pixel
+        if stop - start >= 2 and self.vmax > self.vmin:
+            pos, lo, hi = self._trace(start, stop, int(w))
+            pos, values = envelope_trace(pos, lo, hi)
+            xy = to_screen(values, rect.left(), rect.bottom(), w, h, self.vmin, self.vmax,
+                           pos=pos, start=start, stop=stop)
+            line_pen = QPen(QColor(30, 30, 30))
+            # a wide pen strokes the envelope's overlapping segments as one slow path
+            line_pen.setWidth(2 if len(values) == len(lo) else 1)
             painter.setPen(line_pen)
-            n = len(self.data)
-            dx = w / max(1, n - 1)
-            pts = []
-            for i, val in enumerate(self.data):
-                v = min(max(val, self.vmin), self.vmax)
-                norm = (v - self.vmin) / (self.vmax - self.vmin)
-                y = rect.bottom() - norm * h
-                x = rect.left() + i * dx
-                pts.append(QPointF(x, y))
-            if pts:
-                painter.drawPolyline(QPolygonF(pts))
+            painter.drawPolyline(_polygon(xy))
+
+
+def _polygon(xy: np.ndarray) -> QPolygonF:
+    """QPolygonF filled from an n x 2 float64 array in one memory copy."""
+    poly = QPolygonF(len(xy))
+    ptr = poly.data()
+    ptr.setsize(xy.size * xy.itemsize)
+    np.frombuffer(ptr, dtype=np.float64)[:] = xy.reshape(-1)
+    return poly
+
 
 if __name__ == "__main__":
+    json_backend.install()
     app = QApplication(sys.argv)
     gui = DCTGui()
     gui.show()
@@ -0,0 +1,109 @@
+# json_backend.py
+import json
+import os
+import re
+from typing import Optional
+import events
+from events import HealthEvent, PwmEvent
+
+"""
+Pluggable JSON decoding for the MCU event stream.
+
+install() picks the fastest backend that is importable (orjson, then msgspec,
+then stdlib json) unless one is named explicitly or through DCT_JSON_BACKEND.
+msgspec decodes the high-rate events (pwm, health) straight into schema-typed
+structs, skipping the intermediate dict; the "event" tag is sniffed first so
+every other line is parsed only once. Its generic decoder is still slower than
+orjson on vector and summary lines, so it is not the default.
+"""
+
+PREFERRED = ("orjson", "msgspec", "json")
+
+# "event" tag of the lines msgspec decodes into structs
+_TYPED_TAG = re.compile(r'"event"\s*:\s*"(?:pwm|health)"')
+
+
+def _stdlib():
+    return json.loads, None
+
+
+def _orjson():
+    import orjson
+    return orjson.loads, None  # orjson.JSONDecodeError subclasses ValueError
+
+
+def _msgspec():
+    import msgspec
+    from typing import Union
+
+    class _Pwm(msgspec.Struct, tag_field="event", tag="pwm"):
+        duty: int
+        voltage: float
+        t_us: Optional[int] = None
+
+    class _Health(msgspec.Struct, tag_field="event", tag="health"):
+        min_v: Optional[float] = None
+        max_v: Optional[float] = None
+        avg_v: Optional[float] = None
+
+    generic = msgspec.json.Decoder()
+    known = msgspec.json.Decoder(Union[_Pwm, _Health])
+    error = msgspec.MsgspecError
+
+    def loads(text):
+        try:
+            return generic.decode(text)
+        except error as e:
+            raise ValueError(str(e))
+
+    sniff = _TYPED_TAG.search
+
+    def typed(text):
+        if sniff(text, 0, 32) is None:
+            return None  # not pwm/health: straight to the dict path, one parse
+        try:
+            m = known.decode(text)
+        except error:
+            return None  # off-schema payloads take the dict path
+        if type(m) is _Pwm:
+            return PwmEvent(m.duty, m.voltage, m.t_us)
+        return HealthEvent(m.min_v, m.max_v, m.avg_v)
+
+    return loads, typed
+
+
+BACKENDS = {"msgspec": _msgspec, "orjson": _orjson, "json": _stdlib}
+
+
+def available():
+    """Names of the backends importable in this environment, fastest first."""
+    out = []
+    for name in PREFERRED:
+        try:
+            BACKENDS[name]()
+            out.append(name)
+        except ImportError:
+            pass
+    return out
+
+
+def install(name: Optional[str] = None) -> str:
+    """
+    Make events.decode() use the named backend (or the best available one).
+    Returns the name actually installed.
+    """
+    name = name or os.environ.get("DCT_JSON_BACKEND")
+    candidates = [name] if name else list(PREFERRED)
+    for candidate in candidates:
+        factory = BACKENDS.get(candidate)
+        if factory is None:
+            raise ValueError(f"unknown JSON backend: {candidate}")
+        try:
+            loads, typed = factory()
+        except ImportError:
+            if name:
+                raise
+            continue
+        events.use_json_backend(loads, typed)
+        return candidate
+    return "json"
@@ -0,0 +1,205 @@
+# logic_expr.py
+import re
+from functools import lru_cache
+from typing import Callable, Dict, FrozenSet, List, Optional, Sequence
+import numpy as np
+
+"""
+Boolean output expressions for test definitions, e.g. Y: "!(A & B)".
+
+Expressions are compiled once into a tree of numpy operations and evaluated
+over whole input columns at a time, so the expected outputs of an exhaustive
+table (every 2^n input combination) come from a handful of array ops.
+
+Operators, loosest first:  |  +  or   ^  xor   &  *  and   !  ~  not   ( )
+Operands are pin names and the constants 0 and 1.
+"""
+
+MAX_EXHAUSTIVE_INPUTS = 20  # 1M rows; larger parts need explicit rows
+
+_TOKEN = re.compile(r'\s*(?:(?P<name>\d*[A-Za-z_]\w*)|(?P<const>[01])\b|(?P<op>[!~&|^*+()]))')
+_WORD_OPS = {"and": "&", "or": "|", "xor": "^", "not": "!"}
+_BINARY = (("|", "+"), ("^",), ("&", "*"))  # precedence levels, loosest first
+
+
+class Expr:
+    """A compiled expression: evaluate(columns) -> uint8 array of 0/1."""
+
+    def __init__(self, text: str, fn: Callable, names: FrozenSet[str]):
+        self.text = text
+        self.names = names  # pins the expression reads
+        self._fn = fn
+
+    def evaluate(self, columns: Dict[str, np.ndarray], length: Optional[int] = None) -> np.ndarray:
+        """
+        :param columns: pin name -> uint8 column of 0/1 levels
+        :param length: result length for constant expressions (defaults to any column's)
+        """
+        out = np.asarray(self._fn(columns), dtype=np.uint8)
+        if out.ndim == 0:
+            if length is None:
+                length = len(next(iter(columns.values()))) if columns else 1
+            out = np.full(length, out, dtype=np.uint8)
+        return out
+
+    def __repr__(self):
+        return f"Expr({self.text!r})"
+
+
+def _tokenize(text):
+    pos = 0
+    tokens = []
+    while pos < len(text):
+        m = _TOKEN.match(text, pos)
+        if m is None:
+            if text[pos:].strip() == "":
+                break
+            raise ValueError(f"unexpected {text[pos:].strip()[:10]!r} at column {pos + 1} in {text!r}")
+        pos = m.end()
+        if m.group("name") is not None:
+            word = m.group("name")
+            op = _WORD_OPS.get(word.lower())
+            tokens.append(("op", op) if op else ("name", word))
+        elif m.group("const") is not None:
+            tokens.append(("const", int(m.group("const"))))
+        else:
+            tokens.append(("op", m.group("op")))
+    return tokens
+
+
+class _Parser:
+    """Recursive descent over the token list; builds closures over column dicts."""
+
+    def __init__(self, text):
+        self.text = text
+        self.tokens = _tokenize(text)
+        self.i = 0
+        self.names = set()
+
+    def _peek(self):
+        return self.tokens[self.i] if self.i < len(self.tokens) else (None, None)
+
+    def _take(self):
+        tok = self._peek()
+        self.i += 1
+        return tok
+
+    def parse(self):
+        if not self.tokens:
+            raise ValueError("empty expression")
+        fn = self._binary(0)
+        if self.i != len(self.tokens):
+            raise ValueError(f"unexpected {self._peek()[1]!r} in {self.text!r}")
+        return fn
+
+    def _binary(self, level):
+        if level == len(_BINARY):
+            return self._unary()
+        ops = _BINARY[level]
+        left = self._binary(level + 1)
+        while self._peek()[0] == "op" and self._peek()[1] in ops:
+            op = self._take()[1]
+            right = self._binary(level + 1)
+            left = _combine(op, left, right)
+        return left
+
+    def _unary(self):
+        kind, value = self._take()
+        if kind == "op" and value in ("!", "~"):
+            inner = self._unary()
+            return lambda cols: inner(cols) ^ 1
+        if kind == "op" and value == "(":
+            inner = self._binary(0)
+            if self._take() != ("op", ")"):
+                raise ValueError(f"missing ')' in {self.text!r}")
+            return inner
+        if kind == "name":
+            self.names.add(value)
+            return lambda cols: cols[value]
+        if kind == "const":
+            c = np.uint8(value)
+            return lambda cols: c
+        raise ValueError(f"unexpected {value!r} in {self.text!r}" if kind else f"incomplete expression {self.text!r}")
+
+
+def _combine(op, left, right):
+    if op in ("|", "+"):
+        return lambda cols: left(cols) | right(cols)
+    if op == "^":
+        return lambda cols: left(cols) ^ right(cols)
+    return lambda cols: left(cols) & right(cols)
+
+
+@lru_cache(maxsize=256)
+def compile_expr(text: str) -> Expr:
+    """Parse an expression once; raises ValueError on syntax errors."""
+    parser = _Parser(str(text))
+    fn = parser.parse()
+    return Expr(str(text), fn, frozenset(parser.names))
+
+
+def compile_outputs(outputs: Dict[str, str]) -> Dict[str, Expr]:
+    """Compile a definition's {output name: expression} mapping."""
+    compiled = {}
+    for name, text in outputs.items():
+        try:
+            compiled[name] = compile_expr(str(text))
+        except ValueError as e:
+            raise ValueError(f"output {name}: {e}")
+    return compiled
+
+
+def exhaustive_columns(n: int) -> List[np.ndarray]:
+    """
+    Input columns of the exhaustive table, rows in counting order (first input =
+    MSB). Column i is a square wave of period 2^(n-i), built by broadcasting.
+    """
+    if n > MAX_EXHAUSTIVE_INPUTS:
+        raise ValueError(f"{n} inputs is too many for an exhaustive table (max {MAX_EXHAUSTIVE_INPUTS})")
+    levels = np.array([0, 1], dtype=np.uint8)[None, :, None]
+    return [np.broadcast_to(levels, (1 << i, 2, 1 << (n - 1 - i))).reshape(-1) for i in range(n)]
+
+
+def exhaustive_inputs(n: int) -> np.ndarray:
+    """All 2^n input combinations as a rows x n matrix."""
+    return _stack(exhaustive_columns(n), 1 << n)
+
+
+def _stack(columns, rows) -> np.ndarray:
+    # column-major so each column is one contiguous write
+    out = np.empty((rows, len(columns)), dtype=np.uint8, order="F")
+    for i, col in enumerate(columns):
+        out[:, i] = col
+    return out
+
+
+def _evaluate(outputs: Dict[str, str], columns: Dict[str, np.ndarray], rows: int) -> List[np.ndarray]:
+    result = []
+    for name, expr in compile_outputs(outputs).items():
+        unknown = expr.names - columns.keys()
+        if unknown:
+            raise ValueError(f"output {name} uses unknown pins: {', '.join(sorted(unknown))}")
+        result.append(expr.evaluate(columns, rows))
+    return result
+
+
+def expected_outputs(outputs: Dict[str, str], inputs: Sequence[str], input_matrix) -> np.ndarray:
+    """
+    Evaluate output expressions for the given input rows.
+
+    :param outputs: output name -> expression
+    :param inputs: input names, one per input_matrix column
+    :param input_matrix: rows x len(inputs) levels
+    Returns rows x len(outputs) uint8.
+    """
+    matrix = np.asarray(input_matrix, dtype=np.uint8).reshape(-1, len(inputs))
+    columns = {name: np.ascontiguousarray(matrix[:, i]) for i, name in enumerate(inputs)}
+    return _stack(_evaluate(outputs, columns, len(matrix)), len(matrix))
+
+
+def truth_table(outputs: Dict[str, str], inputs: Sequence[str]) -> np.ndarray:
+    """Exhaustive expected table: 2^n rows x (inputs + outputs)."""
+    ins = exhaustive_columns(len(inputs))
+    rows = 1 << len(inputs)
+    outs = _evaluate(outputs, dict(zip(inputs, ins)), rows)
+    return _stack(ins + outs, rows)
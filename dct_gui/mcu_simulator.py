@@ -0,0 +1,336 @@
+# mcu_simulator.py
+import argparse
+import json
+import os
+import random
+import select
+import sys
+import threading
+import time
+import binary_protocol as bp
+
+
+class McuSimulator:
+    """
+    Virtual DCT MCU behind a pseudo-terminal pair (POSIX).
+
+    TestRunner (or the GUI) connects to sim.port like a real board. The simulator
+    implements the command set the GUI uses and emits vector/summary/pwm/health
+    events at a configurable rate, far above what the real hardware produces.
+
+      - McuSimulator(rate=..., chip=...).start() / .close()
+      - status, detect, select_nand, select_inverter, start_nand, start_inverter,
+        start_loaded, start_opamp, JSON define_test, stop, reset, proto binary
+    """
+
+    NAND_ROWS = [{"A": 0, "B": 0, "Y": 1}, {"A": 0, "B": 1, "Y": 1},
+                 {"A": 1, "B": 0, "Y": 1}, {"A": 1, "B": 1, "Y": 0}]
+    INV_ROWS = [{"A": 0, "Y": 1}, {"A": 1, "Y": 0}]
+
+    def __init__(self, rate=50.0, chip="74F00", binary_ok=True, text_vectors=False,
+                 fail_rate=0.0, health_every=50, vref=5.0, seed=None):
+        """
+        :param rate: events per second for vector and pwm streams
+        :param chip: part reported by 'detect'
+        :param binary_ok: acknowledge 'proto binary' (False mimics legacy firmware)
+        :param text_vectors: emit legacy 'A=0 B=1 Y=1' text instead of JSON vectors
+        :param fail_rate: probability that an observed output bit is flipped
+        :param health_every: pwm samples between 'health' events (0 = never)
+        :param vref: op-amp supply; outputs saturate short of both rails
+        """
+        import tty
+        self.rate = float(rate)
+        self.chip = chip
+        self.binary_ok = binary_ok
+        self.text_vectors = text_vectors
+        self.fail_rate = fail_rate
+        self.health_every = health_every
+        self.vref = vref
+        self.rng = random.Random(seed)
+
+        self.master, self.slave = os.openpty()
+        tty.setraw(self.slave)
+        os.set_blocking(self.master, False)
+        self.port = os.ttyname(self.slave)
+
+        self.menu_index = 0 if "74F00" in chip.upper() else 1
+        self.definition = None
+        self.binary = False
+        self.dropped = 0      # bytes discarded because the host was not reading
+        self.commands = []    # every command line received, in order
+
+        self._out = bytearray()
+        self._max_out = 1 << 20
+        self._stream = None   # active event generator, advanced once per tick
+        self._stop_event = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="McuSimulator", daemon=True)
+
+    # ---------- Lifecycle ----------
+    def start(self):
+        self._thread.start()
+        return self
+
+    def close(self):
+        self._stop_event.set()
+        if self._thread.is_alive():
+            self._thread.join(1.0)
+        for fd in (self.master, self.slave):
+            try:
+                os.close(fd)
+            except OSError:
+                pass
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.close()
+
+    # ---------- Main loop ----------
+    def _run(self):
+        inbuf = bytearray()
+        tick = 0.002
+        while not self._stop_event.is_set():
+            wait_write = [self.master] if self._out else []
+            try:
+                readable, writable, _ = select.select([self.master], wait_write, [], tick)
+            except (OSError, ValueError):
+                return
+            if readable:
+                try:
+                    data = os.read(self.master, 4096)
+                except BlockingIOError:
+                    data = b""
+                except OSError:
+                    return
+                inbuf += data
+                while b"\n" in inbuf:
+                    raw, _, rest = bytes(inbuf).partition(b"\n")
+                    inbuf = bytearray(rest)
+                    line = raw.decode("utf-8", "ignore").strip()
+                    if line:
+                        self.commands.append(line)
+                        self._handle_command(line)
+            if self._stream is not None:
+                try:
+                    next(self._stream)
+                except StopIteration:
+                    self._stream = None
+            if self._out:
+                self._flush()
+
+    def _flush(self):
+        try:
+            n = os.write(self.master, self._out)
+            del self._out[:n]
+        except BlockingIOError:
+            pass
+        except OSError:
+            self._out.clear()
+
+    # ---------- Output ----------
+    def _emit(self, obj):
+        """Queue one event (dict) or raw text line for the host."""
+        line = obj if isinstance(obj, str) else json.dumps(obj, separators=(",", ":"))
+        data = bp.encode_text(line) if self.binary else (line + "\n").encode("utf-8")
+        self._queue(data)
+
+    def _queue(self, data):
+        if len(self._out) + len(data) > self._max_out:
+            self.dropped += len(data)  # UART overrun: the host is not keeping up
+            return
+        self._out += data
+
+    # ---------- Commands ----------
+    def _handle_command(self, line):
+        if line.startswith("{"):
+            try:
+                msg = json.loads(line)
+            except ValueError:
+                self._emit(f"ERR bad json: {line}")
+                return
+            cmd = msg.get("cmd")
+            if cmd == "define_test":
+                self.definition = msg
+                reply = {"event": "ack", "cmd": "define_test", "rows": len(msg.get("rows", []))}
+                if "id" in msg:
+                    reply["id"] = msg["id"]
+                self._emit(reply)
+            else:
+                self._emit(f"ERR unknown command: {cmd}")
+            return
+
+        cmd = line.split(" ", 1)[0]
+        if line == bp.PROTO_REQUEST:
+            if self.binary_ok:
+                self._emit({"event": "proto", "mode": "binary"})
+                self.binary = True
+            else:
+                self._emit(f"ERR unknown command: {line}")
+        elif cmd == "status":
+            self._emit(self._status())
+        elif cmd == "detect":
+            self._emit({"event": "detect", "chip": self.chip})
+        elif cmd == "select_nand":
+            self.menu_index = 0
+            self._emit(self._status())
+        elif cmd == "select_inverter":
+            self.menu_index = 1
+            self._emit(self._status())
+        elif cmd == "start_nand":
+            self._stream = self._truth_table_stream("nand", self.NAND_ROWS)
+        elif cmd == "start_inverter":
+            self._stream = self._truth_table_stream("inverter", self.INV_ROWS)
+        elif cmd == "start_loaded":
+            rows = (self.definition or {}).get("rows") or []
+            name = (self.definition or {}).get("chip") or "loaded"
+            self._stream = self._truth_table_stream(name, rows)
+        elif cmd == "start_opamp":
+            self._stream = self._opamp_stream()
+            self._emit(self._status())
+        elif cmd == "stop":
+            self._stream = None
+            self._emit(self._status())
+        elif cmd == "reset":
+            self._stream = None
+            self.binary = False
+            self.definition = None
+            self._emit({"event": "ready", "chip": self.chip})
+        else:
+            self._emit(f"ERR unknown command: {line}")
+
+    def _status(self):
+        return {"event": "status", "menuIndex": self.menu_index,
+                "running": self._stream is not None}
+
+    # ---------- Streams (advanced once per loop tick) ----------
+    def _due(self):
+        """Yield how many events are due since the previous tick, at self.rate."""
+        start = time.monotonic()
+        sent = 0
+        while True:
+            due = int((time.monotonic() - start) * self.rate) - sent
+            sent += max(due, 0)
+            yield max(due, 0)
+
+    def _truth_table_stream(self, test, rows):
+        outputs = [k for k in (rows[0] if rows else {}) if k.startswith("Y")]
+        observed = []
+        passes = fails = 0
+        pending = list(rows)
+        for due in self._due():
+            for _ in range(min(due, len(pending))):
+                row = pending.pop(0)
+                got = dict(row)
+                for name in outputs:
+                    if self.rng.random() < self.fail_rate:
+                        got[name] = 1 - int(got[name])
+                ok = all(int(got[n]) == int(row[n]) for n in outputs)
+                passes += ok
+                fails += not ok
+                observed.append(got)
+                if self.text_vectors:
+                    self._emit(" ".join(f"{k}={v}" for k, v in got.items()))
+                elif self.binary:
+                    ins = [int(v) for k, v in got.items() if k not in outputs]
+                    self._queue(bp.encode_vectors([(0, ins, [int(got[n]) for n in outputs])]))
+                else:
+                    self._emit(dict({"event": "vector"}, **got))
+            if not pending:
+                break
+            yield
+        total = max(passes + fails, 1)
+        self._emit({"event": "summary", "test": test, "passes": passes, "fails": fails,
+                    "pass_rate": 100.0 * passes / total, "truth_table": observed})
+
+    def _opamp_stream(self):
+        """Triangle duty sweep through a saturating, first-order-settling op-amp."""
+        n = 0
+        v = 0.0
+        gain, offset = 1.02, 0.03
+        rail_lo, rail_hi = 0.05, self.vref - 0.15
+        alpha = 0.35  # per-sample settling toward the target (finite slew)
+        vmin = vmax = vsum = None
+        for due in self._due():
+            batch = []
+            for _ in range(due):
+                phase = n % 510
+                duty = phase if phase < 256 else 510 - phase
+                target = min(max(offset + gain * self.vref * duty / 255.0, rail_lo), rail_hi)
+                v += (target - v) * alpha
+                sample = v + self.rng.gauss(0.0, 0.004)
+                t_us = int(n * 1e6 / self.rate) & 0xFFFFFFFF  # MCU sample clock
+                batch.append((t_us, duty, sample))
+                n += 1
+                vmin = sample if vmin is None else min(vmin, sample)
+                vmax = sample if vmax is None else max(vmax, sample)
+                vsum = sample if vsum is None else vsum + sample
+                if self.health_every and n % self.health_every == 0:
+                    self._emit_pwm(batch)
+                    batch = []
+                    self._emit({"event": "health", "min_v": round(vmin, 3),
+                                "max_v": round(vmax, 3), "avg_v": round(vsum / n, 3)})
+            self._emit_pwm(batch)
+            yield
+
+    def _emit_pwm(self, batch):
+        if not batch:
+            return
+        if self.binary:
+            self._queue(bp.encode_pwm(batch))
+            return
+        for _, duty, v in batch:
+            self._emit({"event": "pwm", "duty": duty, "voltage": round(v, 3)})
+
+
+def _bench(sim, seconds, binary):
+    """Connect a TestRunner to the simulator and report received events per second."""
+    from test_runner import TestRunner
+    runner = TestRunner(port=sim.port)
+    runner.connect(binary=binary, handshake_timeout=1.0)
+    runner.start_reader()
+    runner.receive_lines(None)
+    runner.send_command("start_opamp")
+    count = 0
+    start = time.monotonic()
+    while time.monotonic() - start < seconds:
+        batch = runner.receive_lines(None)
+        count += len(batch)
+        if not batch:
+            time.sleep(0.005)
+    elapsed = time.monotonic() - start
+    runner.send_command("stop")
+    runner.close_connection()
+    mode = "binary" if runner.binary else "json"
+    print(f"{count} events in {elapsed:.2f} s = {count / elapsed:,.0f} events/s ({mode}, "
+          f"target {sim.rate:,.0f}/s, simulator dropped {sim.dropped} bytes)")
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Virtual DCT MCU on a pseudo-terminal")
+    ap.add_argument("--rate", type=float, default=50.0, help="stream events per second")
+    ap.add_argument("--chip", default="74F00", help="part reported by detect")
+    ap.add_argument("--legacy", action="store_true", help="no binary mode, text vectors")
+    ap.add_argument("--fail-rate", type=float, default=0.0, help="output bit flip probability")
+    ap.add_argument("--bench", type=float, default=0.0, metavar="SECONDS",
+                    help="run a TestRunner load test against the simulator and exit")
+    ap.add_argument("--binary", action="store_true", help="negotiate binary mode in --bench")
+    args = ap.parse_args(argv)
+
+    sim = McuSimulator(rate=args.rate, chip=args.chip, binary_ok=not args.legacy,
+                       text_vectors=args.legacy, fail_rate=args.fail_rate).start()
+    try:
+        if args.bench:
+            _bench(sim, args.bench, args.binary)
+            return 0
+        print(f"Simulated DCT MCU on {sim.port}  (Ctrl-C to quit)")
+        while True:
+            time.sleep(1.0)
+    except KeyboardInterrupt:
+        return 0
+    finally:
+        sim.close()
+
+
+if __name__ == "__main__":
+    sys.exit(main())
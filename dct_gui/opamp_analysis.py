@@ -0,0 +1,290 @@
+# opamp_analysis.py
+import csv
+import json
+import math
+from typing import Dict, List, NamedTuple, Optional
+import numpy as np
+
+"""
+Op-amp characterization from streamed (t_us, duty, voltage) samples.
+
+Everything is array arithmetic over the whole run:
+  - transfer curve: per-duty mean voltage, least-squares line over the linear
+    (unsaturated) region -> gain, offset, linearity error
+  - rails: the flat ends of the curve, and the duty where the line meets them
+  - dynamics: a first-order step model v[n] - v[n-1] = a * (target[n] - v[n-1])
+    fitted over the time series -> time constant, 1% settling time, slew rate
+
+The per-duty means can come from stream_stats.BucketedStats (no history
+needed); the time series from a SeriesRing or a sample_store.SampleStore.
+"""
+
+DUTY_MAX = 255
+T_WRAP = 1 << 32   # the MCU sample clock is 32-bit
+
+
+class Limits(NamedTuple):
+    """Acceptance limits for classify()."""
+    gain_tol: float = 0.05        # |gain - 1|
+    offset_v: float = 0.10        # |offset|
+    linearity_pct: float = 1.0    # worst residual, % of the linear span
+    min_swing_pct: float = 90.0   # rail-to-rail swing, % of vref
+    max_settle_us: float = 1000.0
+
+
+class OpampAnalysis(NamedTuple):
+    samples: int
+    gain: Optional[float]             # slope relative to an ideal vref * duty / DUTY_MAX
+    slope_v: Optional[float]          # volts per duty count
+    offset_v: Optional[float]         # line value at duty 0
+    r2: Optional[float]
+    linearity_v: Optional[float]      # worst |residual| in the linear region
+    linearity_pct: Optional[float]
+    rail_lo: Optional[float]
+    rail_hi: Optional[float]
+    sat_lo_duty: Optional[float]      # duty where the line reaches the rail (None: not reached)
+    sat_hi_duty: Optional[float]
+    step_alpha: Optional[float]       # fraction of the remaining error removed per sample
+    dt_us: Optional[float]            # median sample spacing
+    tau_us: Optional[float]
+    settle_us: Optional[float]        # to 1 %
+    slew_v_per_ms: Optional[float]
+    verdict: str = "n/a"
+    reasons: tuple = ()
+
+    def as_dict(self) -> dict:
+        d = self._asdict()
+        d["reasons"] = list(self.reasons)
+        return d
+
+
+class SeriesRing:
+    """
+    Newest `capacity` samples as parallel columns (t_us -1 when the device
+    sends no timestamp), for the dynamics part of the analysis.
+    """
+
+    def __init__(self, capacity: int = 200_000):
+        self.capacity = max(int(capacity), 1)
+        self._t = np.empty(self.capacity, dtype=np.int64)
+        self._duty = np.empty(self.capacity, dtype=np.int32)
+        self._v = np.empty(self.capacity, dtype=np.float64)
+        self._head = 0
+        self._count = 0
+
+    def __len__(self):
+        return self._count
+
+    def clear(self) -> None:
+        self._head = self._count = 0
+
+    def extend(self, duty, voltage, t_us=None) -> None:
+        n = len(voltage)
+        if n == 0:
+            return
+        t = np.full(n, -1, dtype=np.int64) if t_us is None else \
+            np.array([-1 if x is None else x for x in t_us], dtype=np.int64)
+        cols = ((self._t, t), (self._duty, np.asarray(duty, dtype=np.int32)),
+                (self._v, np.asarray(voltage, dtype=np.float64)))
+        if n >= self.capacity:
+            for dst, src in cols:
+                dst[:] = src[-self.capacity:]
+            self._head, self._count = 0, self.capacity
+            return
+        first = min(n, self.capacity - self._head)
+        for dst, src in cols:
+            dst[self._head:self._head + first] = src[:first]
+            dst[:n - first] = src[first:]
+        self._head = (self._head + n) % self.capacity
+        self._count = min(self._count + n, self.capacity)
+
+    def arrays(self):
+        """(t_us, duty, voltage), oldest first."""
+        if self._count < self.capacity:
+            return self._t[:self._count], self._duty[:self._count], self._v[:self._count]
+        order = np.r_[self._head:self.capacity, 0:self._head]
+        return self._t[order], self._duty[order], self._v[order]
+
+
+# ---------- Transfer curve ----------
+def duty_means(duty, voltage):
+    """(duties, mean voltage, count) for every duty present."""
+    duty = np.asarray(duty, dtype=np.int64)
+    voltage = np.asarray(voltage, dtype=np.float64)
+    ok = duty >= 0
+    n = np.bincount(duty[ok])
+    s = np.bincount(duty[ok], weights=voltage[ok])
+    used = np.flatnonzero(n)
+    return used, s[used] / n[used], n[used]
+
+
+def fit_transfer(duties, means, counts=None, vref: Optional[float] = None, duty_max: int = DUTY_MAX) -> dict:
+    """
+    Rails and a weighted least-squares line over the unsaturated part of the curve.
+
+    A point counts as saturated when it lies within `tol` of the lowest or
+    highest mean, tol being 2 % of the swing (at least a few noise sigmas).
+    """
+    x = np.asarray(duties, dtype=np.float64)
+    y = np.asarray(means, dtype=np.float64)
+    w = np.ones_like(y) if counts is None else np.asarray(counts, dtype=np.float64)
+    out = dict(gain=None, slope_v=None, offset_v=None, r2=None, linearity_v=None, linearity_pct=None,
+               rail_lo=None, rail_hi=None, sat_lo_duty=None, sat_hi_duty=None)
+    if len(x) < 3:
+        return out
+    lo, hi = float(y.min()), float(y.max())
+    noise = float(np.median(np.abs(np.diff(y)))) if len(y) > 2 else 0.0
+    tol = max(0.02 * (hi - lo), 3 * noise, 1e-6)
+    linear = (y > lo + tol) & (y < hi - tol)
+    if linear.sum() < 3:
+        linear = np.ones_like(y, dtype=bool)
+    xl, yl, wl = x[linear], y[linear], w[linear]
+    sw = np.sqrt(wl)
+    (slope, offset), *_ = np.linalg.lstsq(np.column_stack((xl, np.ones_like(xl))) * sw[:, None], yl * sw, rcond=None)
+    resid = yl - (slope * xl + offset)
+    ss_tot = float(np.sum(wl * (yl - np.average(yl, weights=wl)) ** 2))
+    span = float(yl.max() - yl.min())
+    out.update(slope_v=float(slope), offset_v=float(offset),
+               r2=1.0 - float(np.sum(wl * resid ** 2)) / ss_tot if ss_tot > 0 else None,
+               linearity_v=float(np.abs(resid).max()),
+               linearity_pct=100.0 * float(np.abs(resid).max()) / span if span > 0 else None,
+               rail_lo=lo, rail_hi=hi)
+    if vref:
+        out["gain"] = float(slope) * duty_max / vref
+    if slope != 0:
+        # a rail is 'reached' when saturated points exist at that end of the curve
+        if (y <= lo + tol)[x < np.median(x)].sum() > 1:
+            out["sat_lo_duty"] = float((lo - offset) / slope)
+        if (y >= hi - tol)[x > np.median(x)].sum() > 1:
+            out["sat_hi_duty"] = float((hi - offset) / slope)
+    return out
+
+
+# ---------- Dynamics ----------
+def sample_spacing_us(t_us) -> Optional[float]:
+    """Median spacing of device timestamps (32-bit wrap handled); None without timestamps."""
+    t = np.asarray(t_us, dtype=np.int64)
+    if len(t) < 2 or (t < 0).any():
+        return None
+    dt = np.diff(t) % T_WRAP
+    dt = dt[dt > 0]
+    return float(np.median(dt)) if len(dt) else None
+
+
+def fit_settling(duty, voltage, curve: dict) -> Optional[float]:
+    """
+    Per-sample settling fraction a in v[n] - v[n-1] = a * (target[n] - v[n-1]),
+    target being the fitted line clipped to the rails. None when the run has
+    too little movement to tell.
+    """
+    if curve.get("slope_v") is None or len(voltage) < 3:
+        return None
+    v = np.asarray(voltage, dtype=np.float64)
+    target = np.clip(curve["offset_v"] + curve["slope_v"] * np.asarray(duty, dtype=np.float64),
+                     curve["rail_lo"], curve["rail_hi"])
+    # sample n is taken after duty n was applied: it moved towards target[n]
+    err = target[1:] - v[:-1]
+    step = np.diff(v)
+    den = float(np.dot(err, err))
+    if den <= 0:
+        return None
+    a = float(np.dot(err, step)) / den
+    return a if 0.0 < a <= 1.0 else None
+
+
+def slew_rate(voltage, dt_us: Optional[float]) -> Optional[float]:
+    """99th percentile of |dv/dt| in V/ms (per sample when dt is unknown)."""
+    v = np.asarray(voltage, dtype=np.float64)
+    if len(v) < 2:
+        return None
+    per_sample = float(np.percentile(np.abs(np.diff(v)), 99))
+    return per_sample / (dt_us / 1000.0) if dt_us else per_sample
+
+
+# ---------- Whole analysis ----------
+def analyze(duty, voltage, t_us=None, vref: Optional[float] = None, curve_source=None,
+            limits: Limits = Limits()) -> OpampAnalysis:
+    """
+    :param duty, voltage, t_us: time series, oldest first (t_us optional)
+    :param vref: full-scale voltage of the PWM DAC, for the dimensionless gain
+    :param curve_source: (duties, means, counts) to fit instead of the series'
+                         own per-duty means (e.g. BucketedStats over the whole run)
+    """
+    duty = np.asarray(duty)
+    voltage = np.asarray(voltage, dtype=np.float64)
+    if curve_source is None:
+        curve_source = duty_means(duty, voltage)
+    curve = fit_transfer(*curve_source, vref=vref)
+    dt_us = sample_spacing_us(t_us) if t_us is not None else None
+    alpha = fit_settling(duty, voltage, curve)
+    tau = settle = None
+    if alpha is not None and dt_us:
+        tau = dt_us / -math.log(1.0 - alpha) if alpha < 1.0 else 0.0
+        settle = tau * math.log(100.0)
+    result = OpampAnalysis(samples=len(voltage), step_alpha=alpha, dt_us=dt_us, tau_us=tau, settle_us=settle,
+                           slew_v_per_ms=slew_rate(voltage, dt_us), **curve)
+    verdict, reasons = classify(result, vref, limits)
+    return result._replace(verdict=verdict, reasons=tuple(reasons))
+
+
+def classify(result: OpampAnalysis, vref: Optional[float], limits: Limits = Limits()):
+    """('PASS' | 'FAIL' | 'n/a', [reasons])."""
+    if result.slope_v is None:
+        return "n/a", ["not enough duty steps to fit a transfer curve"]
+    reasons = []
+    if result.gain is not None and abs(result.gain - 1.0) > limits.gain_tol:
+        reasons.append(f"gain {result.gain:.3f} outside 1 ± {limits.gain_tol:g}")
+    if abs(result.offset_v) > limits.offset_v:
+        reasons.append(f"offset {result.offset_v * 1000:.0f} mV exceeds {limits.offset_v * 1000:.0f} mV")
+    if result.linearity_pct is not None and result.linearity_pct > limits.linearity_pct:
+        reasons.append(f"linearity error {result.linearity_pct:.2f} % exceeds {limits.linearity_pct:g} %")
+    if vref and result.rail_hi is not None \
+            and 100.0 * (result.rail_hi - result.rail_lo) / vref < limits.min_swing_pct:
+        reasons.append(f"output swing {result.rail_lo:.2f}–{result.rail_hi:.2f} V below "
+                       f"{limits.min_swing_pct:g} % of {vref:g} V")
+    if result.settle_us is not None and result.settle_us > limits.max_settle_us:
+        reasons.append(f"settling {result.settle_us:.0f} µs exceeds {limits.max_settle_us:g} µs")
+    return ("FAIL" if reasons else "PASS"), reasons
+
+
+def format_report(result: OpampAnalysis) -> str:
+    """Multi-line summary for the results label."""
+    def f(v, fmt, unit=""):
+        return "—" if v is None else f"{v:{fmt}}{unit}"
+
+    lines = [
+        f"Verdict: {result.verdict}   ({result.samples:,} samples)",
+        f"Gain: {f(result.gain, '.4f')}   Slope: {f(None if result.slope_v is None else result.slope_v * 1000, '.3f', ' mV/step')}"
+        f"   Offset: {f(None if result.offset_v is None else result.offset_v * 1000, '.1f', ' mV')}",
+        f"Linearity: {f(None if result.linearity_v is None else result.linearity_v * 1000, '.1f', ' mV')}"
+        f" ({f(result.linearity_pct, '.2f', ' %')})   R²: {f(result.r2, '.5f')}",
+        f"Rails: {f(result.rail_lo, '.3f', ' V')} / {f(result.rail_hi, '.3f', ' V')}"
+        f"   (reached at duty {f(result.sat_lo_duty, '.0f')} / {f(result.sat_hi_duty, '.0f')})",
+        f"Settling: τ {f(result.tau_us, '.1f', ' µs')}, 1 % in {f(result.settle_us, '.1f', ' µs')}"
+        f"   Slew: {f(result.slew_v_per_ms, '.2f', ' V/ms' if result.dt_us else ' V/sample')}",
+    ]
+    lines += [f"  • {r}" for r in result.reasons]
+    return "\n".join(lines)
+
+
+def export(path: str, result: OpampAnalysis, curve: Optional[Dict[str, np.ndarray]] = None) -> None:
+    """
+    Write the analysis: .csv gets the metrics then the per-duty curve table,
+    anything else JSON with 'analysis' and 'curve' keys.
+    """
+    curve = curve or {}
+    columns: List[str] = list(curve)
+    rows = list(zip(*(np.asarray(curve[c]).tolist() for c in columns))) if columns else []
+    if path.lower().endswith(".csv"):
+        with open(path, "w", newline="", encoding="utf-8") as f:
+            w = csv.writer(f)
+            w.writerow(["metric", "value"])
+            for k, v in result.as_dict().items():
+                w.writerow([k, "; ".join(v) if isinstance(v, list) else ("" if v is None else v)])
+            if columns:
+                w.writerow([])
+                w.writerow(columns)
+                w.writerows(rows)
+        return
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump({"analysis": result.as_dict(), "curve": [dict(zip(columns, r)) for r in rows]}, f, indent=2)
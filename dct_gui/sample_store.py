@@ -0,0 +1,232 @@
+# sample_store.py
+import argparse
+import os
+import queue
+import sys
+import threading
+import time
+from typing import Optional
+import numpy as np
+from events import PwmEvent
+
+"""
+Binary store of op-amp (pwm) samples, one file per recording, for complete long runs.
+
+File layout: MAGIC, the recording start (wall clock, i64 microseconds since
+the epoch), then fixed-size RECORD entries of (t_us:i64, duty:i32, voltage:f32).
+t_us is the device timestamp when the firmware sends one, otherwise host
+monotonic microseconds since the recording started.
+
+SampleWriter.record() packs samples into a preallocated chunk; full chunks are
+written by a background thread, so the caller never waits on the disk and RAM
+is bounded by chunk_records * max_pending. flush_async() gets everything
+recorded so far onto the disk without blocking and reports back through a
+callback. SampleStore maps a file read-only and exposes its columns as numpy
+arrays without loading it.
+"""
+
+MAGIC = b"DCTPWM1\n"
+HEADER_SIZE = 16
+RECORD = np.dtype([("t_us", "<i8"), ("duty", "<i4"), ("voltage", "<f4")])
+
+
+class SampleWriter:
+    """
+    Chunked writer; record() is called from the serial reader thread, flush()
+    and close() from the GUI thread.
+    """
+
+    def __init__(self, path, chunk_records: int = 65536, max_pending: int = 32):
+        """
+        :param chunk_records: samples per chunk handed to the writer thread
+        :param max_pending: chunks waiting for the disk before new ones are dropped
+        """
+        self.path = path
+        # one file per recording: an existing file is replaced, never appended to
+        self._file = open(path, "wb")
+        header = np.array([time.time_ns() // 1000], dtype="<i8").tobytes()
+        self._file.write(MAGIC + header)
+        self._t0 = time.monotonic_ns()
+        self._chunk_records = chunk_records
+        self._chunk = np.empty(chunk_records, dtype=RECORD)
+        self._fill = 0
+        self._lock = threading.Lock()
+        self._pending = queue.Queue(maxsize=max_pending)
+        self._queued = 0     # chunks handed to the writer thread
+        self._written = 0    # chunks it has finished with
+        self._waiters = []   # [(chunks queued at the time, callback)] from flush_async()
+        self.count = 0      # samples accepted
+        self.dropped = 0    # samples lost because the disk fell behind
+        self.error: Optional[OSError] = None
+        self._thread = threading.Thread(target=self._run, args=(self._file,), name="sample-writer", daemon=True)
+        self._thread.start()
+
+    # ---------- Producer side ----------
+    def record(self, events) -> None:
+        """Store the PwmEvents among decoded events (others are ignored)."""
+        samples = [e for e in events if type(e) is PwmEvent]
+        if not samples:
+            return
+        host_us = (time.monotonic_ns() - self._t0) // 1000
+        t_us = np.array([host_us if e.t_us is None else e.t_us for e in samples], dtype=np.int64)
+        duty = np.array([e.duty for e in samples], dtype=np.int32)
+        voltage = np.array([e.voltage for e in samples], dtype=np.float32)
+        with self._lock:
+            if self._file is None:
+                return
+            done = 0
+            while done < len(samples):
+                if self._fill == self._chunk_records:
+                    self._hand_off()
+                n = min(len(samples) - done, self._chunk_records - self._fill)
+                dst = self._chunk[self._fill:self._fill + n]
+                dst["t_us"] = t_us[done:done + n]
+                dst["duty"] = duty[done:done + n]
+                dst["voltage"] = voltage[done:done + n]
+                self._fill += n
+                done += n
+            self.count += len(samples)
+
+    def _hand_off(self) -> None:
+        # caller holds the lock
+        if self._fill == 0:
+            return
+        try:
+            self._pending.put_nowait(self._chunk[:self._fill].copy())
+            self._queued += 1
+        except queue.Full:
+            self.dropped += self._fill
+        self._fill = 0
+
+    # ---------- Writer thread ----------
+    def _run(self, f) -> None:
+        while True:
+            chunk = self._pending.get()
+            try:
+                if chunk is None:
+                    break
+                f.write(chunk.tobytes())
+            except OSError as e:
+                self.error = e
+                self.dropped += len(chunk)
+            finally:
+                self._pending.task_done()
+            with self._lock:
+                self._written += 1
+                done = [cb for n, cb in self._waiters if n <= self._written]
+                self._waiters = [(n, cb) for n, cb in self._waiters if n > self._written]
+            if done:
+                self._notify(f, done)
+
+    def _notify(self, f, callbacks) -> None:
+        try:
+            f.flush()
+        except OSError as e:
+            self.error = e
+        for callback in callbacks:
+            callback()
+
+    # ---------- Control ----------
+    def flush_async(self, callback) -> bool:
+        """
+        Hand the partial chunk to the writer without waiting; callback() runs
+        (on the writer thread, or right here if nothing is pending) once every
+        sample recorded so far is on disk. Returns False if the writer is closed.
+        """
+        with self._lock:
+            f = self._file
+            if f is None:
+                return False
+            self._hand_off()
+            pending = self._written < self._queued
+            if pending:
+                self._waiters.append((self._queued, callback))
+        if not pending:
+            self._notify(f, [callback])
+        return True
+
+    def flush(self) -> None:
+        """Hand the partial chunk to the writer and wait until it is on disk."""
+        with self._lock:
+            f = self._file
+            if f is None:
+                return
+            self._hand_off()
+        self._pending.join()
+        f.flush()
+
+    def close(self) -> None:
+        """Write everything recorded so far and close the file."""
+        self.flush()
+        with self._lock:
+            f, self._file = self._file, None
+        if f is None:
+            return
+        self._pending.put(None)
+        self._thread.join()
+        f.close()
+
+
+class SampleStore:
+    """
+    Read-only memory-mapped view of a sample file.
+
+        store = SampleStore("run.dpwm")
+        store.voltage[1_000_000:1_000_100].mean()
+    """
+
+    def __init__(self, path):
+        self.path = path
+        with open(path, "rb") as f:
+            head = f.read(HEADER_SIZE)
+        if len(head) != HEADER_SIZE or head[:len(MAGIC)] != MAGIC:
+            raise ValueError(f"{path} is not a DCT sample file")
+        self.started_us = int(np.frombuffer(head[len(MAGIC):], dtype="<i8")[0])
+        n = (os.path.getsize(path) - HEADER_SIZE) // RECORD.itemsize  # ignores a torn last record
+        self.records = np.memmap(path, dtype=RECORD, mode="r", offset=HEADER_SIZE, shape=(n,)) if n else \
+            np.empty(0, dtype=RECORD)
+
+    def __len__(self):
+        return len(self.records)
+
+    @property
+    def t_us(self) -> np.ndarray:
+        return self.records["t_us"]
+
+    @property
+    def duty(self) -> np.ndarray:
+        return self.records["duty"]
+
+    @property
+    def voltage(self) -> np.ndarray:
+        return self.records["voltage"]
+
+    def close(self) -> None:
+        # the map is released once no column views are left
+        self.records = np.empty(0, dtype=RECORD)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Summarize a DCT pwm sample file")
+    ap.add_argument("samples", help="file written by SampleWriter")
+    args = ap.parse_args(argv)
+
+    with SampleStore(args.samples) as store:
+        if not len(store):
+            print("no samples")
+            return 0
+        v = store.voltage
+        span = (int(store.t_us[-1]) - int(store.t_us[0])) / 1e6
+        print(f"{len(store)} samples over {span:.3f} s; voltage min {v.min():.3f} V, "
+              f"max {v.max():.3f} V, mean {v.mean(dtype=np.float64):.3f} V")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
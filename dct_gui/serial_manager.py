@@ -0,0 +1,130 @@
+# serial_manager.py
+import queue
+import threading
+from collections import OrderedDict
+from test_runner import TestRunner
+
+
+class SerialManager:
+    """
+    Own one TestRunner per DCT board on the bench.
+
+    Every runner reads on its own SerialReader thread (blocked in I/O, so boards
+    scale independently); received lines are tagged with their device ID and
+    merged into one thread-safe queue.
+
+      - add_device(port, device_id): connect and start reading a board
+      - receive_events(): drain [(device_id, line), ...]
+      - broadcast(cmd) / start_all() / stop_all() / detect_all(): aggregate control
+      - close_all(): safe teardown
+    """
+
+    def __init__(self, baudrate=9600, timeout=0.05, binary=False, handshake_timeout=2.0):
+        """
+        :param baudrate: baud used for every board (int)
+        :param timeout: per-port read timeout in seconds
+        :param binary: negotiate the framed binary stream on each board
+        :param handshake_timeout: longest wait for each board to answer on connect
+        """
+        self.baudrate = baudrate
+        self.timeout = timeout
+        self.binary = binary
+        self.handshake_timeout = handshake_timeout
+        self.runners = OrderedDict()  # device_id -> TestRunner
+        self.on_events = None  # optional callable, invoked from reader threads
+        self._events = queue.Queue()
+        self._notified = threading.Event()
+
+    # ---------- Devices ----------
+    def add_device(self, port, device_id=None):
+        """
+        Connect a board and start its reader. Returns the device ID (default: port).
+        """
+        device_id = device_id or port
+        if device_id in self.runners:
+            raise ValueError(f"device {device_id!r} already attached")
+        runner = TestRunner(port=port, baudrate=self.baudrate, timeout=self.timeout)
+        runner.connect(binary=self.binary, handshake_timeout=self.handshake_timeout)
+        # lines read during the handshake (including the status reply) wait in the
+        # runner's inbox, which the sink below bypasses: forward them first
+        handshake = runner.receive_lines(max_lines=None)
+        if handshake:
+            self._deliver(device_id, handshake)
+        runner.start_reader(sink=lambda lines, d=device_id: self._deliver(d, lines))
+        self.runners[device_id] = runner
+        return device_id
+
+    def remove_device(self, device_id):
+        runner = self.runners.pop(device_id, None)
+        if runner is not None:
+            runner.close_connection()
+
+    def close_all(self):
+        for device_id in list(self.runners):
+            self.remove_device(device_id)
+
+    def devices(self):
+        return list(self.runners)
+
+    def runner(self, device_id):
+        return self.runners[device_id]
+
+    def failed_devices(self):
+        """Devices whose reader stopped on an I/O error: {device_id: exception}."""
+        return {d: r.last_error for d, r in self.runners.items() if r.last_error is not None}
+
+    # ---------- Aggregate control ----------
+    def broadcast(self, command, devices=None):
+        """Queue a command on every (or the given) device. Returns {device_id: ok}."""
+        targets = self.runners if devices is None else devices
+        return {d: self.runners[d].send_command(command) for d in targets}
+
+    def start_all(self, command="start_loaded", devices=None):
+        return self.broadcast(command, devices)
+
+    def stop_all(self, devices=None):
+        return self.broadcast("stop", devices)
+
+    def detect_all(self, timeout=1.0, callback=None, devices=None):
+        """
+        Request 'detect' on every board. Returns {device_id: Future}.
+
+        :param callback: optional callable(device_id, future) per reply or timeout
+        """
+        targets = self.runners if devices is None else devices
+        futures = {}
+        for d in targets:
+            cb = None if callback is None else (lambda fut, d=d: callback(d, fut))
+            futures[d] = self.runners[d].request("detect", timeout=timeout, callback=cb)
+        return futures
+
+    def resolve_reply(self, device_id, data):
+        """Route a decoded event to its board's pending-request table."""
+        runner = self.runners.get(device_id)
+        return runner.resolve_reply(data) if runner is not None else False
+
+    def expire_requests(self):
+        return sum(r.expire_requests() for r in self.runners.values())
+
+    # ---------- Events ----------
+    def receive_events(self, max_events=None):
+        """
+        Drain tagged lines from all boards. Returns list[(device_id, line)].
+        """
+        self._notified.clear()
+        out = []
+        while max_events is None or len(out) < max_events:
+            try:
+                out.append(self._events.get_nowait())
+            except queue.Empty:
+                break
+        return out
+
+    def _deliver(self, device_id, lines):
+        """Sink for every runner's reader thread."""
+        for line in lines:
+            self._events.put((device_id, line))
+        on_events = self.on_events
+        if on_events is not None and not self._notified.is_set():
+            self._notified.set()
+            on_events()
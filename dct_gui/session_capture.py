@@ -0,0 +1,181 @@
+# session_capture.py
+import argparse
+import json
+import mmap
+import os
+import struct
+import sys
+import threading
+import time
+from datetime import datetime
+
+"""
+Append-only capture of serial sessions, and memory-mapped replay.
+
+File layout: MAGIC, then records of RECORD header + payload, where the header is
+(t_ns:u64 monotonic since session start, direction:u8, length:u16). Each
+recording session starts with a MARK record holding the wall-clock start time,
+so several sessions can share one file.
+"""
+
+MAGIC = b"DCTCAP1\n"
+RECORD = struct.Struct("<QBH")
+
+RX = 0    # line received from the MCU
+TX = 1    # command sent to the MCU
+MARK = 2  # session start marker
+
+MAX_PAYLOAD = 0xFFFF
+
+
+class SessionRecorder:
+    """
+    Thread-safe writer; TestRunner calls record() from its reader thread (RX)
+    and from whichever thread sends commands (TX).
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._lock = threading.Lock()
+        self._file = open(path, "ab", buffering=64 * 1024)
+        if self._file.tell() == 0:
+            self._file.write(MAGIC)
+        self._t0 = time.monotonic_ns()
+        self.count = 0
+        self._write(MARK, datetime.now().isoformat(timespec="seconds").encode("ascii"))
+
+    def record(self, direction, items):
+        """
+        :param direction: RX or TX
+        :param items: iterable of lines (str) or decoded binary-mode events (dict)
+        """
+        with self._lock:
+            if self._file is None:
+                return
+            for item in items:
+                text = item if isinstance(item, str) else json.dumps(item, separators=(",", ":"))
+                self._write(direction, text.rstrip("\n").encode("utf-8"))
+
+    def _write(self, direction, payload):
+        payload = payload[:MAX_PAYLOAD]
+        self._file.write(RECORD.pack(time.monotonic_ns() - self._t0, direction, len(payload)))
+        self._file.write(payload)
+        self.count += 1
+
+    def flush(self):
+        with self._lock:
+            if self._file is not None:
+                self._file.flush()
+
+    def close(self):
+        with self._lock:
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+
+
+class SessionReplay:
+    """
+    Read a capture through a memory map; records are decoded lazily in order.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._fh = open(path, "rb")
+        size = os.fstat(self._fh.fileno()).st_size
+        self._map = mmap.mmap(self._fh.fileno(), 0, access=mmap.ACCESS_READ) if size else b""
+        if self._map[:len(MAGIC)] != MAGIC:
+            self.close()
+            raise ValueError(f"{path} is not a DCT capture file")
+
+    def close(self):
+        if isinstance(self._map, mmap.mmap):
+            self._map.close()
+        self._map = b""
+        self._fh.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def records(self, directions=(RX, TX, MARK)):
+        """Yield (t_ns, direction, text) for every record, in file order."""
+        buf = self._map
+        unpack = RECORD.unpack_from
+        hdr = RECORD.size
+        pos = len(MAGIC)
+        end = len(buf)
+        while pos + hdr <= end:
+            t_ns, direction, length = unpack(buf, pos)
+            pos += hdr
+            if direction in directions:
+                yield t_ns, direction, buf[pos:pos + length].decode("utf-8", "ignore")
+            pos += length
+
+    def lines(self):
+        """Just the received lines, as fast as possible."""
+        return (text for _, _, text in self.records((RX,)))
+
+    def replay(self, handler, realtime=False, speed=1.0):
+        """
+        Feed every received line to handler(line).
+
+        :param realtime: sleep so lines arrive with their recorded spacing (/ speed)
+        Returns the number of lines replayed.
+        """
+        n = 0
+        if not realtime:
+            for line in self.lines():
+                handler(line)
+                n += 1
+            return n
+        for line, due in self.paced(speed):
+            wait = due - time.monotonic()
+            if wait > 0:
+                time.sleep(wait)
+            handler(line)
+            n += 1
+        return n
+
+    def paced(self, speed=1.0, start=None):
+        """
+        Yield (line, due) for received lines, where due is the time.monotonic()
+        deadline at which the line would have arrived (sessions restart the clock).
+        """
+        base = time.monotonic() if start is None else start
+        offset = 0.0
+        last = 0.0
+        for t_ns, direction, text in self.records((RX, MARK)):
+            t = t_ns / 1e9 / speed
+            if direction == MARK:
+                offset = last  # next session continues where the previous one ended
+                continue
+            last = offset + t
+            yield text, base + last
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Inspect or benchmark a DCT serial capture")
+    ap.add_argument("capture", help="capture file written by SessionRecorder")
+    ap.add_argument("--dump", action="store_true", help="print every record")
+    args = ap.parse_args(argv)
+
+    names = {RX: "<-", TX: "->", MARK: "=="}
+    counts = {RX: 0, TX: 0, MARK: 0}
+    start = time.perf_counter()
+    with SessionReplay(args.capture) as cap:
+        for t_ns, direction, text in cap.records():
+            counts[direction] = counts.get(direction, 0) + 1
+            if args.dump:
+                print(f"{t_ns / 1e9:12.6f} {names.get(direction, '??')} {text}")
+    elapsed = time.perf_counter() - start
+    total = sum(counts.values())
+    print(f"{counts[MARK]} session(s), {counts[RX]} received, {counts[TX]} sent; "
+          f"decoded {total} records in {elapsed * 1e3:.1f} ms")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,304 @@
+# stream_stats.py
+import math
+from typing import Dict, Optional, Sequence
+import numpy as np
+
+"""
+Streaming statistics for op-amp measurements, O(1) memory per series.
+
+Samples are folded into running moments as they arrive (Welford's update for
+single samples, Chan's pairwise merge for batches), so mean, variance and RMS
+never need the history. Percentiles come from a fixed-size histogram whose
+range widens by merging bin pairs, and per-duty-cycle stats keep one set of
+moments per duty bucket in flat arrays.
+"""
+
+
+class RunningStats:
+    """
+    Count, mean, variance, RMS, min and max of a stream.
+
+        s = RunningStats()
+        s.add(1.0); s.extend([2.0, 3.0])
+        s.mean, s.std, s.rms   # -> 2.0, 0.816..., 2.160...
+    """
+
+    def __init__(self):
+        self.count = 0
+        self.mean = 0.0
+        self.m2 = 0.0       # sum of squared deviations from the mean
+        self.sum_sq = 0.0   # for RMS
+        self.min: Optional[float] = None
+        self.max: Optional[float] = None
+
+    def add(self, x: float) -> None:
+        x = float(x)
+        self.count += 1
+        delta = x - self.mean
+        self.mean += delta / self.count
+        self.m2 += delta * (x - self.mean)
+        self.sum_sq += x * x
+        self.min = x if self.min is None or x < self.min else self.min
+        self.max = x if self.max is None or x > self.max else self.max
+
+    def extend(self, values) -> None:
+        """Fold in a batch at once (same result as add() per value)."""
+        arr = np.asarray(values, dtype=np.float64).reshape(-1)
+        if len(arr) == 0:
+            return
+        mean = float(arr.mean())
+        self._merge(len(arr), mean, float(np.square(arr - mean).sum()), float(np.dot(arr, arr)),
+                    float(arr.min()), float(arr.max()))
+
+    def merge(self, other: "RunningStats") -> None:
+        if other.count:
+            self._merge(other.count, other.mean, other.m2, other.sum_sq, other.min, other.max)
+
+    def _merge(self, n, mean, m2, sum_sq, lo, hi):
+        total = self.count + n
+        delta = mean - self.mean
+        self.mean += delta * n / total
+        self.m2 += m2 + delta * delta * self.count * n / total
+        self.count = total
+        self.sum_sq += sum_sq
+        self.min = lo if self.min is None else min(self.min, lo)
+        self.max = hi if self.max is None else max(self.max, hi)
+
+    @property
+    def variance(self) -> float:
+        """Sample variance (n - 1); 0 for fewer than two samples."""
+        return self.m2 / (self.count - 1) if self.count > 1 else 0.0
+
+    @property
+    def std(self) -> float:
+        return math.sqrt(self.variance)
+
+    @property
+    def rms(self) -> float:
+        return math.sqrt(self.sum_sq / self.count) if self.count else 0.0
+
+
+class QuantileSketch:
+    """
+    Approximate percentiles in fixed memory.
+
+    A histogram of `bins` equal bins that starts narrow around the first values
+    and doubles its range (merging neighbouring bins) whenever a value falls
+    outside, so the error is at most one bin width: range / bins.
+    """
+
+    def __init__(self, bins: int = 1024):
+        self.bins = bins + (bins & 1)  # even, so bin pairs merge cleanly
+        self.counts = np.zeros(self.bins, dtype=np.int64)
+        self.lo = None      # left edge of bin 0
+        self.width = 0.0
+        self.count = 0
+        self.min = self.max = None  # exact extremes, to clamp the estimates
+
+    def add(self, x: float) -> None:
+        x = float(x)
+        if self.lo is None or not (self.lo <= x < self.lo + self.bins * self.width) or not math.isfinite(x):
+            self.extend((x,))
+            return
+        self.counts[min(int((x - self.lo) / self.width), self.bins - 1)] += 1
+        self.count += 1
+        self.min = x if x < self.min else self.min
+        self.max = x if x > self.max else self.max
+
+    def extend(self, values) -> None:
+        arr = np.asarray(values, dtype=np.float64).reshape(-1)
+        arr = arr[np.isfinite(arr)]
+        if len(arr) == 0:
+            return
+        lo, hi = float(arr.min()), float(arr.max())
+        self.min = lo if self.min is None else min(self.min, lo)
+        self.max = hi if self.max is None else max(self.max, hi)
+        if self.lo is None:
+            self.width = max(hi - lo, abs(hi) * 1e-6, 1e-9) / (self.bins - 1)
+            self.lo = lo
+        while lo < self.lo:
+            self._widen(downwards=True)
+        while hi >= self.lo + self.bins * self.width:
+            self._widen(downwards=False)
+        idx = ((arr - self.lo) / self.width).astype(np.int64)
+        np.clip(idx, 0, self.bins - 1, out=idx)
+        self.counts += np.bincount(idx, minlength=self.bins)
+        self.count += len(arr)
+
+    def _widen(self, downwards: bool) -> None:
+        pairs = self.counts.reshape(-1, 2).sum(axis=1)
+        self.counts[:] = 0
+        half = self.bins // 2
+        if downwards:
+            self.lo -= self.bins * self.width
+            self.counts[half:] = pairs
+        else:
+            self.counts[:half] = pairs
+        self.width *= 2
+
+    def quantile(self, q: float) -> Optional[float]:
+        """Value below which a fraction q (0..1) of the samples lie; None when empty."""
+        if self.count == 0:
+            return None
+        target = max(min(max(q, 0.0), 1.0) * self.count, 1e-9)  # q=0: the first non-empty bin
+        cum = np.cumsum(self.counts)
+        i = min(int(np.searchsorted(cum, target, side="left")), self.bins - 1)
+        before = cum[i - 1] if i else 0
+        inside = self.counts[i]
+        frac = (target - before) / inside if inside else 0.0
+        return float(min(max(self.lo + (i + frac) * self.width, self.min), self.max))
+
+    def quantiles(self, qs: Sequence[float]) -> Dict[float, Optional[float]]:
+        return {q: self.quantile(q) for q in qs}
+
+
+class BucketedStats:
+    """
+    Count, mean, std, RMS, min and max per integer key bucket (e.g. PWM duty),
+    kept in flat arrays that grow to the largest key seen.
+    """
+
+    def __init__(self, bucket_width: int = 1):
+        self.bucket_width = max(int(bucket_width), 1)
+        self.count = np.zeros(0, dtype=np.int64)
+        self.mean = np.zeros(0)
+        self.m2 = np.zeros(0)
+        self.sum_sq = np.zeros(0)
+        self.min = np.zeros(0)
+        self.max = np.zeros(0)
+
+    def _grow(self, size: int) -> None:
+        extra = size - len(self.count)
+        if extra <= 0:
+            return
+        self.count = np.concatenate((self.count, np.zeros(extra, dtype=np.int64)))
+        for name, fill in (("mean", 0.0), ("m2", 0.0), ("sum_sq", 0.0), ("min", np.inf), ("max", -np.inf)):
+            setattr(self, name, np.concatenate((getattr(self, name), np.full(extra, fill))))
+
+    def add(self, key: int, value: float) -> None:
+        b = int(key) // self.bucket_width
+        if b < 0:
+            return
+        if b >= len(self.count):
+            self._grow(b + 1)
+        x = float(value)
+        n = int(self.count[b]) + 1
+        mean = float(self.mean[b])
+        delta = x - mean
+        mean += delta / n
+        self.count[b] = n
+        self.mean[b] = mean
+        self.m2[b] += delta * (x - mean)
+        self.sum_sq[b] += x * x
+        if x < self.min[b]:
+            self.min[b] = x
+        if x > self.max[b]:
+            self.max[b] = x
+
+    def extend(self, keys, values) -> None:
+        """Fold in parallel key/value batches; negative keys are ignored."""
+        keys = np.asarray(keys, dtype=np.int64).reshape(-1)
+        values = np.asarray(values, dtype=np.float64).reshape(-1)
+        n = min(len(keys), len(values))
+        keys, values = keys[:n], values[:n]
+        ok = keys >= 0
+        if not ok.all():
+            keys, values = keys[ok], values[ok]
+        if len(keys) == 0:
+            return
+        b = keys // self.bucket_width
+        size = int(b.max()) + 1
+        self._grow(size)
+        n_b = np.bincount(b, minlength=size)
+        mean_b = np.bincount(b, weights=values, minlength=size) / np.maximum(n_b, 1)
+        m2_b = np.bincount(b, weights=np.square(values - mean_b[b]), minlength=size)
+        # Chan's merge of the batch moments into the stored ones
+        n_a = self.count[:size]
+        total = n_a + n_b
+        delta = mean_b - self.mean[:size]
+        safe = np.maximum(total, 1)
+        self.mean[:size] += delta * n_b / safe
+        self.m2[:size] += m2_b + delta * delta * n_a * n_b / safe
+        self.count[:size] = total
+        self.sum_sq[:size] += np.bincount(b, weights=values * values, minlength=size)
+        np.minimum.at(self.min, b, values)
+        np.maximum.at(self.max, b, values)
+
+    def keys(self) -> np.ndarray:
+        """First key of every non-empty bucket."""
+        return np.flatnonzero(self.count) * self.bucket_width
+
+    def table(self) -> Dict[str, np.ndarray]:
+        """Per non-empty bucket: key, count, mean, std, rms, min, max."""
+        used = np.flatnonzero(self.count)
+        n = self.count[used]
+        return {
+            "key": used * self.bucket_width,
+            "count": n,
+            "mean": self.mean[used],
+            "std": np.sqrt(np.where(n > 1, self.m2[used] / np.maximum(n - 1, 1), 0.0)),
+            "rms": np.sqrt(self.sum_sq[used] / n),
+            "min": self.min[used],
+            "max": self.max[used],
+        }
+
+
+class OpampStats:
+    """
+    Everything the op-amp page reports for one run: host-side stats of the
+    streamed PWM samples (overall, percentiles, per duty) plus the running
+    health figures the device reports on its own.
+    """
+
+    PERCENTILES = (0.01, 0.05, 0.5, 0.95, 0.99)
+
+    def __init__(self, duty_bucket: int = 1, sketch_bins: int = 1024):
+        self.voltage = RunningStats()
+        self.sketch = QuantileSketch(sketch_bins)
+        self.by_duty = BucketedStats(duty_bucket)
+        self.last = None        # (duty, voltage) of the newest sample
+        self.health_count = 0
+        self.health_min: Optional[float] = None
+        self.health_max: Optional[float] = None
+        self.health_avg = RunningStats()  # over the reported averages
+
+    def add(self, duty: int, voltage: float) -> None:
+        """One PWM sample, O(1)."""
+        self.voltage.add(voltage)
+        self.sketch.add(voltage)
+        self.by_duty.add(duty, voltage)
+        self.last = (duty, voltage)
+
+    def extend(self, duty, voltage) -> None:
+        """A batch of PWM samples (parallel sequences), folded in with array ops."""
+        if len(voltage) == 0:
+            return
+        volts = np.asarray(voltage, dtype=np.float64)
+        self.voltage.extend(volts)
+        self.sketch.extend(volts)
+        self.by_duty.extend(duty, volts)
+        self.last = (duty[-1], voltage[-1])
+
+    def add_health(self, min_v: Optional[float], max_v: Optional[float], avg_v: Optional[float]) -> None:
+        """A device health report (any field may be missing)."""
+        self.health_count += 1
+        if min_v is not None:
+            self.health_min = min_v if self.health_min is None else min(self.health_min, min_v)
+        if max_v is not None:
+            self.health_max = max_v if self.health_max is None else max(self.health_max, max_v)
+        if avg_v is not None:
+            self.health_avg.add(avg_v)
+
+    def summary(self) -> dict:
+        """Flat acceptance metrics for display or export."""
+        v = self.voltage
+        out = {"samples": v.count, "min": v.min, "max": v.max,
+               "mean": v.mean if v.count else None,
+               "std": v.std if v.count else None,
+               "rms": v.rms if v.count else None}
+        for q in self.PERCENTILES:
+            out[f"p{q * 100:g}"] = self.sketch.quantile(q)
+        out.update({"health_reports": self.health_count, "health_min": self.health_min,
+                    "health_max": self.health_max,
+                    "health_avg": self.health_avg.mean if self.health_avg.count else None})
+        return out
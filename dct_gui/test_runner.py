@@ -1,8 +1,134 @@
 # test_runner.py
+import json
+import queue
+import threading
 import time
+from collections import OrderedDict
+from concurrent.futures import Future
 import serial
 from serial import SerialException, SerialTimeoutException
 from serial.tools import list_ports
+from binary_protocol import BinaryFramer, PROTO_REQUEST, parse_proto_reply
+from session_capture import RX, TX, SessionRecorder
+
+# Events that prove the MCU is up (answer to the connect-time 'status' probe, boot banner)
+READY_EVENTS = ("status", "ready")
+
+# Event the MCU answers a command with (used to match replies to requests)
+REPLY_EVENTS = {
+    "status": "status",
+    "detect": "detect",
+    "select_nand": "status",
+    "select_inverter": "status",
+    "define_test": "ack",
+    "start_nand": "summary",
+    "start_inverter": "summary",
+    "start_loaded": "summary",
+    "start_opamp": "status",
+    "stop": "status",
+}
+
+# Events the MCU streams on its own; never the reply to a command
+STREAM_EVENTS = ("pwm", "health", "vector", "row", "sample", "probe")
+
+
+def line_event(line):
+    """Return the "event" name of a JSON line, or None for text / malformed lines."""
+    if not line.startswith("{"):
+        return None
+    try:
+        data = json.loads(line)
+    except ValueError:
+        return None
+    return data.get("event") if isinstance(data, dict) else None
+
+
+def command_word(command):
+    """First word of a text command, or the "cmd" field of a JSON command."""
+    command = command.strip()
+    if command.startswith("{"):
+        try:
+            return str(json.loads(command).get("cmd", ""))
+        except (ValueError, AttributeError):
+            return ""
+    return command.split(" ", 1)[0]
+
+
+class PendingRequests:
+    """
+    Thread-safe table of in-flight requests and their deadlines.
+
+    A reply carrying an "id" resolves exactly that request (or, once that request
+    has expired, is absorbed); a reply without one resolves the oldest pending
+    request expecting its event name. Futures (and
+    their done-callbacks) complete on the thread that calls resolve()/expire().
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._next_id = 1
+        self._pending = OrderedDict()  # id -> (expect, deadline, future)
+
+    def __len__(self):
+        return len(self._pending)
+
+    def add(self, expect, timeout):
+        """Register a request; returns (request_id, Future)."""
+        fut = Future()
+        with self._lock:
+            rid = self._next_id
+            self._next_id += 1
+            fut.request_id = rid
+            self._pending[rid] = (expect, time.monotonic() + timeout, fut)
+        return rid, fut
+
+    def resolve(self, data):
+        """Complete the request this reply belongs to. Returns True if one matched."""
+        if not isinstance(data, dict):
+            return False
+        rid = data.get("id")
+        evt = data.get("event")
+        with self._lock:
+            if rid in self._pending:
+                fut = self._pending.pop(rid)[2]
+            elif type(rid) is int and 0 < rid < self._next_id:
+                return True  # late reply to an expired/failed request: never hand it to another
+            else:
+                fut = None
+                for key, (expect, _, _) in self._pending.items():
+                    if expect is not None and expect == evt:
+                        fut = self._pending.pop(key)[2]
+                        break
+        if fut is None:
+            return False
+        if not fut.done():  # a cancelled request still owns its reply
+            fut.set_result(data)
+        return True
+
+    def fail(self, rid, exc):
+        with self._lock:
+            entry = self._pending.pop(rid, None)
+        if entry is not None and not entry[2].done():
+            entry[2].set_exception(exc)
+
+    def expire(self, now=None):
+        """Fail every request whose deadline has passed with TimeoutError."""
+        now = time.monotonic() if now is None else now
+        with self._lock:
+            late = [rid for rid, (_, deadline, _) in self._pending.items() if deadline <= now]
+            futs = [self._pending.pop(rid)[2] for rid in late]
+        for fut in futs:
+            if not fut.done():
+                fut.set_exception(TimeoutError(f"no reply to request {fut.request_id}"))
+        return len(futs)
+
+    def cancel_all(self, exc):
+        with self._lock:
+            futs = [entry[2] for entry in self._pending.values()]
+            self._pending.clear()
+        for fut in futs:
+            if not fut.done():
+                fut.set_exception(exc)
 
 
 class TestRunner:
@@ -12,11 +138,21 @@ class TestRunner:
     Key behaviors for GUI use:
       - available_ports(): enumerate ports for a dropdown
       - connect(port, baudrate): open with a short read timeout for smooth polling
+      - connect(..., binary=True): negotiate the framed binary stream, JSON otherwise
+      - reconnect(): reopen without the boot wait when the board has not reset
       - send_command(cmd): appends '\n' if missing
+      - request(cmd, callback=...): send and get a Future for the matching reply
       - receive_response(): RETURN ONE LINE or None (non-blocking-ish, obeys short timeout)
+      - start_reader(on_lines): read continuously on a worker thread; lines are queued
+        and outgoing commands are coalesced into single writes on the same thread
+      - send_many(cmds): several commands in one write
+      - start_recording(path) / stop_recording(): capture traffic (session_capture)
       - close_connection(): safe teardown
     """
 
+    # seconds between 'status' probes while waiting for the MCU in connect()
+    HANDSHAKE_RESEND = 0.25
+
     def __init__(self, port='COM3', baudrate=9600, timeout=0.05):
         """
         :param port: default serial port (string)
@@ -27,6 +163,18 @@ class TestRunner:
         self.baudrate = baudrate
         self.timeout = timeout  # keep small (e.g., 0.02–0.1) so GUI stays responsive
         self.ser = None
+        self.reader = None
+        self.last_error = None
+        self.write_error = None  # newest failed write, also those queued after send_many() returned
+        self.write_errors = 0
+        self._inbox = queue.Queue()
+        self._notified = threading.Event()
+        self._outbox = queue.SimpleQueue()  # encoded writes for the reader thread
+        self.framer = LineFramer()
+        self.binary = False  # True once the MCU acknowledged binary framing
+        self.ready = False   # True once the MCU answered the connect handshake
+        self.requests = PendingRequests()
+        self.recorder = None  # SessionRecorder while a capture is running
 
     # ---------- Port discovery ----------
     @staticmethod
@@ -43,9 +191,17 @@ class TestRunner:
         return out
 
     # ---------- Connection control ----------
-    def connect(self, port=None, baudrate=None, timeout=None):
+    def connect(self, port=None, baudrate=None, timeout=None, binary=False, handshake_timeout=2.0):
         """
         Open the serial port with given settings (overrides the defaults if provided).
+
+        Instead of a fixed settle delay, a 'status' probe is repeated until the MCU
+        answers (or handshake_timeout passes; legacy firmware may never answer).
+        Lines received meanwhile, including the reply, stay in the inbox.
+
+        :param binary: ask the MCU for the framed binary stream (see binary_protocol);
+                       falls back to newline-delimited JSON if it does not acknowledge
+        :param handshake_timeout: seconds to wait for the MCU (covers a bootloader reset)
         """
         if port is not None:
             self.port = port
@@ -55,28 +211,140 @@ class TestRunner:
             self.timeout = timeout
 
         self.close_connection()
+        self.framer = LineFramer()
+        self.binary = False
+        self._inbox = queue.Queue()
         try:
-            self.ser = serial.Serial(
-                self.port,
-                self.baudrate,
-                timeout=self.timeout,       # short read timeout for polling
-                write_timeout=0.25,         # short write timeout
-                exclusive=True              # prevent multiple opens where supported
-            )
-            # Give the MCU a moment to settle after opening the port.
-            time.sleep(0.2)
+            self._open()
             # Clear any stale bytes
             try:
                 self.ser.reset_input_buffer()
                 self.ser.reset_output_buffer()
             except Exception:
                 pass
+            self.ready = self._handshake(handshake_timeout)
+            if binary:
+                self.negotiate_binary()
             return True
         except Exception as e:
             self.ser = None
             # Let caller surface this in the GUI
             raise
 
+    def reconnect(self, probe_timeout=0.1, handshake_timeout=2.0):
+        """
+        Reopen the current port after a drop.
+
+        If the board answers a single status probe within probe_timeout it has not
+        reset: the negotiated stream mode is kept and no boot wait is paid.
+        Otherwise this falls back to a full connect().
+        """
+        was_binary = self.binary
+        self.close_connection()
+        self._inbox = queue.Queue()
+        try:
+            self._open()
+            self.framer = BinaryFramer() if was_binary else LineFramer()
+            self.binary = was_binary
+            if self._handshake(probe_timeout, resend=False):
+                self.ready = True
+                return True
+        except Exception:
+            self.close_connection()
+        return self.connect(binary=was_binary, handshake_timeout=handshake_timeout)
+
+    def adopt(self, other):
+        """
+        Take over the open connection of another runner for the same port (e.g.
+        one reopened on a worker thread), so this runner's state is only ever
+        touched by its owner. Neither runner may have a reader running.
+        """
+        self.close_connection()
+        self.ser, other.ser = other.ser, None
+        self.framer = other.framer
+        self.binary = other.binary
+        self.ready = other.ready
+        self._inbox = other._inbox
+        self.last_error = None
+
+    def _open(self):
+        self.ser = serial.Serial(
+            self.port,
+            self.baudrate,
+            timeout=self.timeout,       # short read timeout for polling
+            write_timeout=0.25,         # short write timeout
+            exclusive=True              # prevent multiple opens where supported
+        )
+
+    def _handshake(self, timeout, resend=True):
+        """
+        Probe with 'status' until a status/ready event arrives or timeout passes.
+
+        The probe is repeated every HANDSHAKE_RESEND seconds because a board that
+        reset on open drops bytes while its bootloader runs. Returns True if the
+        MCU answered.
+        """
+        if not self.is_connected():
+            return False
+        deadline = time.monotonic() + timeout
+        next_probe = 0.0
+        try:
+            while True:
+                now = time.monotonic()
+                if now >= deadline:
+                    return False
+                if now >= next_probe:
+                    if not self.send_command("status"):
+                        return False
+                    next_probe = now + self.HANDSHAKE_RESEND if resend else deadline
+                ready = False
+                for item in self._read_lines():
+                    evt = item.get("event") if isinstance(item, dict) else line_event(item)
+                    ready = ready or evt in READY_EVENTS
+                    self._inbox.put(item)
+                if ready:
+                    return True
+        except Exception:
+            # best-effort: an unresponsive or odd port still counts as connected
+            return False
+
+    def negotiate_binary(self, timeout=0.25):
+        """
+        Ask the MCU to switch its stream to binary frames.
+
+        Reads line by line (never past the reply) until the MCU answers or the
+        deadline passes; other lines received meanwhile stay in the inbox. The
+        reads go through the line framer, so a line the handshake left half
+        framed is completed rather than lost.
+        Returns True if binary mode is now active.
+        """
+        if not self.is_connected() or self.reader_running():
+            return False
+        if not self.send_command(PROTO_REQUEST):
+            return False
+        deadline = time.monotonic() + timeout
+        try:
+            while time.monotonic() < deadline:
+                raw = self.ser.readline()
+                if not raw:
+                    continue
+                lines = self.framer.feed(raw)
+                if self.recorder is not None and lines:
+                    self.recorder.record(RX, lines)
+                for line in lines:
+                    mode = parse_proto_reply(line)
+                    if mode is None:
+                        self._inbox.put(line)
+                        continue
+                    if mode == "binary":
+                        # readline() stopped at the reply: nothing binary is buffered yet
+                        self.framer = BinaryFramer()
+                        self.binary = True
+                    return self.binary
+        except (SerialException, OSError):
+            pass
+        return False
+
     def is_connected(self):
         return (self.ser is not None) and self.ser.is_open
 
@@ -87,6 +355,9 @@ class TestRunner:
             pass  # best-effort during GC
 
     def close_connection(self):
+        self.stop_reader()
+        if len(self.requests):
+            self.requests.cancel_all(ConnectionError("serial connection closed"))
         if self.ser:
             try:
                 if self.ser.is_open:
@@ -100,43 +371,315 @@ class TestRunner:
         """
         Send a single-line command. A trailing newline is appended if missing.
 
-        Returns True on success, False on failure.
+        With the reader thread running the line is queued and written by that
+        thread (coalesced with other pending commands); the caller never blocks,
+        and a write that fails later is counted in write_errors / write_error.
+        Returns True on success (or once queued), False on failure.
+        """
+        return self.send_many([command])
+
+    def send_many(self, commands) -> bool:
+        """
+        Send several single-line commands with one write.
+
+        Returns True on success (or once queued), False on failure.
         """
         if not self.is_connected():
             return False
+        commands = list(commands)
+        if self.recorder is not None:
+            self.recorder.record(TX, commands)
+        data = "".join(c if c.endswith("\n") else (c + "\n") for c in commands).encode("utf-8")
+        if not data:
+            return True
+        if self.reader_running():
+            self._outbox.put(data)
+            self.reader.wake()
+            return True
         try:
-            line = command if command.endswith("\n") else (command + "\n")
-            self.ser.write(line.encode("utf-8"))
-            self.ser.flush()
+            # No flush(): write() already hands the bytes to the driver
+            self.ser.write(data)
             return True
-        except (SerialTimeoutException, SerialException, OSError):
+        except (SerialTimeoutException, SerialException, OSError) as e:
+            self._write_failed(e)
             return False
 
+    def _write_failed(self, exc):
+        self.write_error = exc
+        self.write_errors += 1
+
+    def request(self, command: str, expect=None, timeout: float = 1.0, callback=None) -> Future:
+        """
+        Send a command and return a Future resolved with the reply event dict.
+
+        Several requests may be in flight at once. JSON commands get an "id" field
+        so firmware that echoes it is matched exactly; other replies are matched in
+        order by event name (REPLY_EVENTS unless expect is given).
+
+        The consumer of received lines must pass decoded events to resolve_reply()
+        and call expire_requests() after the deadline; callbacks run on that thread.
+
+        :param expect: reply event name (default from REPLY_EVENTS)
+        :param timeout: seconds until the Future fails with TimeoutError
+        :param callback: optional callable(future), added as a done-callback
+        """
+        if expect is None:
+            expect = REPLY_EVENTS.get(command_word(command))
+        rid, fut = self.requests.add(expect, timeout)
+        if callback is not None:
+            fut.add_done_callback(callback)
+        if command.lstrip().startswith("{"):
+            try:
+                msg = json.loads(command)
+                msg["id"] = rid
+                command = json.dumps(msg)
+            except (ValueError, TypeError):
+                pass
+        if not self.send_command(command):
+            self.requests.fail(rid, ConnectionError(f"failed to send: {command_word(command)}"))
+        return fut
+
+    def resolve_reply(self, data) -> bool:
+        """Hand a received event dict to the pending-request table."""
+        return self.requests.resolve(data)
+
+    def expire_requests(self) -> int:
+        return self.requests.expire()
+
     def receive_response(self):
         """
         Non-blocking-ish: return ONE complete line (without trailing CR/LF) or None.
+        In binary mode record frames come back as already-decoded event dicts.
         Uses the serial port's timeout; keep it small for smooth GUI polling.
+        With the reader thread running this only pops the inbox and never blocks.
         """
+        if self.reader_running():
+            try:
+                return self._inbox.get_nowait()
+            except queue.Empty:
+                return None
         if not self.is_connected():
             return None
-        try:
-            raw = self.ser.readline()  # reads up to '\n' or until timeout
-            if not raw:
+        if self._inbox.empty():
+            try:
+                # One bulk read (blocks up to the port timeout for the first byte)
+                for line in self._read_lines():
+                    self._inbox.put(line)
+            except (SerialException, OSError):
                 return None
-            # Normalize line endings and decode safely
-            return raw.decode("utf-8", errors="ignore").rstrip("\r\n")
-        except (SerialException, OSError, UnicodeDecodeError):
+        try:
+            return self._inbox.get_nowait()
+        except queue.Empty:
             return None
 
+    def _read_lines(self):
+        """Read everything the driver has buffered in one call and frame it."""
+        ser = self.ser
+        data = ser.read(ser.in_waiting or 1)
+        if not data:
+            return []
+        lines = self.framer.feed(data)
+        if lines and self.recorder is not None:
+            self.recorder.record(RX, lines)
+        return lines
+
+    # ---------- Session capture ----------
+    def start_recording(self, path):
+        """Append every line sent and received from now on to a capture file."""
+        self.stop_recording()
+        self.recorder = SessionRecorder(path)
+        return self.recorder
+
+    def stop_recording(self):
+        recorder, self.recorder = self.recorder, None
+        if recorder is not None:
+            recorder.close()
+
     # Optional helper if you want to drain multiple lines in one tick
     def receive_lines(self, max_lines: int = 50):
         """
         Read up to max_lines lines quickly. Returns list[str].
+        max_lines=None drains everything the reader thread has queued so far.
         """
+        # Re-arm the reader's notification before draining so nothing is missed
+        self._notified.clear()
         lines = []
-        for _ in range(max_lines):
+        while max_lines is None or len(lines) < max_lines:
             line = self.receive_response()
             if not line:
                 break
             lines.append(line)
         return lines
+
+    # ---------- Reader thread ----------
+    def start_reader(self, on_lines=None, sink=None):
+        """
+        Start a SerialReader that reads the open port continuously.
+
+        :param on_lines: optional callable invoked (from the reader thread) when new
+                         lines are queued; called once until receive_lines() drains.
+        :param sink: optional callable(lines) that takes each batch instead of the
+                     inbox (e.g. SerialManager's shared, device-tagged queue).
+        """
+        if not self.is_connected():
+            return None
+        self.stop_reader()
+        self.last_error = None
+        self._notified.clear()
+        self._outbox = queue.SimpleQueue()
+        self.reader = SerialReader(self, on_lines=on_lines, sink=sink)
+        self.reader.start()
+        return self.reader
+
+    def stop_reader(self):
+        reader, self.reader = self.reader, None
+        if reader is not None:
+            reader.stop()
+
+    def reader_running(self):
+        return (self.reader is not None) and self.reader.is_alive()
+
+    def _deliver(self, lines, on_lines=None):
+        """Queue lines from the reader thread and wake the consumer once."""
+        for line in lines:
+            self._inbox.put(line)
+        if on_lines is not None and not self._notified.is_set():
+            self._notified.set()
+            on_lines()
+
+
+class LineFramer:
+    """
+    Incremental newline framer for bulk serial reads.
+
+    Bytes are appended to one reusable bytearray; every complete line in it is
+    decoded with a single call straight from a memoryview, and a trailing partial
+    line stays buffered for the next feed().
+    """
+
+    def __init__(self, max_line=4096):
+        """
+        :param max_line: an unfinished line longer than this is dropped, up to
+                         and including its newline
+        """
+        self.max_line = max_line
+        self._buf = bytearray()
+        self._discarding = False  # inside a runaway line: skip through the next newline
+
+    def reset(self):
+        self._buf.clear()
+        self._discarding = False
+
+    def pending(self):
+        """Number of buffered bytes belonging to an unfinished line."""
+        return len(self._buf)
+
+    def feed(self, data):
+        """
+        Append raw bytes and return the complete, non-empty lines (CR/LF stripped).
+        """
+        if self._discarding:
+            nl = data.find(b"\n")
+            if nl < 0:
+                return []
+            data = data[nl + 1:]
+            self._discarding = False
+        buf = self._buf
+        buf += data
+        end = buf.rfind(b"\n")
+        if end < 0:
+            self._check_runaway()
+            return []
+        with memoryview(buf)[:end] as view:
+            text = str(view, "utf-8", "ignore")
+        del buf[:end + 1]
+        self._check_runaway()
+        lines = text.split("\n")
+        if "\r" in text:
+            lines = [ln.rstrip("\r") for ln in lines]
+        return [ln for ln in lines if ln]
+
+    def _check_runaway(self):
+        if len(self._buf) > self.max_line:
+            self._buf.clear()  # runaway noise; resync after the next newline
+            self._discarding = True
+
+
+class SerialReader(threading.Thread):
+    """
+    Worker thread that owns I/O on a TestRunner's serial port.
+
+    Lines are handed to the runner's inbox (a thread-safe queue); the optional
+    on_lines callback lets a GUI marshal a wake-up onto its own thread. Queued
+    commands are joined and written in one call before each read.
+    """
+
+    def __init__(self, runner, on_lines=None, sink=None):
+        super().__init__(name=f"SerialReader[{runner.port}]", daemon=True)
+        self.runner = runner
+        self.on_lines = on_lines
+        self.sink = sink
+        self._stop_event = threading.Event()
+
+    def wake(self):
+        """Interrupt a blocked read where the platform supports it."""
+        cancel = getattr(self.runner.ser, "cancel_read", None)
+        if cancel is not None:
+            try:
+                cancel()
+            except Exception:
+                pass
+
+    def stop(self, timeout=1.0):
+        self._stop_event.set()
+        self.wake()
+        if self is not threading.current_thread():
+            self.join(timeout)
+
+    def _hand_off(self, lines):
+        if self.sink is not None:
+            self.sink(lines)
+        else:
+            self.runner._deliver(lines, self.on_lines)
+
+    def _flush_outbox(self, ser):
+        outbox = self.runner._outbox
+        chunks = []
+        while True:
+            try:
+                chunks.append(outbox.get_nowait())
+            except queue.Empty:
+                break
+        if not chunks:
+            return
+        try:
+            ser.write(b"".join(chunks))
+        except (SerialException, OSError) as e:
+            # send_many() already returned True for these commands: report the loss
+            self.runner._write_failed(e)
+            if not isinstance(e, SerialTimeoutException):
+                raise  # the port is gone; run() reports it as last_error
+            self._hand_off([])  # wakes the consumer so it sees write_error
+
+    def run(self):
+        while not self._stop_event.is_set():
+            ser = self.runner.ser
+            if ser is None or not ser.is_open:
+                break
+            try:
+                self._flush_outbox(ser)
+                lines = self.runner._read_lines()  # blocks up to the port timeout
+            except (SerialException, OSError) as e:
+                if not self._stop_event.is_set():
+                    self.runner.last_error = e
+                    self._hand_off([])  # wakes the consumer so it sees last_error
+                break
+            if lines:
+                self._hand_off(lines)
+        # Best effort: commands queued just before shutdown (e.g. "stop") still go out
+        ser = self.runner.ser
+        try:
+            if ser is not None and ser.is_open:
+                self._flush_outbox(ser)
+        except (SerialException, OSError):
+            pass
@@ -0,0 +1,81 @@
+# ui_presenter.py
+from typing import Any, Callable, Dict, Hashable, List, Optional, Tuple
+
+"""
+Frame-rate limited widget updates, independent of Qt.
+
+Event handlers describe *what* should be shown; the presenter keeps only the
+latest update per key (and accumulates sample series) until the GUI's frame
+timer calls flush(). Widget churn then scales with the display rate, not with
+the serial event rate.
+"""
+
+
+class UiPresenter:
+    """
+    Latest-wins update queue drained once per display frame.
+
+        presenter.set("readout", label.setText, text)   # last call per key wins
+        presenter.append("waveform", plot.extend, v)     # values batched into one call
+        presenter.flush()                                 # from the frame timer
+    """
+
+    def __init__(self, on_dirty: Optional[Callable[[], None]] = None):
+        """
+        :param on_dirty: called when the first update arrives after a flush, so
+                         the owner can schedule the next frame
+        """
+        self.on_dirty = on_dirty
+        self._updates: Dict[Hashable, Tuple[Callable, tuple]] = {}
+        self._series: Dict[Hashable, Tuple[Callable, List[Any]]] = {}
+        self.frames = 0
+        self.coalesced = 0  # updates replaced before they reached a widget
+
+    def __len__(self):
+        return len(self._updates) + len(self._series)
+
+    def _touch(self):
+        if not self._updates and not self._series and self.on_dirty is not None:
+            self.on_dirty()
+
+    def set(self, key: Hashable, apply: Callable, *args) -> None:
+        """Queue apply(*args) for the next frame, replacing any pending update for key."""
+        self._touch()
+        if self._updates.pop(key, None) is not None:
+            self.coalesced += 1
+        self._updates[key] = (apply, args)  # re-insert: applied in order of last change
+
+    def append(self, key: Hashable, apply: Callable, value) -> None:
+        """Collect value; at the next frame apply(values) is called once with all of them."""
+        entry = self._series.get(key)
+        if entry is None:
+            self._touch()
+            self._series[key] = (apply, [value])
+        else:
+            entry[1].append(value)
+
+    def extend(self, key: Hashable, apply: Callable, values) -> None:
+        """Like append() for several values at once."""
+        entry = self._series.get(key)
+        if entry is None:
+            self._touch()
+            self._series[key] = (apply, list(values))
+        else:
+            entry[1].extend(values)
+
+    def discard(self, *keys: Hashable) -> None:
+        """Forget pending updates (e.g. when the widgets behind them are reset)."""
+        for key in keys:
+            self._updates.pop(key, None)
+            self._series.pop(key, None)
+
+    def flush(self) -> int:
+        """Apply everything pending. Returns the number of widget calls made."""
+        series, self._series = self._series, {}
+        updates, self._updates = self._updates, {}
+        for apply, values in series.values():
+            apply(values)
+        for apply, args in updates.values():
+            apply(*args)
+        self.frames += 1
+        return len(series) + len(updates)
@@ -0,0 +1,171 @@
+# vector_compare.py
+from typing import Dict, List, NamedTuple, Optional
+import numpy as np
+from vector_index import BLANK, VectorIndex, logic_level
+
+"""
+Host-side pass/fail verdicts for truth-table tests.
+
+Observed output levels are kept in a rows x gates x outputs array next to the
+expected matrix of a VectorIndex. Streaming vectors are buffered and applied in
+one vectorized step, which also refreshes the mismatch state of just the rows
+it touched (cells, per-row counts and the checked/failed totals), so a verdict
+per frame costs nothing for an unchanged table. The mismatch bitmaps (per row,
+per gate, per pin) are plain array reductions, and the verdict does not depend
+on the MCU's own pass/fail counting.
+"""
+
+
+class FailSignature(NamedTuple):
+    gate: int          # 0-based
+    pin: str
+    kind: str          # "stuck-at-0", "stuck-at-1", "inverted" or "mismatch"
+    rows: List[int]    # failing rows (indices into the expected table)
+
+
+class CompareReport(NamedTuple):
+    rows: int                  # rows in the table
+    checked: int               # rows with at least one observed output
+    failed: int                # rows with at least one mismatch
+    row_fail: np.ndarray       # bool, per row
+    gate_fail: np.ndarray      # int, mismatching cells per gate
+    pin_fail: Dict[str, int]   # mismatching cells per output pin
+    row_bitmaps: np.ndarray    # uint8 rows x ceil(gates*outputs/8), bit g*outputs+j = gate g, output j
+    signatures: List[FailSignature]
+
+    @property
+    def passed(self) -> int:
+        return self.checked - self.failed
+
+
+class VectorComparator:
+    """
+    Compare observed vectors against a VectorIndex's expected outputs.
+
+        cmp = VectorComparator(index)
+        cmp.observe({"A": 1, "B": 1, "Y": 1}, gate=0)
+        cmp.report().failed   # -> 1
+    """
+
+    def __init__(self, index: VectorIndex):
+        self.index = index
+        n_in = len(index.inputs)
+        self.expected = np.ascontiguousarray(index.expected[:, n_in:])       # rows x outputs
+        self.observed = np.full((len(index), index.gates, len(index.outputs)), BLANK, dtype=np.uint8)
+        self.unmatched = 0  # vectors whose inputs are not in the table
+        # mismatch state, kept up to date row by row in observe_many()
+        self.bad = np.zeros(self.observed.shape, dtype=bool)
+        self._row_bad = np.zeros(len(index), dtype=np.int64)   # mismatching cells per row
+        self._row_seen = np.zeros(len(index), dtype=np.int64)  # observed cells per row
+        self.checked = 0  # rows with at least one observed output
+        self.failed = 0   # rows with at least one mismatch
+        self._rows: List[int] = []
+        self._gates: List[int] = []
+        self._levels: List[List[int]] = []
+
+    def reset(self) -> None:
+        self.observed.fill(BLANK)
+        self.unmatched = 0
+        self.bad.fill(False)
+        self._row_bad.fill(0)
+        self._row_seen.fill(0)
+        self.checked = self.failed = 0
+        self._rows, self._gates, self._levels = [], [], []
+
+    # ---------- Input ----------
+    def observe(self, pins: Dict[str, int], gate: Optional[int] = None) -> Optional[int]:
+        """Buffer one observed vector; returns its row or None if it matches none."""
+        row = self.index.row_for(pins)
+        g = gate if isinstance(gate, int) else 0
+        if row is None or not (0 <= g < self.index.gates):
+            self.unmatched += 1
+            return None
+        self._rows.append(row)
+        self._gates.append(g)
+        self._levels.append([logic_level(pins.get(name)) for name in self.index.outputs])
+        return row
+
+    def observe_many(self, rows, gates, levels) -> None:
+        """
+        Apply a batch of observations at once.
+
+        :param rows: row indices (-1 = no row, skipped)
+        :param gates: gate per observation
+        :param levels: observations x outputs levels, BLANK where not observed
+        """
+        rows = np.asarray(rows, dtype=np.intp)
+        gates = np.asarray(gates, dtype=np.intp)
+        levels = np.asarray(levels, dtype=np.uint8).reshape(len(rows), -1)
+        ok = (rows >= 0) & (rows < self.observed.shape[0]) & (gates >= 0) & (gates < self.observed.shape[1])
+        rows, gates, levels = rows[ok], gates[ok], levels[ok]
+        current = self.observed[rows, gates]
+        self.observed[rows, gates] = np.where(levels != BLANK, levels, current)
+        self._refresh(np.unique(rows))
+
+    def _refresh(self, rows: np.ndarray) -> None:
+        """Recompute the mismatch state of the given (unique) rows."""
+        if len(rows) == 0:
+            return
+        was_checked = int((self._row_seen[rows] > 0).sum())
+        was_failed = int((self._row_bad[rows] > 0).sum())
+        obs = self.observed[rows]
+        seen = obs != BLANK
+        bad = seen & (obs != self.expected[rows][:, None, :])
+        self.bad[rows] = bad
+        self._row_seen[rows] = seen.sum(axis=(1, 2))
+        self._row_bad[rows] = bad.sum(axis=(1, 2))
+        self.checked += int((self._row_seen[rows] > 0).sum()) - was_checked
+        self.failed += int((self._row_bad[rows] > 0).sum()) - was_failed
+
+    def commit(self) -> None:
+        """Apply buffered observe() calls."""
+        if self._rows:
+            rows, gates, levels = self._rows, self._gates, self._levels
+            self._rows, self._gates, self._levels = [], [], []
+            self.observe_many(rows, gates, levels)
+
+    # ---------- Verdict ----------
+    def mismatch(self) -> np.ndarray:
+        """bool rows x gates x outputs: observed and different from expected (read-only view)."""
+        self.commit()
+        return self.bad
+
+    def report(self) -> CompareReport:
+        bad = self.mismatch()
+        n, gates, outs = bad.shape
+        row_fail = self._row_bad > 0
+        flat = bad.reshape(n, gates * outs)
+        bitmaps = np.packbits(flat, axis=1, bitorder="little") if flat.size else np.zeros((n, 0), np.uint8)
+        per_pin = bad.sum(axis=(0, 1))
+        return CompareReport(
+            rows=n,
+            checked=self.checked,
+            failed=self.failed,
+            row_fail=row_fail,
+            gate_fail=bad.sum(axis=(0, 2)),
+            pin_fail={name: int(per_pin[j]) for j, name in enumerate(self.index.outputs)},
+            row_bitmaps=bitmaps,
+            signatures=self.signatures(),
+        )
+
+    def signatures(self) -> List[FailSignature]:
+        """Classify each failing (gate, output) column by its observed pattern."""
+        bad = self.mismatch()
+        if not self.failed:
+            return []
+        out = []
+        gates_bad, pins_bad = np.nonzero(bad.any(axis=0))
+        for g, j in zip(gates_bad.tolist(), pins_bad.tolist()):
+            mask = self.observed[:, g, j] != BLANK
+            got = self.observed[mask, g, j]
+            want = self.expected[mask, j]
+            if (got == 0).all():
+                kind = "stuck-at-0"
+            elif (got == 1).all():
+                kind = "stuck-at-1"
+            elif (got != want).all():
+                kind = "inverted"
+            else:
+                kind = "mismatch"
+            out.append(FailSignature(g, self.index.outputs[j], kind, np.flatnonzero(bad[:, g, j]).tolist()))
+        return out
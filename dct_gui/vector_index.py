@@ -0,0 +1,190 @@
+# vector_index.py
+import re
+from typing import Dict, List, Optional, Sequence, Tuple
+import numpy as np
+import logic_expr
+
+"""
+Truth-table layout and O(1) placement of observed vectors.
+
+A VectorIndex is built from a test definition (the YAML 'pins' and 'rows') or
+from explicit pin lists. Input levels are bit-packed into an integer key
+(bit i = inputs[i]) and looked up in a dense row table, so placing a result
+costs the same for 4 rows as for 64k. Multi-gate chips (pins listed once per
+gate, e.g. the quad NAND) get one set of output columns per gate.
+"""
+
+BLANK = 255          # same cell encoding as vector_table_model
+MAX_LUT_INPUTS = 20  # dense lookup table up to 2**20 entries; a dict beyond
+
+_OUTPUT_NAME = re.compile(r'(\d*Y|Q|OUT|Z)\d*', re.I)
+
+
+def is_output_name(name: str) -> bool:
+    """Default pin direction when a definition does not list its outputs."""
+    return bool(_OUTPUT_NAME.fullmatch(str(name)))
+
+
+def logic_level(v) -> int:
+    """0/1 for logic levels, BLANK for anything else (missing, don't-care)."""
+    try:
+        v = int(v)
+    except (TypeError, ValueError):
+        return BLANK
+    return v if v in (0, 1) else BLANK
+
+
+class VectorIndex:
+    """
+    Expected vectors of one test plus the mapping input levels -> row.
+
+        index = VectorIndex.from_definition(load_yaml_test("74F00_nand.yaml"))
+        index.row_for({"A": 1, "B": 0})               # -> 2
+        index.place({"A": 1, "B": 0, "Y": 1}, gate=3)  # -> [(2, col, 1)]
+    """
+
+    def __init__(self, inputs: Sequence[str], outputs: Sequence[str], rows, gates: int = 1):
+        """
+        :param inputs: input pin names, in column order
+        :param outputs: output pin names, in column order
+        :param rows: array-like n x (len(inputs) + len(outputs)) of expected levels
+        :param gates: identical gates on the chip, each with its own result columns
+        """
+        self.inputs = tuple(inputs)
+        self.outputs = tuple(outputs)
+        self.gates = max(int(gates), 1)
+        width = len(self.inputs) + len(self.outputs)
+        self.expected = np.asarray(rows, dtype=np.uint8).reshape(-1, width) if width else \
+            np.zeros((0, 0), dtype=np.uint8)
+
+        n_in = len(self.inputs)
+        keys = np.zeros(len(self.expected), dtype=np.int64)
+        for i in range(n_in):
+            keys |= self.expected[:, i].astype(np.int64) << i
+        self.keys = keys
+        self._lut = None
+        self._rows: Dict[int, int] = {}
+        first = np.arange(len(keys) - 1, -1, -1)  # assign in reverse: first duplicate wins
+        if n_in <= MAX_LUT_INPUTS:
+            self._lut = np.full(1 << n_in, -1, dtype=np.int32)
+            self._lut[keys[first]] = first
+        else:
+            for r in first:
+                self._rows[int(keys[r])] = int(r)
+
+    @classmethod
+    def from_definition(cls, data: dict) -> "VectorIndex":
+        """
+        Build from a test definition: 'pins' (name -> pin or per-gate pin list)
+        and 'rows' (list of {name: level}). Optional 'inputs'/'outputs' name lists
+        override the direction guessed from pin names.
+
+        'outputs' may instead map output names to boolean expressions
+        (Y: "!(A & B)", see logic_expr); expected levels are then computed, for
+        the listed rows or, without rows, for every input combination.
+        """
+        pins = data.get("pins") or {}
+        rows = data.get("rows") or []
+        names = list(pins) or list(rows[0] if rows else [])
+        outputs = data.get("outputs")
+        inputs = data.get("inputs")
+        expressions = outputs if isinstance(outputs, dict) else None
+        if expressions:
+            outputs = list(expressions)
+        elif not (isinstance(outputs, list) and all(isinstance(n, str) for n in outputs)):
+            outputs = [n for n in names if is_output_name(n)]
+        if not (isinstance(inputs, list) and all(isinstance(n, str) for n in inputs)):
+            inputs = [n for n in names if n not in outputs]
+        if expressions and not inputs:
+            used = set().union(*(logic_expr.compile_expr(str(e)).names for e in expressions.values()))
+            inputs = sorted(used - set(outputs))
+        per_gate = [len(p) for p in pins.values() if isinstance(p, (list, tuple))]
+        gates = min(per_gate) if per_gate else 1
+        if expressions:
+            return cls(inputs, outputs, cls._expression_table(expressions, inputs, rows), gates)
+        columns = list(inputs) + list(outputs)
+        table = [[logic_level(row.get(n)) for n in columns] for row in rows
+                 if isinstance(row, dict) and all(logic_level(row.get(n)) != BLANK for n in inputs)]
+        return cls(inputs, outputs, table, gates)
+
+    @staticmethod
+    def _expression_table(expressions: Dict[str, str], inputs: Sequence[str], rows: list) -> np.ndarray:
+        if not rows:
+            return logic_expr.truth_table(expressions, inputs)
+        ins = np.array([[logic_level(row.get(n)) for n in inputs] for row in rows
+                        if isinstance(row, dict) and all(logic_level(row.get(n)) != BLANK for n in inputs)],
+                       dtype=np.uint8).reshape(-1, len(inputs))
+        return np.hstack([ins, logic_expr.expected_outputs(expressions, inputs, ins)])
+
+    # ---------- Lookup ----------
+    def __len__(self):
+        return len(self.expected)
+
+    def key(self, pins: Dict[str, int]) -> Optional[int]:
+        """Bit-packed input levels, or None if an input is missing."""
+        k = 0
+        bit = 1
+        try:
+            for name in self.inputs:
+                v = pins.get(name)
+                if v is None:
+                    return None
+                if int(v):
+                    k |= bit
+                bit <<= 1
+        except (TypeError, ValueError):
+            return None
+        return k
+
+    def row_for(self, pins: Dict[str, int]) -> Optional[int]:
+        k = self.key(pins)
+        if k is None:
+            return None
+        if self._lut is not None:
+            r = int(self._lut[k])
+            return r if r >= 0 else None
+        return self._rows.get(k)
+
+    def rows_for_keys(self, keys) -> np.ndarray:
+        """Vectorized lookup; -1 where a key has no row."""
+        keys = np.asarray(keys, dtype=np.int64)
+        if self._lut is not None:
+            ok = (keys >= 0) & (keys < len(self._lut))
+            return np.where(ok, self._lut[np.where(ok, keys, 0)], -1)
+        return np.array([self._rows.get(int(k), -1) for k in keys], dtype=np.int64)
+
+    # ---------- Results layout ----------
+    def result_column(self, gate: int, output: int) -> int:
+        return len(self.inputs) + gate * len(self.outputs) + output
+
+    def headers(self) -> List[str]:
+        """Results table columns: the inputs, then every output of every gate."""
+        if self.gates == 1:
+            return list(self.inputs) + list(self.outputs)
+        return list(self.inputs) + [f"{o}[{g + 1}]" for g in range(self.gates) for o in self.outputs]
+
+    def results_layout(self) -> np.ndarray:
+        """Results matrix with the input columns filled and every output BLANK."""
+        n_in = len(self.inputs)
+        out = np.full((len(self.expected), n_in + self.gates * len(self.outputs)), BLANK, dtype=np.uint8)
+        out[:, :n_in] = self.expected[:, :n_in]
+        return out
+
+    def output_columns(self) -> range:
+        return range(len(self.inputs), len(self.inputs) + self.gates * len(self.outputs))
+
+    def place(self, pins: Dict[str, int], gate: Optional[int] = None) -> List[Tuple[int, int, int]]:
+        """
+        Result cells for one observed vector: [(row, column, level), ...].
+        Empty when the inputs match no row or the gate is out of range.
+        """
+        row = self.row_for(pins)
+        g = gate if isinstance(gate, int) else 0
+        if row is None or not (0 <= g < self.gates):
+            return []
+        cells = []
+        for j, name in enumerate(self.outputs):
+            v = pins.get(name)
+            if v is not None:
+                cells.append((row, self.result_column(g, j), v))
+        return cells
@@ -0,0 +1,145 @@
+# vector_table_model.py
+from typing import Optional, Sequence
+import numpy as np
+from PyQt5.QtCore import QAbstractTableModel, QModelIndex, Qt
+from PyQt5.QtGui import QColor
+
+"""
+Qt table model over a uint8 matrix of logic levels.
+
+Truth tables and live results are stored as one numpy array (rows x pins)
+instead of a QTableWidgetItem per cell; views only pull the visible cells, so
+tables with thousands of vectors cost one byte per cell.
+"""
+
+BLANK = 255    # no value yet (shown empty)
+UNKNOWN = 254  # anything that is not a logic level (shown as 'X')
+
+
+def cell_code(value) -> int:
+    """Map 0/1 (int or str), '' / None and anything else to the matrix encoding."""
+    if value is None or value == "":
+        return BLANK
+    try:
+        v = int(value)
+    except (TypeError, ValueError):
+        return UNKNOWN
+    return v if v in (0, 1) else UNKNOWN
+
+
+_TEXT = {0: "0", 1: "1", BLANK: "", UNKNOWN: "X"}
+_FAIL_BRUSH = QColor(255, 205, 205)
+
+
+class VectorTableModel(QAbstractTableModel):
+    """
+    Read-only model: set_table() replaces the whole layout, set_cell()/set_column()
+    update values and notify only the cells that changed.
+    """
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.headers = []
+        self.values = np.zeros((0, 0), dtype=np.uint8)
+        self.highlight = None  # optional bool matrix: cells drawn as failures
+
+    # ---------- Qt model interface ----------
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else self.values.shape[0]
+
+    def columnCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else self.values.shape[1]
+
+    def data(self, index, role=Qt.DisplayRole):
+        if not index.isValid():
+            return None
+        if role == Qt.DisplayRole:
+            return _TEXT.get(int(self.values[index.row(), index.column()]), "?")
+        if role == Qt.TextAlignmentRole:
+            return Qt.AlignCenter
+        if role == Qt.BackgroundRole and self.highlight is not None \
+                and self.highlight[index.row(), index.column()]:
+            return _FAIL_BRUSH
+        return None
+
+    def headerData(self, section, orientation, role=Qt.DisplayRole):
+        if role != Qt.DisplayRole:
+            return None
+        if orientation == Qt.Horizontal:
+            return self.headers[section] if section < len(self.headers) else None
+        return str(section)
+
+    # ---------- Table contents ----------
+    def set_table(self, headers: Sequence[str], rows) -> None:
+        """
+        Replace the table.
+
+        :param headers: column (pin) names
+        :param rows: array-like rows x len(headers) of levels; BLANK for empty cells
+        """
+        values = np.asarray(rows, dtype=np.uint8).reshape(-1, len(headers)) if headers else \
+            np.zeros((0, 0), dtype=np.uint8)
+        self.beginResetModel()
+        self.headers = list(headers)
+        self.values = np.ascontiguousarray(values)
+        self.highlight = None
+        self.endResetModel()
+
+    def clear(self) -> None:
+        self.set_table([], np.zeros((0, 0), dtype=np.uint8))
+
+    def set_cell(self, row: int, col: int, value) -> bool:
+        """Store one value; emits dataChanged for that cell only if it changed."""
+        rows, cols = self.values.shape
+        if not (0 <= row < rows and 0 <= col < cols):
+            return False
+        code = cell_code(value)
+        if self.values[row, col] == code:
+            return False
+        self.values[row, col] = code
+        idx = self.index(row, col)
+        self.dataChanged.emit(idx, idx, [Qt.DisplayRole])
+        return True
+
+    def set_column(self, col: int, values, rows: Optional[np.ndarray] = None) -> int:
+        """
+        Vectorized column update (e.g. a whole summary at once).
+
+        :param values: codes for every row, or for the given row indices
+        :param rows: optional row indices matching values
+        Returns the number of cells that changed; one dataChanged spans them.
+        """
+        if not (0 <= col < self.values.shape[1]):
+            return 0
+        column = self.values[:, col]
+        new = np.asarray(values, dtype=np.uint8)
+        target = np.arange(len(column)) if rows is None else np.asarray(rows, dtype=np.intp)
+        n = min(len(new), len(target))
+        target, new = target[:n], new[:n]
+        keep = (target >= 0) & (target < len(column))
+        target, new = target[keep], new[keep]
+        changed = target[column[target] != new]
+        if changed.size == 0:
+            return 0
+        column[target] = new
+        first, last = int(changed.min()), int(changed.max())
+        self.dataChanged.emit(self.index(first, col), self.index(last, col), [Qt.DisplayRole])
+        return int(changed.size)
+
+    def clear_column(self, col: int) -> int:
+        return self.set_column(col, np.full(self.values.shape[0], BLANK, dtype=np.uint8))
+
+    def set_highlight(self, mask: Optional[np.ndarray]) -> None:
+        """Mark cells (bool matrix shaped like values, or None) as failures; repaints only on change."""
+        if mask is not None and mask.shape != self.values.shape:
+            return
+        old = self.highlight
+        if (old is None and (mask is None or not mask.any())) or \
+                (old is not None and mask is not None and np.array_equal(old, mask)):
+            return
+        self.highlight = None if mask is None else mask.copy()
+        changed = mask if old is None else (old if mask is None else old != mask)
+        rows = np.flatnonzero(changed.any(axis=1))
+        if rows.size:
+            self.dataChanged.emit(self.index(int(rows[0]), 0),
+                                  self.index(int(rows[-1]), self.values.shape[1] - 1), [Qt.BackgroundRole])
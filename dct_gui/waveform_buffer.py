@@ -0,0 +1,302 @@
+# waveform_buffer.py
+from typing import Iterable, Optional
+import numpy as np
+
+"""
+Sample storage and screen mapping for the waveform plot, independent of Qt.
+
+SampleRing is a preallocated circular buffer: appending a batch is one or two
+slice copies no matter how full the buffer is, so the plot can keep hundreds of
+thousands of samples. to_screen() maps the samples to polyline coordinates in
+one vectorized pass.
+
+For the whole run, MinMaxPyramid keeps min/max envelopes at decreasing
+resolutions; a view of any span (HistoryView) is drawn from the level that
+gives about one entry per pixel, so paint cost follows the widget width rather
+than the sample count.
+"""
+
+
+class SampleRing:
+    """
+    Fixed-capacity float64 ring; the oldest samples are overwritten.
+
+        ring = SampleRing(4)
+        ring.extend([1, 2, 3, 4, 5])
+        ring.view()   # -> array([2., 3., 4., 5.])
+    """
+
+    def __init__(self, capacity: int):
+        self.capacity = max(int(capacity), 1)
+        self._buf = np.zeros(self.capacity, dtype=np.float64)
+        self._head = 0   # next write position
+        self._count = 0
+
+    def __len__(self):
+        return self._count
+
+    def clear(self) -> None:
+        self._head = 0
+        self._count = 0
+
+    def extend(self, values: Iterable[float]) -> int:
+        """Append a batch; values that are not finite numbers are skipped. Returns samples added."""
+        arr = clean_samples(values)
+        n = len(arr)
+        if n == 0:
+            return 0
+        if n >= self.capacity:
+            self._buf[:] = arr[-self.capacity:]
+            self._head = 0
+            self._count = self.capacity
+            return n
+        first = min(n, self.capacity - self._head)
+        self._buf[self._head:self._head + first] = arr[:first]
+        self._buf[:n - first] = arr[first:]
+        self._head = (self._head + n) % self.capacity
+        self._count = min(self._count + n, self.capacity)
+        return n
+
+    def view(self) -> np.ndarray:
+        """Samples oldest first (a copy only when the data wraps around)."""
+        if self._count < self.capacity:
+            return self._buf[:self._count]
+        if self._head == 0:
+            return self._buf
+        return np.concatenate((self._buf[self._head:], self._buf[:self._head]))
+
+    def last(self, n: int) -> np.ndarray:
+        """The newest n samples, oldest first."""
+        data = self.view()
+        return data[max(len(data) - int(n), 0):]
+
+
+def clean_samples(values: Iterable[float]) -> np.ndarray:
+    """float64 array of the finite numbers in values."""
+    try:
+        arr = np.asarray(values, dtype=np.float64).reshape(-1)
+    except (TypeError, ValueError):
+        arr = np.fromiter(_floats(values), dtype=np.float64)
+    finite = np.isfinite(arr)
+    return arr if finite.all() else arr[finite]
+
+
+def _floats(values):
+    for v in values:
+        try:
+            yield float(v)
+        except (TypeError, ValueError):
+            pass
+
+
+def to_screen(samples: np.ndarray, left: float, bottom: float, width: float, height: float,
+              vmin: float, vmax: float, pos: Optional[np.ndarray] = None,
+              start: int = 0, stop: Optional[int] = None) -> np.ndarray:
+    """
+    Polyline coordinates for samples spread over the plot area.
+
+    :param samples: values, oldest first
+    :param left, bottom: plot origin in widget coordinates (y grows downwards)
+    :param width, height: plot area size
+    :param vmin, vmax: value range mapped to bottom..top; values outside are clipped
+    :param pos: sample index of each value (default 0..n-1)
+    :param start, stop: sample range spanning the plot width (default 0..n)
+    Returns an n x 2 float64 array of (x, y), ready to copy into a QPolygonF.
+    """
+    n = len(samples)
+    out = np.empty((n, 2), dtype=np.float64)
+    if n == 0:
+        return out
+    if stop is None:
+        stop = start + n
+    dx = width / max(1, stop - start - 1)
+    if pos is None:
+        np.multiply(np.arange(n, dtype=np.float64), dx, out=out[:, 0])
+    else:
+        np.multiply(np.asarray(pos, dtype=np.float64) - start, dx, out=out[:, 0])
+    out[:, 0] += left
+    scale = height / (vmax - vmin) if vmax > vmin else 0.0
+    np.clip(samples, vmin, vmax, out=out[:, 1])
+    out[:, 1] -= vmin
+    out[:, 1] *= -scale
+    out[:, 1] += bottom
+    return out
+
+
+def envelope_trace(pos: np.ndarray, lo: np.ndarray, hi: np.ndarray):
+    """
+    One polyline through min/max columns: (pos, values) with each column
+    visited as lo, hi so the line sweeps the full envelope. Plain samples
+    (lo == hi everywhere) are returned as they are.
+    """
+    if np.array_equal(lo, hi):
+        return pos, lo
+    values = np.empty(2 * len(lo), dtype=np.float64)
+    values[0::2] = lo
+    values[1::2] = hi
+    return np.repeat(pos, 2), values
+
+
+# ---------- Long history ----------
+class _Level:
+    """One pyramid level: min/max per block of `block` samples, grown by doubling."""
+
+    def __init__(self, block: int):
+        self.block = block
+        self.n = 0
+        self.lo = np.empty(256, dtype=np.float32)
+        self.hi = np.empty(256, dtype=np.float32)
+        # entries of the level below (raw samples for level 0) not yet forming a block
+        self.tail_lo = np.empty(0, dtype=np.float32)
+        self.tail_hi = np.empty(0, dtype=np.float32)
+
+    def push(self, lo: np.ndarray, hi: np.ndarray) -> None:
+        end = self.n + len(lo)
+        if end > len(self.lo):
+            size = max(end, 2 * len(self.lo))
+            self.lo = np.resize(self.lo, size)
+            self.hi = np.resize(self.hi, size)
+        self.lo[self.n:end] = lo
+        self.hi[self.n:end] = hi
+        self.n = end
+
+
+class MinMaxPyramid:
+    """
+    Min/max envelope of a whole run at several resolutions, built as samples arrive.
+
+    Level 0 keeps one (min, max) pair per `base` samples and every further level
+    combines `factor` entries of the level below, so memory stays a fraction of
+    the raw data and any span can be drawn from a level with about one entry per
+    pixel:
+
+        pyramid.extend(samples)
+        pos, lo, hi = pyramid.envelope(0, pyramid.total, 800)
+    """
+
+    def __init__(self, base: int = 64, factor: int = 4, levels: int = 12):
+        self.base = int(base)
+        self.factor = int(factor)
+        self.levels = [_Level(self.base * self.factor ** k) for k in range(levels)]
+        self.total = 0
+
+    def clear(self) -> None:
+        self.levels = [_Level(level.block) for level in self.levels]
+        self.total = 0
+
+    def extend(self, samples: np.ndarray) -> None:
+        """Add samples (finite float array, oldest first); O(len(samples)) amortized."""
+        lo = hi = np.asarray(samples, dtype=np.float32)
+        self.total += len(lo)
+        step = self.base
+        for level in self.levels:
+            if len(level.tail_lo):
+                lo = np.concatenate((level.tail_lo, lo))
+                hi = np.concatenate((level.tail_hi, hi))
+            m = len(lo) // step
+            level.tail_lo, level.tail_hi = lo[m * step:], hi[m * step:]
+            if m == 0:
+                break
+            lo = lo[:m * step].reshape(m, step).min(axis=1)
+            hi = hi[:m * step].reshape(m, step).max(axis=1)
+            level.push(lo, hi)
+            step = self.factor
+
+    def _entries(self, k: int, first: int, last: int):
+        """
+        Level k entries [first, last), where entry level.n is the partial block
+        of samples not yet in a full one; only the slice is ever copied.
+        """
+        level = self.levels[k]
+        lo, hi = level.lo[first:min(last, level.n)], level.hi[first:min(last, level.n)]
+        if last > level.n and self.total > level.n * level.block:
+            tail_lo = np.concatenate([lv.tail_lo for lv in self.levels[:k + 1]])
+            tail_hi = np.concatenate([lv.tail_hi for lv in self.levels[:k + 1]])
+            lo = np.append(lo, tail_lo.min())
+            hi = np.append(hi, tail_hi.max())
+        return lo, hi
+
+    def envelope(self, start: int, stop: int, buckets: int):
+        """
+        Min/max of samples [start, stop) in up to `buckets` columns.
+
+        Returns (pos, lo, hi): the first sample index of each non-empty column
+        and its min/max, from the coarsest level that still resolves a column.
+        """
+        start, stop = max(int(start), 0), min(int(stop), self.total)
+        if stop <= start or buckets < 1:
+            empty = np.empty(0, dtype=np.float64)
+            return empty.astype(np.int64), empty, empty
+        per_bucket = (stop - start) / buckets
+        k = 0
+        while k + 1 < len(self.levels) and self.levels[k + 1].block <= per_bucket:
+            k += 1
+        block = self.levels[k].block
+        first, last = start // block, -(-stop // block)
+        lo, hi = self._entries(k, first, last)
+        pos = np.arange(first, last, dtype=np.int64) * block
+        return bucket_minmax(pos, lo, hi, start, stop, buckets)
+
+
+def bucket_minmax(pos: np.ndarray, lo: np.ndarray, hi: np.ndarray, start: int, stop: int, buckets: int):
+    """
+    Reduce (pos, lo, hi) entries, sorted by pos, to at most one per column of
+    [start, stop) split into `buckets` equal columns. Returns (pos, lo, hi).
+    """
+    if len(pos) <= buckets:
+        return pos, np.asarray(lo, dtype=np.float64), np.asarray(hi, dtype=np.float64)
+    col = np.clip((pos - start) * buckets // max(stop - start, 1), 0, buckets - 1)
+    edges = np.flatnonzero(np.diff(col, prepend=-1))
+    return (pos[edges],
+            np.minimum.reduceat(lo, edges).astype(np.float64),
+            np.maximum.reduceat(hi, edges).astype(np.float64))
+
+
+class HistoryView:
+    """
+    Visible sample window over a growing run, for zoom and pan.
+
+    span None shows the whole run; end None follows the newest sample.
+    """
+
+    MIN_SPAN = 16
+
+    def __init__(self):
+        self.span = None
+        self.end = None
+
+    def reset(self) -> None:
+        self.span = self.end = None
+
+    @property
+    def following(self) -> bool:
+        return self.end is None
+
+    def window(self, total: int):
+        """(start, stop) sample range to draw for a run of `total` samples."""
+        span = total if self.span is None else min(self.span, total)
+        end = total if self.end is None else min(max(self.end, span), total)
+        return end - span, end
+
+    def zoom(self, factor: float, anchor: float, total: int) -> None:
+        """
+        Scale the span by factor (< 1 zooms in) keeping the sample under
+        `anchor` (0..1 across the plot) in place.
+        """
+        start, stop = self.window(total)
+        span = stop - start
+        if total <= 0 or span <= 0:
+            return
+        new_span = int(round(min(max(span * factor, self.MIN_SPAN), total)))
+        new_start = start + anchor * span - anchor * new_span
+        self._place(new_start, new_span, total)
+
+    def pan(self, samples: float, total: int) -> None:
+        """Move the window by `samples` (negative = towards older data)."""
+        start, stop = self.window(total)
+        self._place(start + samples, stop - start, total)
+
+    def _place(self, start: float, span: int, total: int) -> None:
+        end = int(round(min(max(start + span, span), total)))
+        self.span = None if span >= total else span
+        self.end = None if end >= total else end
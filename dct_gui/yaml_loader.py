@@ -1,4 +1,5 @@
 import yaml
+from logic_expr import compile_outputs
 
 def load_yaml_test(file_path):
     """
@@ -13,7 +14,14 @@ def load_yaml_test(file_path):
     try:
         with open(file_path, 'r') as file:
             data = yaml.safe_load(file)
-            return data
+        # Output expressions (outputs: {Y: "!(A & B)"}) are checked at load time
+        outputs = data.get('outputs') if isinstance(data, dict) else None
+        if isinstance(outputs, dict):
+            try:
+                compile_outputs(outputs)
+            except ValueError as e:
+                raise ValueError(f"Invalid output expression in {file_path}: {e}")
+        return data
     except FileNotFoundError:
         raise FileNotFoundError(f"The file {file_path} does not exist.")
         return None